@@ -0,0 +1,450 @@
+import numpy as np
+
+# Seabed friction coefficient used in the MAP++ input deck
+CB_DEFAULT = 0.65
+
+def catenary_geometry(H, V, L, w, EA, CB=CB_DEFAULT):
+    """Horizontal and vertical fairlead-to-anchor distances of an elastic catenary mooring line
+    given the fairlead tension components, along with the Jacobian of those distances.
+    Lines with V < w*L rest partly on the seabed, otherwise the line is fully suspended.
+    See Jonkman (2007), "Dynamics modeling and loads analysis of an offshore floating wind turbine", NREL/TP-500-41958.
+    All inputs can be arrays of any (broadcastable) shape.
+
+    INPUTS:
+    ----------
+    H  : horizontal tension at fairlead
+    V  : vertical tension at fairlead
+    L  : unstretched line length
+    w  : apparent (wet) weight per unit length of line
+    EA : axial stiffness of line
+    CB : seabed friction coefficient
+
+    OUTPUTS:
+    ----------
+    x, z   : horizontal and vertical distance from anchor to fairlead
+    dxdH, dxdV, dzdH, dzdV : partial derivatives of distances with respect to tension components
+    """
+    H, V, L, w, EA = np.broadcast_arrays(*[np.asarray(m, dtype=np.float64) for m in [H, V, L, w, EA]])
+    VA = V - w*L
+    vh = V / H
+    sh = np.sqrt(1.0 + vh*vh)
+
+    # Fully suspended line
+    ah  = VA / H
+    sa  = np.sqrt(1.0 + ah*ah)
+    xs  = H/w*(np.arcsinh(vh) - np.arcsinh(ah)) + H*L/EA
+    zs  = H/w*(sh - sa) + (V*L - 0.5*w*L*L)/EA
+    dxdHs = (np.arcsinh(vh) - np.arcsinh(ah) - vh/sh + ah/sa)/w + L/EA
+    dxdVs = (1.0/sh - 1.0/sa)/w
+    dzdHs = (1.0/sh - 1.0/sa)/w
+    dzdVs = (vh/sh - ah/sa)/w + L/EA
+
+    # Line resting partially on seabed with friction
+    LB  = L - V/w
+    lam = LB - H/(CB*w)
+    pos = lam > 0.0
+    xc  = LB + H/w*np.arcsinh(vh) + H*L/EA + 0.5*CB*w/EA*(-LB*LB + lam*np.maximum(lam, 0.0))
+    zc  = H/w*(sh - 1.0) + 0.5*V*V/(EA*w)
+    dxdHc = (np.arcsinh(vh) - vh/sh)/w + L/EA - np.where(pos, lam/EA, 0.0)
+    dxdVc = (1.0/sh - 1.0)/w + np.where(pos, H/(EA*w), CB*LB/EA)
+    dzdHc = (1.0/sh - 1.0)/w
+    dzdVc = vh/(sh*w) + V/(EA*w)
+
+    susp = VA >= 0.0
+    return (np.where(susp, xs, xc), np.where(susp, zs, zc),
+            np.where(susp, dxdHs, dxdHc), np.where(susp, dxdVs, dxdVc),
+            np.where(susp, dzdHs, dzdHc), np.where(susp, dzdVs, dzdVc))
+
+
+def solve_catenary(l, h, L, w, EA, CB=CB_DEFAULT, H0=None, V0=None, tol=1e-10, maxiter=100):
+    """Solves for the fairlead tension components of elastic catenary mooring lines with a
+    vectorized Newton iteration, so that many lines and vessel positions are solved at once.
+    The initial guess follows Peyrot and Goulois (1979) as used by MAP++ unless one is provided.
+    Slack lines (longer than the horizontal plus vertical distance) carry no horizontal tension.
+
+    INPUTS:
+    ----------
+    l       : horizontal distance between anchor and fairlead
+    h       : vertical distance between anchor and fairlead
+    L       : unstretched line length
+    w       : apparent (wet) weight per unit length of line
+    EA      : axial stiffness of line
+    CB      : seabed friction coefficient
+    H0, V0  : initial guess of tension components (optional)
+    tol     : convergence tolerance on distance residuals relative to line length
+    maxiter : maximum number of Newton iterations
+
+    OUTPUTS:
+    ----------
+    H, V : horizontal and vertical tension at fairlead
+    """
+    l, h, L, w, EA = np.broadcast_arrays(*[np.asarray(m, dtype=np.float64) for m in [l, h, L, w, EA]])
+    shape = l.shape
+    l, h, L, w, EA = [m.flatten() for m in [l, h, L, w, EA]]
+
+    # Lines longer than the horizontal plus vertical distance hang vertically with the remainder on the seabed
+    slack = L >= l + h
+    H = np.zeros(l.shape)
+    V = w*h
+    taut = np.flatnonzero(~slack)
+    l, h, L, w, EA = [m[taut] for m in [l, h, L, w, EA]]
+
+    if (H0 is None) or (V0 is None) or (np.min(H0) <= 0.0) or (np.min(V0) <= 0.0):
+        lam = np.where(np.sqrt(l*l + h*h) >= L, 0.2, np.sqrt(3.0*np.maximum((L*L - h*h)/np.maximum(l*l, 1e-30) - 1.0, 1e-6)))
+        lam = np.where(l <= 0.0, 1e6, lam)
+        Ht  = np.maximum(np.abs(0.5*w*l/lam), 1e-3*w*L)
+        Vt  = 0.5*w*(h/np.tanh(lam) + L)
+    else:
+        Ht  = (np.array(H0, dtype=np.float64) * np.ones(shape)).flatten()[taut]
+        Vt  = (np.array(V0, dtype=np.float64) * np.ones(shape)).flatten()[taut]
+
+    for _ in range(maxiter):
+        x, z, dxdH, dxdV, dzdH, dzdV = catenary_geometry(Ht, Vt, L, w, EA, CB)
+        rx  = x - l
+        rz  = z - h
+        if np.all(np.maximum(np.abs(rx), np.abs(rz)) <= tol*L): break
+        det = dxdH*dzdV - dxdV*dzdH
+        dH  = ( dzdV*rx - dxdV*rz) / det
+        dV  = (-dzdH*rx + dxdH*rz) / det
+        # Keep tensions positive by limiting the step to half of the distance to zero
+        alpha = np.ones(Ht.shape)
+        alpha = np.where(dH >= Ht, np.minimum(alpha, 0.5*Ht/np.where(dH >= Ht, dH, 1.0)), alpha)
+        alpha = np.where(dV >= Vt, np.minimum(alpha, 0.5*Vt/np.where(dV >= Vt, dV, 1.0)), alpha)
+        Ht = Ht - alpha*dH
+        Vt = Vt - alpha*dV
+    else:
+        raise RuntimeError('Catenary solution did not converge')
+
+    H[taut] = Ht
+    V[taut] = Vt
+    H = H.reshape(shape)
+    V = V.reshape(shape)
+    return H, V
+
+
+def catenary_profile(H, V, L, w, EA, CB=CB_DEFAULT, npts=20):
+    """Coordinates along a single elastic catenary line from anchor to fairlead, in the plane of the line.
+
+    INPUTS:
+    ----------
+    H, V    : horizontal and vertical tension at fairlead
+    L       : unstretched line length
+    w       : apparent (wet) weight per unit length of line
+    EA      : axial stiffness of line
+    CB      : seabed friction coefficient
+    npts    : number of points along the line
+
+    OUTPUTS:
+    ----------
+    x, z : horizontal and vertical distances from anchor at npts points along the line
+    """
+    s  = np.linspace(0.0, L, npts)
+    LB = max(L - V/w, 0.0)
+    VA = V - w*L
+    if H <= 0.0:
+        # Slack line hanging vertically from the fairlead
+        return np.minimum(s, LB), np.maximum(s - LB, 0.0)
+    elif LB == 0.0:
+        # Fully suspended line
+        vs = (VA + w*s)/H
+        x  = H/w*(np.arcsinh(vs) - np.arcsinh(VA/H)) + H*s/EA
+        z  = H/w*(np.sqrt(1.0 + vs*vs) - np.sqrt(1.0 + (VA/H)**2)) + (VA*s + 0.5*w*s*s)/EA
+        return x, z
+
+    # Seabed portion, where friction relieves tension towards the anchor
+    lam = LB - H/(CB*w)
+    x   = s + 0.5*CB*w/EA*(s*s - 2.0*lam*s + lam*max(lam, 0.0))
+    x   = np.where(s <= lam, s, x)
+    z   = np.zeros(s.shape)
+
+    # Suspended portion
+    susp = s > LB
+    vs   = w*(s - LB)/H
+    xs   = LB + H/w*np.arcsinh(vs) + H*s/EA + 0.5*CB*w/EA*(-LB*LB + lam*max(lam, 0.0))
+    zs   = H/w*(np.sqrt(1.0 + vs*vs) - 1.0) + 0.5*w*(s - LB)**2/EA
+    return np.where(susp, xs, x), np.where(susp, zs, z)
+
+
+def line_stiffness(H, V, L, w, EA, CB=CB_DEFAULT):
+    """Tangent stiffness of elastic catenary lines in their own plane, the inverse of the Jacobian
+    of the anchor to fairlead distances with respect to the fairlead tension components.
+    Slack lines (zero horizontal tension) only resist vertical motion with their weight.
+
+    INPUTS:
+    ----------
+    H, V : horizontal and vertical tension at fairlead
+    L    : unstretched line length
+    w    : apparent (wet) weight per unit length of line
+    EA   : axial stiffness of line
+    CB   : seabed friction coefficient
+
+    OUTPUTS:
+    ----------
+    dHdl, dHdh, dVdl, dVdh : derivatives of tension components with respect to horizontal and vertical distances
+    """
+    H, V, L, w, EA = np.broadcast_arrays(*[np.asarray(m, dtype=np.float64) for m in [H, V, L, w, EA]])
+    slack = H <= 0.0
+    Hsafe = np.where(slack, 1.0, H)
+    _, _, dxdH, dxdV, dzdH, dzdV = catenary_geometry(Hsafe, V, L, w, EA, CB)
+    det  = dxdH*dzdV - dxdV*dzdH
+    dHdl = np.where(slack, 0.0,  dzdV/det)
+    dHdh = np.where(slack, 0.0, -dxdV/det)
+    dVdl = np.where(slack, 0.0, -dzdH/det)
+    dVdh = np.where(slack, w,    dxdH/det)
+    return dHdl, dHdh, dVdl, dVdh
+
+
+def skew(r):
+    """Cross product (skew-symmetric) matrices of an array of vectors of size (n,3)"""
+    S = np.zeros(r.shape + (3,))
+    S[:,0,1] = -r[:,2]
+    S[:,0,2] =  r[:,1]
+    S[:,1,0] =  r[:,2]
+    S[:,1,2] = -r[:,0]
+    S[:,2,0] = -r[:,1]
+    S[:,2,1] =  r[:,0]
+    return S
+
+
+def mooring_stiffness(r, u, H, V, l, L, w, EA, CB=CB_DEFAULT, diagonal=False):
+    """Analytic 6x6 stiffness matrix of a mooring system about the vessel reference point.
+    Each line contributes its tangent stiffness in its own plane, the change in direction of its horizontal
+    tension as the fairlead moves sideways, and the geometric stiffness of its tension rotating with the vessel.
+
+    INPUTS:
+    ----------
+    r        : fairlead positions relative to the vessel reference point, array of size (nlines, 3)
+    u        : unit horizontal vector pointing from anchor to fairlead, array of size (nlines, 2)
+    H, V     : horizontal and vertical tension at each fairlead
+    l        : horizontal distance between anchor and fairlead for each line
+    L        : unstretched line length
+    w        : apparent (wet) weight per unit length of line
+    EA       : axial stiffness of line
+    CB       : seabed friction coefficient
+    diagonal : only compute the diagonal entries (off-diagonal entries are returned as zero)
+
+    OUTPUTS:
+    ----------
+    K : 6x6 stiffness matrix
+    """
+    r = np.atleast_2d(r)
+    nlines = r.shape[0]
+    H = np.asarray(H, dtype=np.float64) * np.ones(nlines)
+    V = np.asarray(V, dtype=np.float64) * np.ones(nlines)
+    dHdl, dHdh, dVdl, dVdh = line_stiffness(H, V, L, w, EA, CB)
+
+    # Stiffness of fairlead force with respect to fairlead position for each line
+    u3 = np.c_[u, np.zeros(nlines)]
+    ez = np.array([0.0, 0.0, 1.0])
+    Hl = np.where(H > 0.0, H/l, 0.0)
+    Kf = ( (dHdl - Hl)[:,np.newaxis,np.newaxis] * np.einsum('ni,nj->nij', u3, u3) +
+           Hl[:,np.newaxis,np.newaxis] * np.diag([1.0, 1.0, 0.0])[np.newaxis,:,:] +
+           dHdh[:,np.newaxis,np.newaxis] * np.einsum('ni,j->nij', u3, ez) +
+           dVdl[:,np.newaxis,np.newaxis] * np.einsum('i,nj->nij', ez, u3) +
+           dVdh[:,np.newaxis,np.newaxis] * np.outer(ez, ez)[np.newaxis,:,:] )
+    f = np.c_[H[:,np.newaxis]*u, V]
+    S = skew(r)
+
+    K = np.zeros((6,6))
+    if diagonal:
+        # Translations and rotations (fairlead moves by -S*theta, moment arm rotates with vessel)
+        K[np.arange(3), np.arange(3)] = np.einsum('nii->i', Kf)
+        K[np.arange(3,6), np.arange(3,6)] = ( np.einsum('nij,njk,nik->i', S, Kf, S) +
+                                              np.sum(r*f, axis=0) - np.sum(r*f) )
+        return K
+
+    K[:3,:3] = Kf.sum(axis=0)
+    K[:3,3:] = -np.einsum('nij,njk->ik', Kf, S)
+    K[3:,:3] = np.einsum('nij,njk->ik', S, Kf)
+    K[3:,3:] = ( -np.einsum('nij,njk,nkl->il', S, Kf, S) +
+                 np.einsum('ni,nj->ij', r, f) - np.sum(r*f)*np.eye(3) )
+    return K
+
+
+def rotation_matrix(roll, pitch, yaw):
+    """Rotation matrix of vessel for roll, pitch, yaw angles (in degrees) about the x, y, z axes
+
+    INPUTS:
+    ----------
+    roll, pitch, yaw : vessel rotation angles (deg)
+
+    OUTPUTS:
+    ----------
+    R : 3x3 rotation matrix
+    """
+    phi, theta, psi = np.deg2rad([roll, pitch, yaw])
+    Rx = np.array([[1.0, 0.0, 0.0], [0.0, np.cos(phi), -np.sin(phi)], [0.0, np.sin(phi), np.cos(phi)]])
+    Ry = np.array([[np.cos(theta), 0.0, np.sin(theta)], [0.0, 1.0, 0.0], [-np.sin(theta), 0.0, np.cos(theta)]])
+    Rz = np.array([[np.cos(psi), -np.sin(psi), 0.0], [np.sin(psi), np.cos(psi), 0.0], [0.0, 0.0, 1.0]])
+    return np.dot(Rz, np.dot(Ry, Rx))
+
+
+class CatenaryMooring(object):
+    """
+    Evenly spaced, identical elastic catenary mooring lines anchored on a flat seabed.
+    Mimics the parts of the pyMAP interface used for design analysis, but solves every
+    vessel displacement and every line at once with NumPy.
+    """
+    def __init__(self, nlines, R_fairlead, z_fairlead, R_anchor, water_depth, L, w, EA, CB=CB_DEFAULT):
+        """
+        INPUTS:
+        ----------
+        nlines      : number of mooring lines, the first one along the x-axis
+        R_fairlead  : radius of fairlead attachment points
+        z_fairlead  : z-coordinate of fairlead attachment points (negative below water line)
+        R_anchor    : radius of anchor points
+        water_depth : water depth (anchors are at z = -water_depth)
+        L           : unstretched line length
+        w           : apparent (wet) weight per unit length of line
+        EA          : axial stiffness of line
+        CB          : seabed friction coefficient
+        """
+        self.heading = np.deg2rad( np.arange(nlines) * 360.0 / nlines )
+        idir = np.c_[np.cos(self.heading), np.sin(self.heading), np.zeros(nlines)]
+        self.r_fairlead = R_fairlead*idir + np.array([0.0, 0.0, z_fairlead])
+        self.r_anchor   = R_anchor*idir - np.array([0.0, 0.0, water_depth])
+        self.L  = L
+        self.w  = w
+        self.EA = EA
+        self.CB = CB
+        # Converged tensions at neutral position for warm starts
+        self.H0 = None
+        self.V0 = None
+
+
+    def fairlead_positions(self, displacements):
+        """Fairlead positions for each vessel displacement
+
+        INPUTS:
+        ----------
+        displacements : array of (surge, sway, heave, roll, pitch, yaw) vessel displacements, angles in degrees
+
+        OUTPUTS:
+        ----------
+        positions : array of size (number of displacements, nlines, 3)
+        """
+        displacements = np.atleast_2d(displacements)
+        ndisp = displacements.shape[0]
+        rot   = np.array([rotation_matrix(*displacements[k,3:]) for k in range(ndisp)])
+        return np.einsum('kij,lj->kli', rot, self.r_fairlead) + displacements[:,np.newaxis,:3]
+
+
+    def solve(self, displacements):
+        """Solves the line tensions for every vessel displacement and every line at once
+
+        INPUTS:
+        ----------
+        displacements : array of (surge, sway, heave, roll, pitch, yaw) vessel displacements, angles in degrees
+
+        OUTPUTS:
+        ----------
+        H, V : horizontal and vertical fairlead tension, arrays of size (number of displacements, nlines)
+        u    : unit horizontal vector pointing from anchor to fairlead, size (number of displacements, nlines, 2)
+        l, h : horizontal and vertical anchor to fairlead distance, size (number of displacements, nlines)
+        """
+        pos = self.fairlead_positions(displacements)
+        dxy = pos[:,:,:2] - self.r_anchor[np.newaxis,:,:2]
+        l   = np.sqrt( np.sum(dxy**2, axis=2) )
+        h   = pos[:,:,2] - self.r_anchor[np.newaxis,:,2]
+        u   = dxy / l[:,:,np.newaxis]
+        if self.H0 is None:
+            H0 = V0 = None
+        else:
+            H0, V0 = self.H0, self.V0
+        H, V = solve_catenary(l, h, self.L, self.w, self.EA, self.CB, H0, V0)
+        return H, V, u, l, h
+
+
+    def get_fairlead_forces(self, displacements):
+        """Fairlead force of every line for every vessel displacement,
+        using the same sign convention as pyMAP get_fairlead_force_3d
+
+        INPUTS:
+        ----------
+        displacements : array of (surge, sway, heave, roll, pitch, yaw) vessel displacements, angles in degrees
+
+        OUTPUTS:
+        ----------
+        forces : array of size (number of displacements, nlines, 3)
+        """
+        H, V, u, _, _ = self.solve(displacements)
+        return np.concatenate([H[:,:,np.newaxis]*u, V[:,:,np.newaxis]], axis=2)
+
+
+    def set_neutral(self):
+        """Solves the neutral position and stores the result as the initial guess for later solutions.
+
+        INPUTS: none
+        ----------
+
+        OUTPUTS:
+        ----------
+        forces : neutral fairlead forces, array of size (nlines, 3)
+        """
+        self.H0 = self.V0 = None
+        H, V, _, _, _ = self.solve(np.zeros((1,6)))
+        self.H0 = H[0,0]
+        self.V0 = V[0,0]
+        return self.get_fairlead_forces(np.zeros((1,6)))[0]
+
+
+    def linear(self, epsilon):
+        """Linearized 6x6 stiffness matrix of the mooring system about the neutral position
+        by central differences, like pyMAP linear
+
+        INPUTS:
+        ----------
+        epsilon : finite difference step for translations (m) and rotations (rad)
+
+        OUTPUTS:
+        ----------
+        K : 6x6 stiffness matrix
+        """
+        step = np.r_[epsilon*np.ones(3), np.rad2deg(epsilon)*np.ones(3)]
+        disp = np.r_[np.diag(step), -np.diag(step)]
+        pos  = self.fairlead_positions(disp)
+        f    = self.get_fairlead_forces(disp)
+        # Generalized force (force and moment about the vessel reference point) on the lines
+        r = pos - disp[:,np.newaxis,:3]
+        G = np.c_[f.sum(axis=1), np.cross(r, f).sum(axis=1)]
+        return ((G[:6,:] - G[6:,:]) / (2.0*epsilon)).T
+
+
+    def stiffness(self, diagonal=False):
+        """Analytic 6x6 stiffness matrix of the mooring system about the neutral position
+
+        INPUTS:
+        ----------
+        diagonal : only compute the diagonal entries
+
+        OUTPUTS:
+        ----------
+        K : 6x6 stiffness matrix
+        """
+        H, V, u, l, _ = self.solve(np.zeros((1,6)))
+        return mooring_stiffness(self.r_fairlead, u[0], H[0], V[0], l[0],
+                                 self.L, self.w, self.EA, self.CB, diagonal)
+
+
+    def plot_matrix(self, npts=20):
+        """Coordinates along every line in the neutral position for plotting
+
+        INPUTS:
+        ----------
+        npts : number of points along each line
+
+        OUTPUTS:
+        ----------
+        plotMat : array of size (nlines, npts, 3)
+        """
+        H, V, u, l, _ = self.solve(np.zeros((1,6)))
+        nlines = self.heading.size
+        plotMat = np.zeros((nlines, npts, 3))
+        for k in range(nlines):
+            x, z = catenary_profile(H[0,k], V[0,k], self.L, self.w, self.EA, self.CB, npts)
+            # Excess length of slack lines piles up on the seabed
+            x = np.minimum(x, l[0,k])
+            plotMat[k,:,0] = self.r_anchor[k,0] + x*u[0,k,0]
+            plotMat[k,:,1] = self.r_anchor[k,1] + x*u[0,k,1]
+            plotMat[k,:,2] = self.r_anchor[k,2] + z
+        return plotMat
@@ -1,13 +1,13 @@
 from openmdao.api import Component, Group
 import numpy as np
-from scipy.integrate import cumtrapz
 
-from commonse.utilities import nodal2sectional, assembleI, unassembleI
+from commonse.utilities import nodal2sectional
 import commonse.frustum as frustum
 from commonse.UtilizationSupplement import shellBuckling_withStiffeners, GeometricConstraints
 from commonse import gravity, eps, AeroHydroLoads, CylinderWindDrag, CylinderWaveDrag
 from commonse.vertical_cylinder import CylinderDiscretization, CylinderMass
 from commonse.environment import PowerWind, LinearWaves
+from inertia import parallelAxisI
 
 def I_tube(r_i, r_o, h, m):
     if type(r_i) == type(np.array([])):
@@ -27,6 +27,198 @@ def sectionalInterp(xi, x, y):
     xx=np.c_[x[:-1], x[1:]-epsilon].flatten()
     yy=np.c_[y, y].flatten()    
     return np.interp(xi, xx, yy)
+
+def profileSlice(z, r, z_lo, z_hi, derivs=False):
+    """Nodes of the piecewise linear radius profile r(z) from z_lo to z_hi, with the radius held constant beyond the ends
+
+    INPUTS:
+    ----------
+    z      : z-coordinates of profile nodes
+    r      : radius at profile nodes
+    z_lo   : bottom of slice
+    z_hi   : top of slice
+    derivs : also return the derivatives of the slice nodes
+
+    OUTPUTS  : z-coordinates and radii of the slice nodes,
+               then if derivs is set their derivatives with respect to [z, r, z_lo, z_hi]
+    """
+    inside  = np.logical_and(z > z_lo, z < z_hi)
+    z_slice = np.r_[z_lo, z[inside], max(z_lo, z_hi)]
+    r_slice = np.interp(z_slice, z, r)
+    if not derivs:
+        return z_slice, r_slice
+
+    # Interior slice nodes are profile nodes, the end nodes are interpolated within a profile segment
+    n  = z.size
+    m  = z_slice.size
+    dz_slice = np.zeros((m, 2*n+2))
+    dr_slice = np.zeros((m, 2*n+2))
+    inode = np.nonzero(inside)[0]
+    dz_slice[1+np.arange(inode.size), inode] = 1.0
+    dr_slice[1+np.arange(inode.size), n+inode] = 1.0
+    dz_slice[0, 2*n] = 1.0
+    dz_slice[-1, 2*n if z_lo > z_hi else 2*n+1] = 1.0
+    for i in [0, m-1]:
+        if z_slice[i] <= z[0]:
+            dr_slice[i, n] = 1.0
+        elif z_slice[i] >= z[-1]:
+            dr_slice[i, 2*n-1] = 1.0
+        else:
+            j     = min(np.searchsorted(z, z_slice[i], side='right') - 1, n-2)
+            slope = (r[j+1] - r[j]) / (z[j+1] - z[j])
+            w     = (z_slice[i] - z[j]) / (z[j+1] - z[j])
+            dr_slice[i, [j, j+1, n+j, n+j+1]] = [slope*(w-1.0), -slope*w, 1.0-w, w]
+            dr_slice[i] += slope * dz_slice[i]
+    return z_slice, r_slice, dz_slice, dr_slice
+
+def frustumIntegrals(rb, rt, h, zb, derivs=False):
+    """Exact integrals over solid frustums whose radius varies linearly from rb at height zb to rt at height zb+h
+
+    INPUTS:
+    ----------
+    rb     : radius at bottom of frustums
+    rt     : radius at top of frustums
+    h      : height of frustums
+    zb     : z-coordinate of frustum bottoms, relative to the reference point for the moments
+    derivs : also return the derivatives of the integrals
+
+    OUTPUTS  : volume (integral of pi*r^2), first and second moments of volume (integrals of pi*r^2*z and pi*r^2*z^2),
+               and integral of pi*r^4 of each frustum,
+               then if derivs is set an array D where D[i,j] is the derivative of integral i with respect to [rb, rt, h, zb][j]
+    """
+    V  = frustum.frustumVol(rb, rt, h)
+    Q1 = np.pi * h**2 * (rb**2 + 2.0*rb*rt + 3.0*rt**2) / 12.0
+    Q2 = np.pi * h**3 * (rb**2 + 3.0*rb*rt + 6.0*rt**2) / 30.0
+    R4 = np.pi * h * (rb**4 + rb**3*rt + rb**2*rt**2 + rb*rt**3 + rt**4) / 5.0
+    S1 = zb*V + Q1
+    S2 = zb**2*V + 2.0*zb*Q1 + Q2
+    if not derivs:
+        return V, S1, S2, R4
+
+    dV  = [np.pi * h * (2.0*rb + rt) / 3.0, np.pi * h * (rb + 2.0*rt) / 3.0, np.pi * (rb**2 + rb*rt + rt**2) / 3.0]
+    dQ1 = [np.pi * h**2 * (rb + rt) / 6.0, np.pi * h**2 * (rb + 3.0*rt) / 6.0, np.pi * h * (rb**2 + 2.0*rb*rt + 3.0*rt**2) / 6.0]
+    dQ2 = [np.pi * h**3 * (2.0*rb + 3.0*rt) / 30.0, np.pi * h**3 * (rb + 4.0*rt) / 10.0,
+           np.pi * h**2 * (rb**2 + 3.0*rb*rt + 6.0*rt**2) / 10.0]
+    dR4 = [np.pi * h * (4.0*rb**3 + 3.0*rb**2*rt + 2.0*rb*rt**2 + rt**3) / 5.0,
+           np.pi * h * (rb**3 + 2.0*rb**2*rt + 3.0*rb*rt**2 + 4.0*rt**3) / 5.0,
+           np.pi * (rb**4 + rb**3*rt + rb**2*rt**2 + rb*rt**3 + rt**4) / 5.0]
+    D = np.zeros((4, 4) + np.shape(V))
+    D[0,:3] = dV
+    D[1,:3] = [zb*dV[k] + dQ1[k] for k in range(3)]
+    D[1,3]  = V
+    D[2,:3] = [zb**2*dV[k] + 2.0*zb*dQ1[k] + dQ2[k] for k in range(3)]
+    D[2,3]  = 2.0*(zb*V + Q1)
+    D[3,:3] = dR4
+    return V, S1, S2, R4, D
+
+def cumulativeVolume(z, r, zi):
+    """Exact volume of the piecewise linear radius profile r(z) from z[0] up to each of the heights zi (within z)"""
+    V_node = np.r_[0.0, np.cumsum(frustum.frustumVol(r[:-1], r[1:], np.diff(z)))]
+    k = np.clip(np.searchsorted(z, zi, side='right') - 1, 0, z.size-2)
+    return V_node[k] + frustum.frustumVol(r[k], np.interp(zi, z, r), zi - z[k])
+
+def fillHeight(z, r, V):
+    """Inverse of cumulativeVolume: heights at which the piecewise linear radius profile r(z) holds volumes V from z[0].
+    Within a frustum of radius r0 and slope dr/dz, filling volume dV to height t above its bottom gives
+    (r0 + t*dr/dz)^3 = r0^3 + 3*dr/dz*dV/pi, which is solved for t without dividing by the slope.
+
+    INPUTS:
+    ----------
+    z : z-coordinates of profile nodes
+    r : radius at profile nodes
+    V : volumes to fill (up to the total volume of the profile)
+
+    OUTPUTS  : z-coordinates of the fill heights
+    """
+    dz     = np.diff(z)
+    V_node = np.r_[0.0, np.cumsum(frustum.frustumVol(r[:-1], r[1:], dz))]
+    k      = np.clip(np.searchsorted(V_node, V, side='right') - 1, 0, z.size-2)
+    slope  = np.where(dz[k] > 0.0, (r[k+1] - r[k]) / np.maximum(dz[k], eps), 0.0)
+    dV     = 3.0 * (V - V_node[k]) / np.pi
+    r0     = r[k]
+    r1     = np.cbrt(r0**3 + slope*dV)
+    denom  = r1**2 + r1*r0 + r0**2
+    return z[k] + np.where(denom > 0.0, dV / np.maximum(denom, eps), 0.0)
+
+def stiffenerPositions(z_full, L_stiffener, epsilon=1e-6, derivs=False):
+    """Places ring stiffeners marching up the column.  The first is half a spacing (plus epsilon) above the bottom,
+    and each next one is a spacing plus epsilon above the last, using the spacing of the section it lands in.  Within
+    each section the positions are evenly spaced, so only the crossings into the next section are stepped through.
+
+    INPUTS:
+    ----------
+    z_full      : z-coordinates of section nodes
+    L_stiffener : stiffener spacing in each section
+    epsilon     : small extra spacing, so that stiffeners are not placed exactly on section nodes
+    derivs      : also return the derivatives of the stiffener positions (for fixed numbers of stiffeners)
+
+    OUTPUTS  : z-coordinates of the stiffeners and the index of the section each is in,
+               then if derivs is set the derivatives of the z-coordinates with respect to z_full and L_stiffener
+    """
+    z_top    = z_full[-1]
+    nfull    = z_full.size
+    nsection = L_stiffener.size
+    z_stiff  = []
+    i_stiff  = []
+    dz_stiff = []
+    z_last   = z_full[0] # last stiffener, or bottom of column
+    dz_last  = np.zeros(nfull + nsection) # derivative of z_last with respect to [z_full, L_stiffener]
+    dz_last[0] = 1.0
+    first    = True
+    isection = 0
+    while True:
+        # Evenly spaced stiffeners within this section (strictly below the top in the last section)
+        gap_coeff = 0.5 if first else 1.0
+        gap  = gap_coeff * L_stiffener[isection]
+        step = L_stiffener[isection] + epsilon
+        z1   = z_last + gap + epsilon
+        if isection == nsection-1:
+            n = int(np.ceil((z_top - z1) / step)) if z1 < z_top else 0
+        else:
+            n = int(np.floor((z_full[isection+1] - z1) / step)) + 1 if z1 <= z_full[isection+1] else 0
+        if n > 0:
+            z_sec  = z1 + step*np.arange(n)
+            z_stiff.append(z_sec)
+            i_stiff.append(isection * np.ones(n, dtype=np.int_))
+            if derivs:
+                dz_sec = np.tile(dz_last, (n, 1))
+                dz_sec[:, nfull+isection] += gap_coeff + np.arange(n)
+                dz_stiff.append(dz_sec)
+                dz_last = dz_sec[-1]
+            z_last = z_sec[-1]
+            first  = False
+            gap_coeff = 1.0
+            gap    = L_stiffener[isection]
+
+        # Next position crosses out of the section, where the spacing of the next section decides if it is kept
+        z_march = min(z_full[isection+1], z_last + gap) + epsilon
+        if z_march >= z_top: break
+        if derivs:
+            dz_march = np.zeros(nfull + nsection)
+            if z_full[isection+1] <= z_last + gap:
+                dz_march[isection+1] = 1.0
+            else:
+                dz_march[:] = dz_last
+                dz_march[nfull+isection] += gap_coeff
+        isection = np.searchsorted(z_full, z_march) - 1
+        if (z_march - z_last) >= (0.5 if first else 1.0) * L_stiffener[isection]:
+            z_stiff.append(np.array([z_march]))
+            i_stiff.append(np.array([isection], dtype=np.int_))
+            if derivs:
+                dz_stiff.append(dz_march[np.newaxis,:])
+                dz_last = dz_march
+            z_last = z_march
+            first  = False
+
+    if len(z_stiff) == 0:
+        z_stiff, i_stiff, dz_stiff = np.zeros(0), np.zeros(0, dtype=np.int_), np.zeros((0, nfull + nsection))
+    else:
+        z_stiff, i_stiff = np.concatenate(z_stiff), np.concatenate(i_stiff)
+    if not derivs:
+        return z_stiff, i_stiff
+    if len(dz_stiff) > 0:
+        dz_stiff = np.vstack(dz_stiff)
+    return z_stiff, i_stiff, dz_stiff[:,:nfull], dz_stiff[:,nfull:]
     
 
 class BulkheadMass(Component):
@@ -47,7 +239,6 @@ class BulkheadMass(Component):
         self.add_output('bulkhead_I_keel', val=np.zeros(6), units='kg*m**2', desc='Moments of inertia of bulkheads relative to keel point')
         
         # Derivatives
-        self.deriv_options['type'] = 'fd'
         self.deriv_options['form'] = 'central'
         self.deriv_options['check_form'] = 'central'
         self.deriv_options['step_calc'] = 'relative'
@@ -77,36 +268,75 @@ class BulkheadMass(Component):
         # Assume bulkheads are just simple thin discs with radius R_od-t_wall and mass already computed
         Izz = 0.5 * m_bulk * (R_od - twall)**2
         Ixx = Iyy = 0.5 * Izz
-        I_keel = np.zeros((3,3))
         dz  = z_full - z_full[0]
-        for k in xrange(m_bulk.size):
-            R = np.array([0.0, 0.0, dz[k]])
-            Icg = assembleI( [Ixx[k], Iyy[k], Izz[k], 0.0, 0.0, 0.0] )
-            I_keel += Icg + m_bulk[k]*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
+        R   = np.c_[np.zeros(dz.shape), np.zeros(dz.shape), dz]
+        Icg = np.c_[Ixx, Iyy, Izz, np.zeros((dz.size,3))]
         
         # Store results
-        unknowns['bulkhead_I_keel'] = unassembleI(I_keel)
+        unknowns['bulkhead_I_keel'] = parallelAxisI(m_bulk, Icg, R)
         unknowns['bulkhead_mass'] = m_bulk
 
-    '''
     def list_deriv_vars(self):
-        inputs = ('d_full','t_full')
-        outputs = ('bulkhead_mass',)
+        inputs = ('z_full', 'd_full', 't_full', 'rho', 'bulkhead_thickness', 'bulkhead_mass_factor')
+        outputs = ('bulkhead_mass', 'bulkhead_I_keel')
         return inputs, outputs
     
     def linearize(self, params, unknowns, resids):
+        z_full = params['z_full'] # at section nodes
+        z_param= params['z_param']
         R_od   = 0.5*params['d_full'] # at section nodes
         twall  = params['t_full'] # at section nodes
-        dVdR   = 2.0 * np.pi * (R_od - twall) * twall
-        dVdt   = np.pi * (R_od - twall) * ( R_od - 3.0*twall )
-        coeff  = params['bulkhead_mass_factor'] * params['rho']
-        myones = np.ones(dVdR.shape) * self.bulk_full
+        t_bulk = params['bulkhead_thickness'] # at section nodes
+        rho    = params['rho']
+        factor = params['bulkhead_mass_factor']
+        nFull  = z_full.size
 
+        # Bulkhead thickness at each section node comes from the nearest of the bulkhead nodes
+        Zf,Zp = np.meshgrid(z_full, z_param)
+        idx = np.argmin( np.abs(Zf-Zp), axis=1 )
+        src = -np.ones(nFull, dtype=np.int_)
+        src[idx] = np.arange(idx.size)
+        P = np.zeros((nFull, t_bulk.size))
+        P[src>=0, src[src>=0]] = 1.0
+        t_bulk_full = np.dot(P, t_bulk)
+
+        # Bulkhead mass and its derivatives with respect to the inner radius and thickness, all diagonal
+        R_i    = R_od - twall
+        V_bulk = np.pi * R_i**2 * t_bulk_full
+        m_bulk = factor * rho * V_bulk
+        dm_dRi = factor * rho * 2.0 * np.pi * R_i * t_bulk_full
+        dm_dtb = factor * rho * np.pi * R_i**2
+
+        # Moment of inertia, for discs along the column axis: Ixx = Iyy = sum(0.25*m*R_i^2 + m*dz^2), Izz = sum(0.5*m*R_i^2)
+        dz      = z_full - z_full[0]
+        dIxx_dm = 0.25*R_i**2 + dz**2
+        dIzz_dm = 0.5*R_i**2
+        dIxx_dRi = dIxx_dm*dm_dRi + 0.5*m_bulk*R_i
+        dIzz_dRi = dIzz_dm*dm_dRi + m_bulk*R_i
+        dIxx_dz  = 2.0*m_bulk*dz
+        dIxx_dz[0] -= dIxx_dz.sum()
+
+        def inertia_rows(dIxx, dIzz):
+            dI = np.zeros((6, dIxx.size))
+            dI[0,:] = dI[1,:] = dIxx
+            dI[2,:] = dIzz
+            return dI
+        
         J = {}
-        J['bulkhead_mass','d_full'] = coeff * np.diag(dVdR*myones) * 0.5 # 0.5 for d->r
-        J['bulkhead_mass','t_full'] = coeff * np.diag(dVdt*myones)
+        J['bulkhead_mass','z_full'] = np.zeros((nFull, nFull))
+        J['bulkhead_mass','d_full'] = 0.5*np.diag(dm_dRi) # 0.5 for d->r
+        J['bulkhead_mass','t_full'] = -np.diag(dm_dRi)
+        J['bulkhead_mass','rho'] = factor * V_bulk[:,np.newaxis]
+        J['bulkhead_mass','bulkhead_mass_factor'] = rho * V_bulk[:,np.newaxis]
+        J['bulkhead_mass','bulkhead_thickness'] = dm_dtb[:,np.newaxis] * P
+        
+        J['bulkhead_I_keel','z_full'] = inertia_rows(dIxx_dz, np.zeros(nFull))
+        J['bulkhead_I_keel','d_full'] = 0.5*inertia_rows(dIxx_dRi, dIzz_dRi)
+        J['bulkhead_I_keel','t_full'] = -inertia_rows(dIxx_dRi, dIzz_dRi)
+        J['bulkhead_I_keel','rho'] = np.dot(inertia_rows(dIxx_dm, dIzz_dm), factor*V_bulk)[:,np.newaxis]
+        J['bulkhead_I_keel','bulkhead_mass_factor'] = np.dot(inertia_rows(dIxx_dm, dIzz_dm), rho*V_bulk)[:,np.newaxis]
+        J['bulkhead_I_keel','bulkhead_thickness'] = np.dot(inertia_rows(dIxx_dm*dm_dtb, dIzz_dm*dm_dtb), P)
         return J
-    '''
 
     
 
@@ -147,7 +377,6 @@ class StiffenerMass(Component):
         self.add_output('stiffener_radius_ratio', val=np.zeros((nFull-1,)), desc='ratio between stiffener height and radius')
 
         # Derivatives
-        self.deriv_options['type'] = 'fd'
         self.deriv_options['form'] = 'central'
         self.deriv_options['check_form'] = 'central'
         self.deriv_options['step_calc'] = 'relative'
@@ -184,39 +413,20 @@ class StiffenerMass(Component):
         m_web    = params['ring_mass_factor'] * rho * V_web
         m_flange = params['ring_mass_factor'] * rho * V_flange
         m_ring   = m_web + m_flange
-        n_stiff  = np.zeros(z_section.shape, dtype=np.int_)
         
         # Compute moments of inertia for stiffeners (lumped by section for simplicity) at keel
         I_web     = I_tube(R_wi, R_wo, t_web   , m_web)
         I_flange  = I_tube(R_fi, R_fo, w_flange, m_flange)
         I_ring    = I_web + I_flange
-        I_keel    = np.zeros((3,3))
-
-        # Now march up the column, adding stiffeners at correct spacing until we are done
-        z_stiff  = []
-        isection = 0
-        epsilon  = 1e-6
-        while True:
-            if len(z_stiff) == 0:
-                z_march = np.minimum(z_full[isection+1], z_full[0] + 0.5*L_stiffener[isection]) + epsilon
-            else:
-                z_march = np.minimum(z_full[isection+1], z_stiff[-1] + L_stiffener[isection]) + epsilon
-            if z_march >= z_full[-1]: break
-            
-            isection = np.searchsorted(z_full, z_march) - 1
-            
-            if len(z_stiff) == 0:
-                add_stiff = (z_march - z_full[0]) >= 0.5*L_stiffener[isection]
-            else:
-                add_stiff = (z_march - z_stiff[-1]) >= L_stiffener[isection]
-                
-            if add_stiff:
-                z_stiff.append(z_march)
-                n_stiff[isection] += 1
-                
-                R       = np.array([0.0, 0.0, (z_march - z_full[0])])
-                Icg     = assembleI( I_ring[isection,:] )
-                I_keel += Icg + m_ring[isection]*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
+
+        # Place the stiffeners up the column at the correct spacing in each section
+        z_stiff, i_stiff = stiffenerPositions(z_full, L_stiffener)
+        n_stiff = np.bincount(i_stiff, minlength=z_section.size)
+
+        # Parallel axis theorem about the keel, with every stiffener on the column axis
+        dz     = z_stiff - z_full[0]
+        R      = np.c_[np.zeros(dz.shape), np.zeros(dz.shape), dz]
+        I_keel = parallelAxisI(m_ring[i_stiff], I_ring[i_stiff], R)
 
         # Number of stiffener rings per section (height of section divided by spacing)
         unknowns['stiffener_mass'] =  n_stiff * m_ring
@@ -229,12 +439,114 @@ class StiffenerMass(Component):
         unknowns['number_of_stiffeners'] = n_stiff_sec
 
         # Store results
-        unknowns['stiffener_I_keel'] = unassembleI(I_keel)
+        unknowns['stiffener_I_keel'] = I_keel
         
         # Create some constraints for reasonable stiffener designs for an optimizer
         unknowns['flange_spacing_ratio']   = w_flange / (0.5*L_stiffener)
         unknowns['stiffener_radius_ratio'] = (h_web + t_flange + t_wall) / R_od
 
+    def list_deriv_vars(self):
+        inputs = ('d_full', 't_full', 'z_full', 'rho', 'stiffener_web_height', 'stiffener_web_thickness',
+                  'stiffener_flange_width', 'stiffener_flange_thickness', 'stiffener_spacing', 'ring_mass_factor')
+        outputs = ('stiffener_mass', 'stiffener_I_keel', 'flange_spacing_ratio', 'stiffener_radius_ratio')
+        return inputs, outputs
+
+    def linearize(self, params, unknowns, resids):
+        # Same geometry as in solve_nonlinear.  The number of stiffeners in each section is piecewise constant, so it
+        # only enters the derivatives as a fixed count, while the stiffener positions move with the spacing and nodes
+        R_od,_       = nodal2sectional(params['d_full'])
+        R_od        *= 0.5
+        t_wall,_     = nodal2sectional( params['t_full'] )
+        z_full       = params['z_full']
+        z_param      = params['z_param']
+        z_section,_  = nodal2sectional( params['z_full'] )
+        t_web        = sectionalInterp(z_section, z_param, params['stiffener_web_thickness'])
+        t_flange     = sectionalInterp(z_section, z_param, params['stiffener_flange_thickness'])
+        h_web        = sectionalInterp(z_section, z_param, params['stiffener_web_height'])
+        w_flange     = sectionalInterp(z_section, z_param, params['stiffener_flange_width'])
+        L_stiffener  = sectionalInterp(z_section, z_param, params['stiffener_spacing'])
+        coeff        = params['ring_mass_factor'] * params['rho']
+        nsec         = z_section.size
+
+        # Sectional values depend on nodal values through averages and on section parameters through lookups
+        avg = 0.5 * (np.eye(nsec, nsec+1) + np.eye(nsec, nsec+1, 1))
+        lookup = np.column_stack([sectionalInterp(z_section, z_param, e) for e in np.eye(z_param.size-1)])
+
+        # Forward mode derivatives of every sectional quantity with respect to the sectional variables
+        # [R_od, t_wall, h_web, t_web, t_flange, w_flange, L_stiffener], each row is one variable
+        D = np.eye(7)[:,:,np.newaxis] * np.ones(nsec)
+        dR_od, dt_wall, dh_web, dt_web, dt_flange, dw_flange, dL = D
+
+        R_wo  = R_od - t_wall
+        R_wi  = R_wo - h_web
+        R_fi  = R_wi - t_flange
+        dR_wo = dR_od - dt_wall
+        dR_wi = dR_wo - dh_web
+        dR_fi = dR_wi - dt_flange
+
+        # Material volumes (mass per unit mass coefficient)
+        V_web     = np.pi*(R_wo**2 - R_wi**2) * t_web
+        V_flange  = np.pi*(R_wi**2 - R_fi**2) * w_flange
+        dV_web    = 2.0*np.pi*(R_wo*dR_wo - R_wi*dR_wi) * t_web + np.pi*(R_wo**2 - R_wi**2) * dt_web
+        dV_flange = 2.0*np.pi*(R_wi*dR_wi - R_fi*dR_fi) * w_flange + np.pi*(R_wi**2 - R_fi**2) * dw_flange
+
+        def dI_tube(r_i, r_o, h, m, dr_i, dr_o, dh, dm):
+            # Derivatives of the Ixx and Izz of I_tube
+            s    = r_i**2 + r_o**2
+            ds   = 2.0*(r_i*dr_i + r_o*dr_o)
+            dIxx = (dm*(3.0*s + h**2) + m*(3.0*ds + 2.0*h*dh)) / 12.0
+            dIzz = 0.5*(dm*s + m*ds)
+            return dIxx, dIzz
+        I_ring_V = I_tube(R_wi, R_wo, t_web, V_web) + I_tube(R_fi, R_wi, w_flange, V_flange)
+        dIxx_web, dIzz_web = dI_tube(R_wi, R_wo, t_web, V_web, dR_wi, dR_wo, dt_web, dV_web)
+        dIxx_fl , dIzz_fl  = dI_tube(R_fi, R_wi, w_flange, V_flange, dR_fi, dR_wi, dw_flange, dV_flange)
+        V_ring    = V_web + V_flange
+        dV_ring   = dV_web + dV_flange
+        dIxx_ring = dIxx_web + dIxx_fl
+        dIzz_ring = dIzz_web + dIzz_fl
+
+        # Stiffener positions, keel inertia is sum(n*I_ring) + sum(m_ring*dz^2) on the xx and yy axes
+        z_stiff, i_stiff, dz_dz, dz_dL = stiffenerPositions(z_full, L_stiffener, derivs=True)
+        n_stiff = np.bincount(i_stiff, minlength=nsec)
+        dz      = z_stiff - z_full[0]
+        dz_dz[:,0] -= 1.0
+        sum_dz2 = np.bincount(i_stiff, weights=dz**2, minlength=nsec)
+        wdz     = 2.0 * coeff * V_ring[i_stiff] * dz
+        
+        dIxx = coeff * (n_stiff*dIxx_ring + sum_dz2*dV_ring)
+        dIxx[6,:] += np.dot(wdz, dz_dL)
+        dIzz = coeff * n_stiff*dIzz_ring
+        dI_dsec = np.zeros((6,) + dIxx.shape)
+        dI_dsec[0] = dI_dsec[1] = dIxx
+        dI_dsec[2] = dIzz
+        dI_dz = np.zeros((6, z_full.size))
+        dI_dz[0,:] = dI_dz[1,:] = np.dot(wdz, dz_dz)
+        I_keel_V = np.dot(n_stiff, I_ring_V)
+        I_keel_V[:2] += np.dot(sum_dz2, V_ring)
+
+        # Mass per section and constraint ratios, all diagonal in the sectional variables
+        dm_dsec = coeff * n_stiff * dV_ring
+        dflange_ratio = 2.0*dw_flange/L_stiffener - 2.0*w_flange*dL/L_stiffener**2
+        radius_ratio  = (h_web + t_flange + t_wall) / R_od
+        dradius_ratio = (dh_web + dt_flange + dt_wall - radius_ratio*dR_od) / R_od
+
+        # Chain from sectional variables to the parameters
+        sec_params = [('d_full', 0, 0.5*avg), ('t_full', 1, avg), ('stiffener_web_height', 2, lookup),
+                      ('stiffener_web_thickness', 3, lookup), ('stiffener_flange_thickness', 4, lookup),
+                      ('stiffener_flange_width', 5, lookup), ('stiffener_spacing', 6, lookup)]
+        J = {}
+        for name, k, dsec_dparam in sec_params:
+            J['stiffener_mass', name] = dm_dsec[k][:,np.newaxis] * dsec_dparam
+            J['stiffener_I_keel', name] = np.dot(dI_dsec[:,k,:], dsec_dparam)
+            J['flange_spacing_ratio', name] = dflange_ratio[k][:,np.newaxis] * dsec_dparam
+            J['stiffener_radius_ratio', name] = dradius_ratio[k][:,np.newaxis] * dsec_dparam
+        J['stiffener_I_keel', 'z_full'] = dI_dz
+        J['stiffener_mass', 'rho'] = params['ring_mass_factor'] * (n_stiff*V_ring)[:,np.newaxis]
+        J['stiffener_mass', 'ring_mass_factor'] = params['rho'] * (n_stiff*V_ring)[:,np.newaxis]
+        J['stiffener_I_keel', 'rho'] = params['ring_mass_factor'] * I_keel_V[:,np.newaxis]
+        J['stiffener_I_keel', 'ring_mass_factor'] = params['rho'] * I_keel_V[:,np.newaxis]
+        return J
+
                 
 
         
@@ -265,7 +577,6 @@ class ColumnGeometry(Component):
         self.add_output('fairlead_draft_ratio', val=0.0, desc='Ratio of fairlead to draft')
 
         # Derivatives
-        self.deriv_options['type'] = 'fd'
         self.deriv_options['form'] = 'central'
         self.deriv_options['check_form'] = 'central'
         self.deriv_options['step_calc'] = 'relative'
@@ -299,6 +610,48 @@ class ColumnGeometry(Component):
         unknowns['draft_depth_ratio'] = draft / params['water_depth']
         unknowns['fairlead_draft_ratio'] = 0.0 if z_full[0] == 0.0 else fairlead / draft
 
+    def list_deriv_vars(self):
+        inputs = ('water_depth', 'freeboard', 'fairlead', 'z_full_in', 'z_param_in', 'section_center_of_mass')
+        outputs = ('z_full', 'z_param', 'draft', 'z_section', 'draft_depth_ratio', 'fairlead_draft_ratio')
+        return inputs, outputs
+
+    def linearize(self, params, unknowns, resids):
+        draft     = params['z_param_in'][-1] - params['freeboard']
+        fairlead  = params['fairlead']
+        depth     = params['water_depth']
+        nFull     = params['z_full_in'].size
+        nParam    = params['z_param_in'].size
+        nSection  = params['section_center_of_mass'].size
+
+        # Derivatives of the draft
+        ddraft_dz = np.zeros((1, nParam))
+        ddraft_dz[0,-1] = 1.0
+
+        J = {}
+        J['draft','z_param_in'] = ddraft_dz
+        J['draft','freeboard'] = -1.0
+        J['z_full','z_full_in'] = np.eye(nFull)
+        J['z_full','z_param_in'] = -np.ones((nFull,1)) * ddraft_dz
+        J['z_full','freeboard'] = np.ones((nFull,1))
+        J['z_param','z_param_in'] = np.eye(nParam) - ddraft_dz
+        J['z_param','freeboard'] = np.ones((nParam,1))
+        J['z_section','section_center_of_mass'] = np.eye(nSection)
+        J['z_section','z_param_in'] = -np.ones((nSection,1)) * ddraft_dz
+        J['z_section','freeboard'] = np.ones((nSection,1))
+
+        J['draft_depth_ratio','water_depth'] = -draft / depth**2
+        J['draft_depth_ratio','z_param_in'] = ddraft_dz / depth
+        J['draft_depth_ratio','freeboard'] = -1.0 / depth
+        if unknowns['z_full'][0] == 0.0:
+            J['fairlead_draft_ratio','fairlead'] = 0.0
+            J['fairlead_draft_ratio','z_param_in'] = np.zeros((1, nParam))
+            J['fairlead_draft_ratio','freeboard'] = 0.0
+        else:
+            J['fairlead_draft_ratio','fairlead'] = 1.0 / draft
+            J['fairlead_draft_ratio','z_param_in'] = -fairlead / draft**2 * ddraft_dz
+            J['fairlead_draft_ratio','freeboard'] = fairlead / draft**2
+        return J
+
 
 
 class ColumnProperties(Component):
@@ -349,8 +702,8 @@ class ColumnProperties(Component):
         self.add_output('ballast_mass', val=0.0, units='kg', desc='mass of permanent ballast')
         self.add_output('ballast_z_cg', val=0.0, units='m', desc='z-coordinate or permanent ballast center of gravity')
         self.add_output('ballast_I_keel', val=np.zeros(6), units='kg*m**2', desc='Moments of inertia of permanent ballast relative to keel point')
-        self.add_output('variable_ballast_interp_mass', val=np.zeros((nFull,)), units='kg', desc='mass vector of potential ballast mass')
-        self.add_output('variable_ballast_interp_zpts', val=np.zeros((nFull,)), units='m', desc='z-points of potential ballast mass')
+        self.add_output('variable_ballast_interp_radius', val=np.zeros((nFull,)), units='m', desc='inner radius of column at the z-points of potential ballast mass')
+        self.add_output('variable_ballast_interp_zpts', val=np.zeros((nFull,)), units='m', desc='z-points of potential ballast mass, from top of permanent ballast to top of column')
 
         self.add_output('z_center_of_mass', val=0.0, units='m', desc='z-position CofG of column')
         self.add_output('z_center_of_buoyancy', val=0.0, units='m', desc='z-position CofB of column')
@@ -370,11 +723,9 @@ class ColumnProperties(Component):
         self.add_output('total_cost', val=0.0, units='USD', desc='total cost of column')
         
         # Derivatives
-        self.deriv_options['type'] = 'fd'
         self.deriv_options['form'] = 'central'
         self.deriv_options['check_form'] = 'central'
         self.deriv_options['step_calc'] = 'relative'
-        self.deriv_options['step_size'] = 1e-5
         
         
     def solve_nonlinear(self, params, unknowns, resids):
@@ -485,7 +836,6 @@ class ColumnProperties(Component):
         t_wall      = params['t_full']
         h_ballast   = params['permanent_ballast_height']
         rho_ballast = params['permanent_ballast_density']
-        rho_water   = params['water_density']
         z_nodes     = params['z_full']
 
         npts = R_od.size
@@ -495,36 +845,34 @@ class ColumnProperties(Component):
 
         # Fixed and total ballast mass and cg
         # Assume they are bottled in columns a the keel of the spar- first the permanent then the fixed
-        zpts      = np.linspace(z_draft, z_draft+h_ballast, npts)
-        R_id      = np.interp(zpts, z_nodes, R_od-t_wall)
-        V_perm    = np.pi * np.trapz(R_id**2, zpts)
+        # Integrate exactly over the frustums between section nodes, with moments about the keel
+        R_id      = R_od - t_wall
+        zpts, rpts = profileSlice(z_nodes, R_id, z_draft, z_draft+h_ballast)
+        V_slice, S1, S2, R4 = frustumIntegrals(rpts[:-1], rpts[1:], np.diff(zpts), zpts[:-1] - z_draft)
+        V_perm    = V_slice.sum()
         m_perm    = rho_ballast * V_perm
-        z_cg_perm = rho_ballast * np.pi * np.trapz(zpts*R_id**2, zpts) / m_perm if m_perm > 0.0 else 0.0
-        for k in xrange(z_nodes.size-1):
-            ind = np.logical_and(zpts>=z_nodes[k], zpts<=z_nodes[k+1]) 
-            self.section_mass[k] += rho_ballast * np.pi * np.trapz(R_id[ind]**2, zpts[ind])
-
-        Ixx = Iyy = frustum.frustumIxx(R_id[:-1], R_id[1:], np.diff(zpts))
-        Izz = frustum.frustumIzz(R_id[:-1], R_id[1:], np.diff(zpts))
-        V_slice = frustum.frustumVol(R_id[:-1], R_id[1:], np.diff(zpts))
-        I_keel = np.zeros((3,3))
-        dz  = frustum.frustumCG(R_id[:-1], R_id[1:], np.diff(zpts)) + zpts[:-1] - z_draft
-        for k in xrange(V_slice.size):
-            R = np.array([0.0, 0.0, dz[k]])
-            Icg = assembleI( [Ixx[k], Iyy[k], Izz[k], 0.0, 0.0, 0.0] )
-            I_keel += Icg + V_slice[k]*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
-        I_keel = rho_ballast * unassembleI(I_keel)
-        
-        # Water ballast will start at top of fixed ballast
-        z_water_start = z_draft + h_ballast
-
-        # Find height of water ballast numerically by finding the height that integrates to the mass we want
-        # This step is completed in spar.py or semi.py because we must account for other substructure elements too
-        zpts    = np.linspace(z_water_start, z_nodes[-1], npts)
-        R_id    = np.interp(zpts, z_nodes, R_od-t_wall)
-        m_water = rho_water * cumtrapz(np.pi*R_id**2, zpts)
-        unknowns['variable_ballast_interp_mass'] = np.r_[0.0, m_water] #cumtrapz has length-1
-        unknowns['variable_ballast_interp_zpts'] = zpts
+        z_cg_perm = z_draft + S1.sum() / V_perm if m_perm > 0.0 else 0.0
+
+        # Every slice is within one section
+        nsection  = z_nodes.size-1
+        isection  = np.searchsorted(z_nodes, 0.5*(zpts[:-1] + zpts[1:])) - 1
+        inside    = np.logical_and(isection >= 0, isection < nsection)
+        self.section_mass += rho_ballast * np.bincount(isection[inside], weights=V_slice[inside], minlength=nsection)
+
+        # Stack of discs: Ixx = Iyy = rho*int(pi*r^4/4 + pi*r^2*z^2), Izz = rho*int(pi*r^4/2)
+        Ixx    = 0.25*R4.sum() + S2.sum()
+        I_keel = rho_ballast * np.r_[Ixx, Ixx, 0.5*R4.sum(), np.zeros(3)]
+        
+        # Water ballast will start at top of fixed ballast (within the column, even for zero or negative ballast height)
+        z_water_start = np.clip(z_draft + h_ballast, z_nodes[0], z_nodes[-1])
+
+        # Height of water ballast is found from the mass we want by inverting the frustum volumes of the profile above
+        # This step is completed in Substructure because we must account for other substructure elements too
+        # Profile nodes are padded at the top to a fixed length with frustums of zero height
+        zpts, rpts = profileSlice(z_nodes, R_id, z_water_start, z_nodes[-1])
+        npad       = npts - zpts.size
+        unknowns['variable_ballast_interp_zpts']   = np.r_[zpts, zpts[-1]*np.ones(npad)]
+        unknowns['variable_ballast_interp_radius'] = np.r_[rpts, rpts[-1]*np.ones(npad)]
         
         # Save permanent ballast mass and variable height
         unknowns['ballast_mass']   = m_perm
@@ -575,30 +923,18 @@ class ColumnProperties(Component):
         unknowns['I_column'] = I_total
 
         # Compute volume of each section and mass of displaced water by section
-        # Find the radius at the waterline so that we can compute the submerged volume as a sum of frustum sections
-        if z_nodes[-1] > 0.0:
-            r_waterline = np.interp(0.0, z_nodes, R_od)
-            z_under     = np.r_[z_nodes[z_nodes < 0.0], 0.0]
-            r_under     = np.r_[R_od[z_nodes < 0.0], r_waterline]
-        else:
-            r_waterline = R_od[-1]
-            r_under     = R_od
-            z_under     = z_nodes
-            
-        V_under     = frustum.frustumVol(r_under[:-1], r_under[1:], np.diff(z_under))
+        # Slice the profile at the waterline so that we can compute the submerged volume as a sum of frustum sections
+        z_under, r_under = profileSlice(z_nodes, R_od, z_nodes[0], min(0.0, z_nodes[-1]))
+        r_waterline = r_under[-1]
+        V_under, S1_under, _, _ = frustumIntegrals(r_under[:-1], r_under[1:], np.diff(z_under), z_under[:-1])
         # 0-pad so that it has the length of sections
         add0        = np.maximum(0, self.section_mass.size-V_under.size)
         V_under     = np.r_[V_under, np.zeros((add0,))]
         unknowns['displaced_volume'] = V_under
 
-        # Compute Center of Buoyancy in z-coordinates (0=waterline)
-        # First get z-coordinates of CG of all frustums
-        z_cg_under  = frustum.frustumCG(r_under[:-1], r_under[1:], np.diff(z_under))
-        z_cg_under += z_under[:-1]
-        z_cg_under  = np.r_[z_cg_under, np.zeros((add0,))]
-        # Now take weighted average of these CG points with volume
+        # Compute Center of Buoyancy in z-coordinates (0=waterline) from the first moment of the submerged volume
         V_under += eps
-        z_cb     = np.dot(V_under, z_cg_under) / V_under.sum()
+        z_cb     = S1_under.sum() / V_under.sum()
         unknowns['z_center_of_buoyancy'] = z_cb
 
         # 2nd moment of area for circular cross section
@@ -608,14 +944,12 @@ class ColumnProperties(Component):
         unknowns['Awater'] = np.pi * r_waterline**2.0
 
         # Calculate diagonal entries of added mass matrix
-        # Prep for integrals too
-        npts     = 1e2 * R_od.size
-        zpts     = np.linspace(z_under[0], z_under[-1], npts)
-        r_under  = np.interp(zpts, z_under, r_under)
+        # Second moment of the submerged volume about the center of buoyancy for roll and pitch
+        _, _, S2_cb, _ = frustumIntegrals(r_under[:-1], r_under[1:], np.diff(z_under), z_under[:-1] - z_cb)
         m_a      = np.zeros(6)
         m_a[:2]  = rho_water * V_under.sum() # A11 surge, A22 sway
         m_a[2]   = 0.5 * (8.0/3.0) * rho_water * r_under.max()**3.0# A33 heave
-        m_a[3:5] = np.pi * rho_water * np.trapz((zpts-z_cb)**2.0 * r_under**2.0, zpts)# A44 roll, A55 pitch
+        m_a[3:5] = rho_water * S2_cb.sum()# A44 roll, A55 pitch
         m_a[5]   = 0.0 # A66 yaw
         unknowns['added_mass'] = m_a
         
@@ -625,6 +959,173 @@ class ColumnProperties(Component):
         unknowns['outfitting_cost'] = params['outfitting_cost_rate'] * unknowns['outfitting_mass']
         unknowns['total_cost']      = unknowns['ballast_cost'] + unknowns['spar_cost'] + unknowns['outfitting_cost']
 
+    def list_deriv_vars(self):
+        inputs = ('water_density', 'permanent_ballast_density', 'z_full', 'z_section', 'd_full', 't_full',
+                  'permanent_ballast_height', 'shell_mass', 'stiffener_mass', 'bulkhead_mass', 'column_mass_factor',
+                  'outfitting_mass_fraction', 'shell_I_keel', 'bulkhead_I_keel', 'stiffener_I_keel',
+                  'ballast_cost_rate', 'tapered_col_cost_rate', 'outfitting_cost_rate')
+        outputs = ('ballast_cost', 'ballast_mass', 'ballast_z_cg', 'ballast_I_keel', 'variable_ballast_interp_radius',
+                   'variable_ballast_interp_zpts', 'z_center_of_mass', 'z_center_of_buoyancy', 'Awater', 'Iwater',
+                   'I_column', 'displaced_volume', 'spar_cost', 'spar_mass', 'outfitting_cost', 'outfitting_mass',
+                   'added_mass', 'total_mass', 'total_cost')
+        return inputs, outputs
+
+    def linearize(self, params, unknowns, resids):
+        # Unpack variables
+        R_od        = 0.5*params['d_full']
+        t_wall      = params['t_full']
+        z_nodes     = params['z_full']
+        z_section   = params['z_section']
+        h_ballast   = params['permanent_ballast_height']
+        rho_ballast = params['permanent_ballast_density']
+        rho_water   = params['water_density']
+        out_frac    = params['outfitting_mass_fraction']
+        coeff       = params['column_mass_factor']
+        m_sections  = params['shell_mass'] + params['stiffener_mass']
+        m_bulkhead  = params['bulkhead_mass']
+        I_keel      = params['shell_I_keel'] + params['stiffener_I_keel'] + params['bulkhead_I_keel']
+        nFull       = z_nodes.size
+        nsection    = nFull - 1
+        z_draft     = z_nodes[0]
+        R_id        = R_od - t_wall
+        J = {}
+
+        # Geometry derivatives are carried with respect to x = [z_full, d_full, t_full, permanent_ballast_height]
+        # and split into the parameters at the end.  The profile slices are differentiated with respect to
+        # [z, r, z_lo, z_hi], which map to x through T (the last two rows are set for each slice)
+        nx = 3*nFull + 1
+        e_draft  = np.zeros(nx)
+        e_top    = np.zeros(nx)
+        e_height = np.zeros(nx)
+        e_draft[0] = e_top[nFull-1] = e_height[-1] = 1.0
+        T_outer = np.zeros((2*nFull+2, nx))
+        T_outer[:nFull, :nFull] = np.eye(nFull)
+        T_outer[nFull:2*nFull, nFull:2*nFull] = 0.5*np.eye(nFull)
+        T_inner = T_outer.copy()
+        T_inner[nFull:2*nFull, 2*nFull:3*nFull] = -np.eye(nFull)
+
+        # Permanent ballast from the frustum integrals over the slice of the inner profile, with moments about the keel
+        T_inner[-2:] = [e_draft, e_draft + e_height]
+        zpts, rpts, dzpts, drpts = profileSlice(z_nodes, R_id, z_draft, z_draft+h_ballast, derivs=True)
+        dzpts, drpts = np.dot(dzpts, T_inner), np.dot(drpts, T_inner)
+        V_slice, S1, S2, R4, D = frustumIntegrals(rpts[:-1], rpts[1:], np.diff(zpts), zpts[:-1] - z_draft, derivs=True)
+        dV, dS1, dS2, dR4 = np.einsum('ijk,jkx->ikx', D, [drpts[:-1], drpts[1:], np.diff(dzpts, axis=0), dzpts[:-1] - e_draft])
+        V_perm = V_slice.sum()
+        m_perm = rho_ballast * V_perm
+        Ixx    = 0.25*R4.sum() + S2.sum()
+        dIxx   = 0.25*dR4.sum(axis=0) + dS2.sum(axis=0)
+        if m_perm > 0.0:
+            J['ballast_z_cg','x'] = e_draft + (dS1.sum(axis=0) - S1.sum()/V_perm*dV.sum(axis=0)) / V_perm
+        J['ballast_I_keel','x'] = rho_ballast * np.r_[[dIxx, dIxx, 0.5*dR4.sum(axis=0)], np.zeros((3, nx))]
+        J['ballast_I_keel','permanent_ballast_density'] = np.r_[Ixx, Ixx, 0.5*R4.sum(), np.zeros(3)]
+
+        # Ballast apportioned to the sections its slices are in, the top bulkhead is in the last section
+        isection  = np.searchsorted(z_nodes, 0.5*(zpts[:-1] + zpts[1:])) - 1
+        inside    = np.logical_and(isection >= 0, isection < nsection)
+        P_ballast = np.zeros((nsection, V_slice.size))
+        P_ballast[isection[inside], np.nonzero(inside)[0]] = 1.0
+        P_bulk    = np.eye(nsection, nFull)
+        P_bulk[-1,-1] = 1.0
+
+        # Variable ballast profile, from the clipped top of the permanent ballast and padded with the last node
+        if z_draft + h_ballast < z_nodes[0]:
+            T_inner[-2] = e_draft
+        elif z_draft + h_ballast > z_nodes[-1]:
+            T_inner[-2] = e_top
+        else:
+            T_inner[-2] = e_draft + e_height
+        T_inner[-1] = e_top
+        z_water_start = np.clip(z_draft + h_ballast, z_nodes[0], z_nodes[-1])
+        zvar, _, dzvar, drvar = profileSlice(z_nodes, R_id, z_water_start, z_nodes[-1], derivs=True)
+        ipad = np.r_[np.arange(zvar.size), (zvar.size-1)*np.ones(nFull-zvar.size, dtype=np.int_)]
+        J['variable_ballast_interp_zpts','x'] = np.dot(dzvar, T_inner)[ipad]
+        J['variable_ballast_interp_radius','x'] = np.dot(drvar, T_inner)[ipad]
+
+        # Masses and costs
+        m_raw    = m_sections.sum() + m_bulkhead.sum()
+        m_spar   = coeff * m_raw
+        m_total  = (1.0 + out_frac) * m_spar + m_perm
+        dm_spar  = {'shell_mass':coeff*np.ones(nsection), 'stiffener_mass':coeff*np.ones(nsection),
+                    'bulkhead_mass':coeff*np.ones(nFull), 'column_mass_factor':m_raw}
+        dm_outfit = dict( (k, out_frac*dm_spar[k]) for k in dm_spar )
+        dm_outfit['outfitting_mass_fraction'] = m_spar
+        dm_ballast = {'x':rho_ballast*dV.sum(axis=0), 'permanent_ballast_density':V_perm}
+        dm_total = {}
+        for mass, cost, rate, dm in [('spar_mass', 'spar_cost', 'tapered_col_cost_rate', dm_spar),
+                                     ('outfitting_mass', 'outfitting_cost', 'outfitting_cost_rate', dm_outfit),
+                                     ('ballast_mass', 'ballast_cost', 'ballast_cost_rate', dm_ballast)]:
+            for k in dm:
+                dm_total[k] = dm_total.get(k, 0.0) + dm[k]
+                J[mass,k] = dm[k]
+                J[cost,k] = params[rate] * dm[k]
+                J['total_cost',k] = J.get(('total_cost',k), 0.0) + params[rate] * dm[k]
+            J[cost,rate] = J['total_cost',rate] = unknowns[mass]
+
+        # Section masses, with the outfitting spread evenly
+        J['total_mass','shell_mass'] = coeff*np.eye(nsection) + out_frac*coeff/nsection
+        J['total_mass','stiffener_mass'] = J['total_mass','shell_mass']
+        J['total_mass','bulkhead_mass'] = coeff*P_bulk + out_frac*coeff/nsection
+        J['total_mass','column_mass_factor'] = m_sections + np.dot(P_bulk, m_bulkhead) + out_frac*m_raw/nsection
+        J['total_mass','outfitting_mass_fraction'] = m_spar/nsection * np.ones(nsection)
+        J['total_mass','permanent_ballast_density'] = np.dot(P_ballast, V_slice)
+        J['total_mass','x'] = rho_ballast * np.dot(P_ballast, dV)
+
+        # Center of mass from the first moments about z=0 of the spar with outfitting and of the ballast,
+        # then the moments of inertia moved from the keel to the center of mass
+        M_raw = np.dot(m_sections, z_section) + np.dot(m_bulkhead, z_nodes)
+        z_cg  = unknowns['z_center_of_mass']
+        dM    = {'shell_mass':(1.0+out_frac)*coeff*z_section, 'stiffener_mass':(1.0+out_frac)*coeff*z_section,
+                 'bulkhead_mass':(1.0+out_frac)*coeff*z_nodes, 'z_section':(1.0+out_frac)*coeff*m_sections,
+                 'column_mass_factor':(1.0+out_frac)*M_raw, 'outfitting_mass_fraction':coeff*M_raw,
+                 'permanent_ballast_density':z_draft*V_perm + S1.sum(),
+                 'x':rho_ballast*(V_perm*e_draft + z_draft*dV.sum(axis=0) + dS1.sum(axis=0))
+                     + (1.0+out_frac)*coeff*np.r_[m_bulkhead, np.zeros(nx-nFull)]}
+        dI    = {'column_mass_factor':(1.0+out_frac)*I_keel, 'outfitting_mass_fraction':coeff*I_keel,
+                 'permanent_ballast_density':J['ballast_I_keel','permanent_ballast_density'], 'x':J['ballast_I_keel','x']}
+        z_keel = z_cg - z_draft
+        for k in dM:
+            dz_cg = (dM[k] - z_cg*dm_total.get(k, 0.0)) / m_total
+            dz_keel = dz_cg - e_draft if k == 'x' else dz_cg
+            J['z_center_of_mass',k] = dz_cg
+            J['I_column',k] = (np.reshape(dI.get(k, np.zeros(6)), (6,-1)) -
+                               np.outer([1.0, 1.0, 0.0, 0.0, 0.0, 0.0], dm_total.get(k, 0.0)*z_keel**2 + 2.0*m_total*z_keel*dz_keel))
+        for k in ['shell_I_keel', 'stiffener_I_keel', 'bulkhead_I_keel']:
+            J['I_column',k] = (1.0+out_frac)*coeff*np.eye(6)
+
+        # Submerged profile from the slice of the outer profile at the waterline
+        T_outer[-2:] = [e_draft, e_top if z_nodes[-1] <= 0.0 else np.zeros(nx)]
+        z_under, r_under, dz_under, dr_under = profileSlice(z_nodes, R_od, z_draft, min(0.0, z_nodes[-1]), derivs=True)
+        dz_under, dr_under = np.dot(dz_under, T_outer), np.dot(dr_under, T_outer)
+        V_under, S1_under, _, _, D = frustumIntegrals(r_under[:-1], r_under[1:], np.diff(z_under), z_under[:-1], derivs=True)
+        dV_under, dS1_under = np.einsum('ijk,jkx->ikx', D[:2], [dr_under[:-1], dr_under[1:], np.diff(dz_under, axis=0), dz_under[:-1]])
+        V_total = V_under.sum() + nsection*eps
+        z_cb    = S1_under.sum() / V_total
+        dz_cb   = (dS1_under.sum(axis=0) - z_cb*dV_under.sum(axis=0)) / V_total
+        J['displaced_volume','x'] = np.r_[dV_under, np.zeros((nsection-V_under.size, nx))]
+        J['z_center_of_buoyancy','x'] = dz_cb
+        J['Awater','x'] = 2.0 * np.pi * r_under[-1] * dr_under[-1]
+        J['Iwater','x'] = np.pi * r_under[-1]**3.0 * dr_under[-1]
+
+        # Added mass, with the second moment of the submerged volume about the center of buoyancy
+        _, _, S2_cb, _, D = frustumIntegrals(r_under[:-1], r_under[1:], np.diff(z_under), z_under[:-1] - z_cb, derivs=True)
+        dS2_cb = np.einsum('jk,jkx->x', D[2], [dr_under[:-1], dr_under[1:], np.diff(dz_under, axis=0), dz_under[:-1] - dz_cb])
+        imax   = np.argmax(r_under)
+        J['added_mass','x'] = rho_water * np.r_[[dV_under.sum(axis=0), dV_under.sum(axis=0), 4.0*r_under[imax]**2.0*dr_under[imax],
+                                                  dS2_cb, dS2_cb], np.zeros((1,nx))]
+        J['added_mass','water_density'] = np.r_[V_total, V_total, (4.0/3.0)*r_under[imax]**3.0, S2_cb.sum(), S2_cb.sum(), 0.0]
+
+        # Split the geometry derivatives into the parameters and shape everything as (output, param) matrices
+        for o, k in list(J.keys()):
+            if k == 'x':
+                dx = np.reshape(J.pop((o,k)), (-1,nx))
+                J[o,'z_full'] = dx[:,:nFull]
+                J[o,'d_full'] = dx[:,nFull:2*nFull]
+                J[o,'t_full'] = dx[:,2*nFull:3*nFull]
+                J[o,'permanent_ballast_height'] = dx[:,-1:]
+        for o, k in J:
+            J[o,k] = np.reshape(J[o,k], (np.size(unknowns[o]), np.size(params[k])))
+        return J
+
 
         
 class ColumnBuckling(Component):
@@ -666,7 +1167,10 @@ class ColumnBuckling(Component):
         self.add_output('external_local_unity', val=np.zeros((nFull-1,)), desc='unity check for external pressure - local buckling')
         self.add_output('external_general_unity', val=np.zeros((nFull-1,)), desc='unity check for external pressure - general instability')
         
-        # Derivatives
+        # Derivatives are finite differenced on purpose: the API Bulletin 2U checks are evaluated by
+        # commonse.UtilizationSupplement.shellBuckling_withStiffeners, which provides no derivatives and is built from
+        # piecewise plasticity reduction and regime formulas, so an analytic Jacobian here would have to duplicate
+        # that implementation and silently go wrong whenever it changes
         self.deriv_options['type'] = 'fd'
         self.deriv_options['form'] = 'central'
         self.deriv_options['check_form'] = 'central'
@@ -765,7 +1269,7 @@ class Column(Group):
                                                            'bulkhead_mass','stiffener_mass','column_mass_factor','outfitting_mass_fraction',
                                                            'bulkhead_I_keel','stiffener_I_keel',
                                                            'ballast_cost_rate','tapered_col_cost_rate','outfitting_cost_rate',
-                                                           'variable_ballast_interp_mass','variable_ballast_interp_zpts',
+                                                           'variable_ballast_interp_radius','variable_ballast_interp_zpts',
                                                            'z_center_of_mass','z_center_of_buoyancy','Awater','Iwater','I_column',
                                                            'displaced_volume','added_mass','total_mass','total_cost',
                                                            'ballast_mass','ballast_I_keel', 'ballast_z_cg'])
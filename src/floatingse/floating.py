@@ -24,7 +24,8 @@ class NewHubHeight(Component):
     
 class FloatingSE(Group):
 
-    def __init__(self, nSection):
+    def __init__(self, nSection, lazy_plot=False, nModes=6, modal_method=1, modal_cache_size=0, frame_solver='frame3dd',
+                 export_path=None, export_interval=1, stress_stations=1, nFrame=None):
         super(FloatingSE, self).__init__()
 
         #self.add('geomsys', SubstructureDiscretization(nSection), promotes=['z_system'])
@@ -46,26 +47,34 @@ class FloatingSE(Group):
                                                            'min_taper','min_d_to_t'])
 
         # Add in the connecting truss
-        self.add('load', FloatingLoading(nSection, self.nFull), promotes=['water_density','material_density','E','G','yield_stress',
-                                                                          'z0','beta','Uref','zref','shearExp','beta','cd_usr',
-                                                                          'pontoon_outer_diameter','pontoon_wall_thickness','outer_cross_pontoons_int',
-                                                                          'cross_attachment_pontoons_int','lower_attachment_pontoons_int',
-                                                                          'upper_attachment_pontoons_int','lower_ring_pontoons_int',
-                                                                          'upper_ring_pontoons_int','pontoon_cost_rate',
-                                                                          'connection_ratio_max','base_pontoon_attach_lower','base_pontoon_attach_upper',
-                                                                          'gamma_b','gamma_f','gamma_fatigue','gamma_m','gamma_n',
-                                                                          'rna_I','rna_cg','rna_force','rna_moment','rna_mass',
-                                                                          'number_of_auxiliary_columns','structural_frequencies'])
+        # Structural modes are only recomputed when the mass or stiffness changes if modal_cache_size > 0
+        # The frame_solver is either 'frame3dd' or the in-process 'sparse' beam solver
+        # Every export_interval-th frame is written to the export_path directory for offline inspection if export_path is set
+        # Stresses are checked at stress_stations points along each frame element (1 checks only the N2 end)
+        # The frame has nFrame nodes along each column and the tower (None for the nFull nodes of the column discretization)
+        truss = FloatingLoading(nSection, self.nFull, nModes, modal_method, modal_cache_size, frame_solver,
+                                export_path, export_interval, stress_stations, nFrame)
+        self.add('load', truss, promotes=['water_density','material_density','E','G','yield_stress',
+                                          'z0','beta','Uref','zref','shearExp','beta','cd_usr',
+                                          'pontoon_outer_diameter','pontoon_wall_thickness','outer_cross_pontoons_int',
+                                          'cross_attachment_pontoons_int','lower_attachment_pontoons_int',
+                                          'upper_attachment_pontoons_int','lower_ring_pontoons_int',
+                                          'upper_ring_pontoons_int','pontoon_cost_rate',
+                                          'connection_ratio_max','base_pontoon_attach_lower','base_pontoon_attach_upper',
+                                          'gamma_b','gamma_f','gamma_fatigue','gamma_m','gamma_n',
+                                          'rna_I','rna_cg','rna_force','rna_moment','rna_mass',
+                                          'number_of_auxiliary_columns','structural_frequencies'])
 
 
         # Run Semi Geometry for interfaces
         self.add('sg', SubstructureGeometry(self.nFull), promotes=['number_of_auxiliary_columns'])
 
         # Next run MapMooring
-        self.add('mm', MapMooring(), promotes=['water_density','water_depth'])
+        # Mooring line shapes for plotting are only computed on request if lazy_plot is set
+        self.add('mm', MapMooring(lazy_plot=lazy_plot), promotes=['water_density','water_depth'])
         
         # Run main Semi analysis
-        self.add('subs', Substructure(self.nFull), promotes=['water_density','total_cost','total_mass','number_of_auxiliary_columns',
+        self.add('subs', Substructure(self.nFull, nModes), promotes=['water_density','total_cost','total_mass','number_of_auxiliary_columns',
                                                              'structural_frequencies','natural_periods'])
 
         # Define all input variables from all models
@@ -234,7 +243,7 @@ class FloatingSE(Group):
         self.connect('base.added_mass', 'subs.base_column_added_mass')
         self.connect('base.total_mass', 'load.base_column_mass')
         self.connect('base.total_cost', 'subs.base_column_cost')
-        self.connect('base.variable_ballast_interp_mass', 'subs.water_ballast_mass_vector')
+        self.connect('base.variable_ballast_interp_radius', 'subs.water_ballast_radius_vector')
         self.connect('base.variable_ballast_interp_zpts', 'subs.water_ballast_zpts_vector')
         self.connect('base.Px', 'load.base_column_Px')
         self.connect('base.Py', 'load.base_column_Py')
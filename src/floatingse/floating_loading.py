@@ -1,6 +1,9 @@
 from openmdao.api import Component, Group, IndepVarComp
 import numpy as np
+import os
+import time
 import pyframe3dd.frame3dd as frame3dd
+import sparse_frame
 from commonse.utilities import nodal2sectional
 
 from commonse import gravity, eps, Tube
@@ -8,21 +11,356 @@ import commonse.UtilizationSupplement as util
 from commonse.WindWaveDrag import AeroHydroLoads, CylinderWindDrag, CylinderWaveDrag
 from commonse.environment import WaveBase, PowerWind
 from commonse.vertical_cylinder import CylinderDiscretization, CylinderMass
+from result_cache import ResultCache
 
 
 def find_nearest(array,value):
     return (np.abs(array-value)).argmin() 
 
 
+# Inputs that can be changed in each additional FloatingFrame load case
+LOAD_CASE_INPUTS = ['base_column_Px', 'base_column_Py', 'base_column_Pz', 'base_column_qdyn',
+                    'auxiliary_column_Px', 'auxiliary_column_Py', 'auxiliary_column_Pz', 'auxiliary_column_qdyn',
+                    'tower_Px', 'tower_Py', 'tower_Pz', 'tower_qdyn', 'rna_force', 'rna_moment']
+
+# Reasons that FloatingFrame rejects a design, reported in the frame_failure output
+FRAME_FAILURES = ['column_count', 'attachment_pontoons', 'section_properties', 'frame_solve']
+
+# Outputs stored with each exported frame, and the record of each frame in the export index
+FRAME_EXPORT_OUTPUTS = ['structural_frequencies', 'structural_mass', 'substructure_mass', 'center_of_mass', 'top_deflection_cases',
+                        'total_force_cases', 'total_moment_cases', 'pontoon_stress_cases', 'tower_stress_cases',
+                        'tower_shell_buckling_cases', 'tower_global_buckling_cases', 'plot_matrix']
+FRAME_INDEX_DTYPE    = np.dtype([('evaluation', np.int32), ('substructure_mass', np.float64), ('structural_mass', np.float64),
+                                 ('max_tower_stress', np.float64), ('max_pontoon_stress', np.float64)])
+
+# Preallocated buffers for the Frame3DD model, one record per node, element, or element load
+NODE_DTYPE    = np.dtype([('x', np.float64), ('y', np.float64), ('z', np.float64)])
+ELEMENT_DTYPE = np.dtype([('N1', np.int32), ('N2', np.int32), ('Ax', np.float64), ('As', np.float64), ('Jx', np.float64),
+                          ('I', np.float64), ('S', np.float64), ('C', np.float64), ('modE', np.float64), ('modG', np.float64),
+                          ('roll', np.float64), ('dens', np.float64)])
+LOAD_DTYPE    = np.dtype([('EL', np.int32), ('Ux', np.float64), ('x1', np.float64), ('x2', np.float64),
+                          ('wx1', np.float64), ('wx2', np.float64), ('wy1', np.float64), ('wy2', np.float64),
+                          ('wz1', np.float64), ('wz2', np.float64)])
+
+
+def set_element_properties(elements, index, tube, E, G, dens):
+    """Fills the section and material properties of a block of elements in a preallocated element buffer
+
+    INPUTS:
+    ----------
+    elements : structured array of ELEMENT_DTYPE
+    index    : slice of the elements to fill
+    tube     : Tube object with the element cross sections
+    E        : modulus of elasticity (Youngs)
+    G        : shear modulus
+    dens     : material density
+
+    OUTPUTS  : none (elements modified in place)
+    """
+    elements['Ax'][index]   = tube.Area
+    elements['As'][index]   = tube.Asx
+    elements['Jx'][index]   = tube.J0
+    elements['I'][index]    = tube.Jxx
+    elements['S'][index]    = tube.S
+    elements['C'][index]    = tube.C
+    elements['modE'][index] = E
+    elements['modG'][index] = G
+    elements['roll'][index] = 0.0
+    elements['dens'][index] = dens
+
+
+def frame_mesh(nFull, nFrame):
+    """Places the frame nodes along the column and tower discretization, spaced evenly in node index so that the
+    frame nodes follow the section spacing and fall on the section nodes when (nFull-1) is a multiple of (nFrame-1)
+
+    INPUTS:
+    ----------
+    nFull  : number of nodes of the column and tower discretization
+    nFrame : number of frame nodes along each column and the tower
+
+    OUTPUTS  : (nFrame,) fractional node index into the discretization of each frame node, and
+               (nFull-1, nFrame-1) boolean array of the frame elements that overlap each section
+    """
+    u = np.linspace(0.0, nFull-1.0, nFrame)
+    j = np.arange(nFull-1)[:,np.newaxis]
+    overlap = (u[np.newaxis,:-1] < j+1) & (u[np.newaxis,1:] > j)
+    return u, overlap
+
+
+def interp_nodal(x, u):
+    """Interpolates nodal values x (such as diameters or loads per unit length) to fractional node indices u"""
+    return np.interp(u, np.arange(len(x)), x)
+
+
+def interp_sectional(x, u):
+    """Redistributes section totals x (such as mass or volume) between fractional node indices u, conserving the sum"""
+    cumx = np.r_[0.0, np.cumsum(x)]
+    return np.diff(np.interp(u, np.arange(cumx.size), cumx))
+
+
+def element_internal_forces(Q1, L, stations, loads):
+    """Internal forces at stations along the elements, from the element end forces at N1 and the distributed loads
+    by static equilibrium of the element between N1 and each station.  Forces are on the face of the cut looking
+    towards N1, so the last station at the element length matches the end forces at N2.
+
+    INPUTS:
+    ----------
+    Q1       : (ncase, nelem, 6) end forces on the elements at N1 (Nx, Vy, Vz, Txx, Myy, Mzz) in local coordinates
+    L        : (nelem,) element lengths
+    stations : (nstation,) fractions of the element length, 0 at N1 and 1 at N2
+    loads    : list of (x1, x2, w1, w2) distributed loads per unit length in local coordinates, each array of shape
+               (ncase or 1, nelem, 3) varying linearly from w1 at x1 to w2 at x2 from N1
+
+    OUTPUTS  : (ncase, nelem, nstation, 6) array of Nx, Vy, Vz, Txx, Myy, Mzz
+    """
+    s   = np.outer(L, stations)[np.newaxis,:,:,np.newaxis]
+    I0  = np.zeros(Q1.shape[:2] + (stations.size, 3))
+    I1  = np.zeros(I0.shape)
+    for x1, x2, w1, w2 in loads:
+        x1, x2, w1, w2 = [np.asarray(v)[:,:,np.newaxis,:] for v in [x1, x2, w1, w2]]
+        span = np.maximum(x2 - x1, 0.0)
+        k    = np.where(span > 0.0, (w2 - w1) / np.where(span > 0.0, span, 1.0), 0.0)
+        d    = s - x1
+        e    = np.minimum(np.maximum(d, 0.0), span)
+        # Integrals of the load and of its moment arm to the station from N1 to the station
+        I0  += w1*e + 0.5*k*e**2
+        I1  += w1*(d*e - 0.5*e**2) + k*(0.5*d*e**2 - e**3/3.0)
+
+    Q1 = Q1[:,:,np.newaxis,:]
+    s  = s[:,:,:,0]
+    F  = np.zeros(I0.shape[:3] + (6,))
+    F[:,:,:,:3] = -Q1[:,:,:,:3] - I0
+    F[:,:,:,3]  = -Q1[:,:,:,3]
+    F[:,:,:,4]  = -Q1[:,:,:,4] - s*Q1[:,:,:,2] - I1[:,:,:,2]
+    F[:,:,:,5]  = -Q1[:,:,:,5] + s*Q1[:,:,:,1] + I1[:,:,:,1]
+    return F
+
+
+def screen_frame_inputs(params):
+    """Fast checks of the substructure topology and geometry, so that designs that cannot be built into a valid frame
+    are rejected before any of the frame model is assembled or solved
+
+    INPUTS:
+    ----------
+    params : dictionary of FloatingFrame input parameters
+
+    OUTPUTS  : reason from FRAME_FAILURES that the design is invalid, or None if it passes
+    """
+    ncolumn = int(params['number_of_auxiliary_columns'])
+
+    # Must have symmetry for the substructure to work out
+    if ncolumn in [1, 2] or ncolumn > 7:
+        return 'column_count'
+
+    # If there are auxiliary columns, must have attachment pontoons (only have ring pontoons doesn't make sense)
+    if (ncolumn > 0) and (not params['cross_attachment_pontoons']) and (not params['lower_attachment_pontoons']) and (not params['upper_attachment_pontoons']):
+        return 'attachment_pontoons'
+
+    # Tube walls must be positive and no thicker than the radius, and material properties must be positive (also catches nan)
+    tubes = [('base_d_full', 'base_t_full'), ('tower_d_full', 'tower_t_full')]
+    if ncolumn > 0:
+        tubes.extend([('auxiliary_d_full', 'auxiliary_t_full'), ('pontoon_outer_diameter', 'pontoon_wall_thickness')])
+    for dname, tname in tubes:
+        R_od   = 0.5*np.asarray(params[dname])
+        t_wall = np.asarray(params[tname])
+        if not (np.all(R_od > 0.0) and np.all(t_wall > 0.0) and np.all(t_wall <= R_od)):
+            return 'section_properties'
+    for k in ['E', 'G', 'material_density']:
+        if not np.all(np.asarray(params[k]) > 0.0):
+            return 'section_properties'
+    return None
+
+
+def read_frame_export(export_path, evaluation=None):
+    """Reads the frames written by FloatingFrame with an export_path, without re-solving them
+
+    INPUTS:
+    ----------
+    export_path : directory of the exported frames
+    evaluation  : evaluation number of the frame to read, None for the index of all exported frames
+
+    OUTPUTS  : dictionary of the arrays stored for the frame (params/ and unknowns/ prefixes for the component
+               inputs and outputs), or structured array of FRAME_INDEX_DTYPE with one record per exported frame
+    """
+    if evaluation is None:
+        return np.atleast_1d(np.loadtxt(os.path.join(export_path, 'index.txt'), dtype=FRAME_INDEX_DTYPE, usecols=(0,2,3,4,5)))
+    with np.load(os.path.join(export_path, 'frame_%06d.npz' % evaluation)) as data:
+        return dict( (k, data[k]) for k in data.files )
+
+
+class FrameTopology(object):
+    """
+    Node and element numbering of the Frame3DD model of the substructure, along with preallocated buffers for the
+    node coordinates, element properties, and column element loads.  The numbering depends only on the pontoon flags,
+    the number of auxiliary columns, the number of nodes along each column, and the nodes where the pontoons and
+    mooring lines attach.  FloatingFrame builds it once for each arrangement and then only updates the buffers.
+    The reactions are built with the frame solver module, either pyframe3dd.frame3dd or sparse_frame.
+    """
+    def __init__(self, flags, ncolumn, nbase, ntower, nballast, baseLowerIdx, baseUpperIdx, fairleadIdx, solver=frame3dd):
+        crossAttachFlag, lowerAttachFlag, upperAttachFlag, lowerRingFlag, upperRingFlag, outerCrossFlag = flags
+        
+        # ---NODES---
+        # Base column (4 nodes/3 elements per section), tower sharing the base top node,
+        # dummy node so that the tower isn't the last in a chain (this avoids a Frame3DD bug),
+        # ballast columns around the circle, and nodes midway around outer ring for cross bracing
+        ncross              = ncolumn if (outerCrossFlag and ncolumn > 0) else 0
+        self.baseBeginID    = 0 + 1
+        self.baseLowerID    = baseLowerIdx + 1
+        self.baseUpperID    = baseUpperIdx + 1
+        self.baseEndID      = nbase
+        self.towerBeginID   = self.baseEndID
+        self.towerEndID     = nbase + ntower - 1
+        self.dummyID        = self.towerEndID + 1
+        self.ballastLowerID = self.dummyID + 1 + nballast*np.arange(ncolumn, dtype=np.int32)
+        self.ballastUpperID = self.ballastLowerID + nballast - 1
+        self.crossOuterLowerID = self.dummyID + ncolumn*nballast + 1 + np.arange(ncross, dtype=np.int32)
+        self.nodes = np.zeros(self.dummyID + ncolumn*nballast + ncross, dtype=NODE_DTYPE)
+        self.nnode = 1 + np.arange(self.nodes.size)
+        self.rnode = np.zeros(self.nodes.shape)
+
+        # ---REACTIONS---
+        # Pin (3DOF) the nodes at the mooring connections.  Otherwise free
+        # Need reaction attachment point on the base if just running a spar
+        # Free=0, Rigid=1
+        self.rid = np.array([fairleadIdx + 1]) if ncolumn == 0 else (self.ballastLowerID + fairleadIdx)
+        Rx = Ry = Rz = Rxx = Ryy = Rzz = np.ones(self.rid.shape)
+        #if ncolumn > 0:
+        #    Rxx[1:] = Ryy[1:] = Rzz[1:] = 0.0
+        # First approach
+        # Pinned windward column lower node (first ballastLowerID)
+        #rid = ballastLowerID[0]
+        #Rx = Ry = Rz = Rxx = Ryy = Rzz = 1
+        # Rollers for other lower column nodes, restrict motion
+        #rid = ballastLowerID[1:]
+        #Rz = Rxx = Ryy = Rzz = 1
+
+        # Get reactions object from frame3dd
+        self.reactions = solver.ReactionData(self.rid, Rx, Ry, Rz, Rxx, Ryy, Rzz, rigid=1)
+
+        # ---ELEMENTS / EDGES---
+        npontoon = ncolumn * (int(lowerAttachFlag) + int(upperAttachFlag) + int(crossAttachFlag) +
+                              int(lowerRingFlag) + int(upperRingFlag) + 2*int(outerCrossFlag))
+        self.elements = np.zeros(npontoon + (nbase-1) + (ntower-1) + 1 + ncolumn*(nballast-1), dtype=ELEMENT_DTYPE)
+        self.nelem    = 1 + np.arange(self.elements.size)
+        N1, N2 = self.elements['N1'], self.elements['N2']
+        self.lowerAttachEID = self.upperAttachEID = self.crossAttachEID = None
+        self.lowerRingEID   = self.upperRingEID   = self.outerCrossEID  = None
+        iE = 0
+        # Lower connection from central base column to ballast columns
+        if lowerAttachFlag:
+            self.lowerAttachEID = iE + 1
+            N1[iE:(iE+ncolumn)] = self.baseLowerID
+            N2[iE:(iE+ncolumn)] = self.ballastLowerID
+            iE += ncolumn
+        # Upper connection from central base column to ballast columns
+        if upperAttachFlag:
+            self.upperAttachEID = iE + 1
+            N1[iE:(iE+ncolumn)] = self.baseUpperID
+            N2[iE:(iE+ncolumn)] = self.ballastUpperID
+            iE += ncolumn
+        # Cross braces from lower central base column to upper ballast columns
+        if crossAttachFlag:
+            self.crossAttachEID = iE + 1
+            N1[iE:(iE+ncolumn)] = self.baseLowerID
+            N2[iE:(iE+ncolumn)] = self.ballastUpperID
+            iE += ncolumn
+        # Lower ring around ballast columns
+        if lowerRingFlag:
+            self.lowerRingEID = iE + 1
+            N1[iE:(iE+ncolumn)] = self.ballastLowerID[np.r_[0:(ncolumn-1), 0]]
+            N2[iE:(iE+ncolumn)] = self.ballastLowerID[np.r_[1:ncolumn, ncolumn-1]]
+            iE += ncolumn
+        # Upper ring around ballast columns
+        if upperRingFlag:
+            self.upperRingEID = iE + 1
+            N1[iE:(iE+ncolumn)] = self.ballastUpperID[np.r_[0:(ncolumn-1), 0]]
+            N2[iE:(iE+ncolumn)] = self.ballastUpperID[np.r_[1:ncolumn, ncolumn-1]]
+            iE += ncolumn
+        # Outer cross braces, two from each midway node
+        if outerCrossFlag:
+            self.outerCrossEID = iE + 1
+            N1[iE:(iE+2*ncolumn)] = np.c_[self.crossOuterLowerID, np.roll(self.crossOuterLowerID,-1)].flatten()
+            N2[iE:(iE+2*ncolumn)] = np.repeat(self.ballastUpperID, 2)
+            iE += 2*ncolumn
+
+        # Columns mocked up as truss members, with a dummy element between the tower top and dummy node
+        self.baseEID  = iE + 1
+        self.towerEID = self.baseEID + nbase - 1
+        self.dummyEID = self.towerEID + ntower - 1
+        N1[(self.baseEID-1):(self.dummyEID-1)] = np.r_[self.baseBeginID:self.baseEndID, self.towerBeginID:self.towerEndID]
+        N2[(self.baseEID-1):(self.dummyEID-1)] = N1[(self.baseEID-1):(self.dummyEID-1)] + 1
+        N1[self.dummyEID-1] = self.towerEndID
+        N2[self.dummyEID-1] = self.dummyID
+        self.ballastEID = self.dummyEID + 1 + (nballast-1)*np.arange(ncolumn, dtype=np.int32)
+        for k in xrange(ncolumn):
+            ielem = slice(self.ballastEID[k]-1, self.ballastEID[k]+nballast-2)
+            N1[ielem] = self.ballastLowerID[k] + np.arange(nballast-1)
+            N2[ielem] = N1[ielem] + 1
+
+        # ---LOADS---
+        # Trapezoidal and uniform loads on every column element: base, tower, then each ballast column
+        self.loads = np.zeros((nbase-1) + (ntower-1) + ncolumn*(nballast-1), dtype=LOAD_DTYPE)
+        self.loads['EL'] = np.r_[self.baseEID:self.dummyEID, (self.dummyEID+1):(self.elements.size+1)]
+
+
 class FloatingFrame(Component):
     """
     OpenMDAO Component class for semisubmersible pontoon / truss structure for floating offshore wind turbines.
     Should be tightly coupled with Semi and Mooring classes for full system representation.
     """
 
-    def __init__(self, nFull):
+    def __init__(self, nFull, nModes=6, modal_method=1, modal_cache_size=0, frame_solver='frame3dd',
+                 export_path=None, export_interval=1, stress_stations=1, nFrame=None):
         super(FloatingFrame,self).__init__()
 
+        # Options local to the class and not OpenMDAO
+        # nModes: number of structural modes of vibration to compute
+        # modal_method: Frame3DD eigen-solver, 1 for subspace Jacobi or 2 for Stodola
+        # modal_cache_size: number of mass and stiffness distributions to remember the frequencies and total mass of,
+        #                   so that changes to the loads alone skip the eigen-solve (size 0 disables)
+        # frame_solver: 'frame3dd' uses pyframe3dd, 'sparse' uses the in-process sparse Timoshenko beam solver
+        # export_path, export_interval: write the frame model, loads, and results of every export_interval-th evaluation
+        #                               to .npz files in the export_path directory (None disables), see read_frame_export
+        # stress_stations: number of evenly spaced stations from N1 to N2 along each element where the stress and buckling
+        #                  utilizations are checked (reporting the peak), 1 for only the N2 end of each element
+        # nFrame: number of frame nodes along each column and the tower, with the column inputs interpolated onto them
+        #         and the tower utilizations reported as the peak over the frame elements in each section (None for nFull)
+        if nModes < 1:
+            raise ValueError('Number of modes must be at least one')
+        if not modal_method in [1, 2]:
+            raise ValueError('Available modal methods are: 1 (subspace Jacobi) 2 (Stodola)')
+        if not frame_solver in ['frame3dd', 'sparse']:
+            raise ValueError('Available frame solvers are: frame3dd sparse')
+        if export_interval < 1:
+            raise ValueError('Export interval must be at least one')
+        if stress_stations < 1:
+            raise ValueError('Number of stress stations must be at least one')
+        if (not nFrame is None) and nFrame < 2:
+            raise ValueError('Number of frame nodes must be at least two')
+        self.nModes          = nModes
+        self.modal_method    = modal_method
+        self.frame_solver    = frame_solver
+        self.frame_module    = frame3dd if frame_solver == 'frame3dd' else sparse_frame
+        self.export_path     = export_path
+        self.export_interval = export_interval
+        self.stress_stations = stress_stations
+        self.nFull           = nFull
+        self.nFrame          = nFull if nFrame is None else nFrame
+        self.evaluations     = 0
+
+        # Fractional section node index of each frame node, and frame elements overlapping each section
+        self.frame_nodes, self.frame_overlap = frame_mesh(nFull, self.nFrame)
+
+        # Number of rejected designs for each reason in FRAME_FAILURES, and the time (s) spent evaluating them
+        self.failure_counts = dict( (k, 0) for k in FRAME_FAILURES )
+        self.failure_time   = 0.0
+
+        # Frame topologies already built, keyed by the arrangement of columns and pontoons
+        self.topology_cache = {}
+
+        # Natural frequencies keyed by the frame geometry, element properties, and extra mass
+        self.modal_cache = ResultCache(modal_cache_size)
+
         # Environment
         self.add_param('water_density', val=0.0, units='kg/m**3', desc='density of water')
 
@@ -96,6 +434,9 @@ class FloatingFrame(Component):
         self.add_param('rna_moment', val=np.zeros(3), units='N*m', desc='Moments about turbine base')
         self.add_param('rna_I', val=np.zeros(6), units='kg*m**2', desc='Moments about turbine base')
 
+        # Additional load cases
+        self.add_param('load_cases', val=[], desc='Additional load cases solved with the inputs above, each a dictionary overriding any of the LOAD_CASE_INPUTS', pass_by_obj=True)
+
         # safety factors
         self.add_param('gamma_f', 0.0, desc='safety factor on loads')
         self.add_param('gamma_m', 0.0, desc='safety factor on materials')
@@ -122,13 +463,24 @@ class FloatingFrame(Component):
         self.add_output('tower_global_buckling', np.zeros(nFull-1), desc='Global buckling constraint.  Should be < 1 for feasibility.  Includes safety factors')
         self.add_output('top_deflection', 0.0, units='m', desc='Deflection of tower top in yaw-aligned +x direction')
 
+        # Outputs of every load case (first row is the inputs above) and the envelope (maximum) across them
+        self.add_output('top_deflection_cases', np.zeros(1), units='m', desc='Deflection of tower top in each load case', pass_by_obj=True)
+        self.add_output('pontoon_stress_cases', np.zeros((1,60)), desc='Pontoon stress utilization in each load case', pass_by_obj=True)
+        self.add_output('tower_stress_cases', np.zeros((1,nFull-1)), desc='Tower stress utilization in each load case', pass_by_obj=True)
+        self.add_output('tower_shell_buckling_cases', np.zeros((1,nFull-1)), desc='Tower shell buckling constraint in each load case', pass_by_obj=True)
+        self.add_output('tower_global_buckling_cases', np.zeros((1,nFull-1)), desc='Tower global buckling constraint in each load case', pass_by_obj=True)
+        self.add_output('pontoon_stress_envelope', val=np.zeros((60,)), desc='Maximum pontoon stress utilization across load cases')
+        self.add_output('tower_stress_envelope', np.zeros(nFull-1), desc='Maximum tower stress utilization across load cases')
+        self.add_output('tower_shell_buckling_envelope', np.zeros(nFull-1), desc='Maximum tower shell buckling constraint across load cases')
+        self.add_output('tower_global_buckling_envelope', np.zeros(nFull-1), desc='Maximum tower global buckling constraint across load cases')
+
         self.add_output('plot_matrix', val=np.array([]), desc='Ratio of shear stress to yield stress for all pontoon elements', pass_by_obj=True)
         self.add_output('base_connection_ratio', val=np.zeros((nFull,)), desc='Ratio of pontoon outer diameter to base outer diameter')
         self.add_output('auxiliary_connection_ratio', val=np.zeros((nFull,)), desc='Ratio of pontoon outer diameter to base outer diameter')
         self.add_output('pontoon_base_attach_upper', val=0.0, desc='Fractional distance along base column for upper truss attachment')
         self.add_output('pontoon_base_attach_lower', val=0.0, desc='Fractional distance along base column for lower truss attachment')
 
-        self.add_output('structural_frequencies', np.zeros(6), units='Hz', desc='First six natural frequencies')
+        self.add_output('structural_frequencies', np.zeros(nModes), units='Hz', desc='First natural frequencies')
         self.add_output('substructure_mass', val=0.0, units='kg', desc='Mass of substructure elements and connecting truss')
         self.add_output('structural_mass', val=0.0, units='kg', desc='Mass of whole turbine except for mooring lines')
         self.add_output('total_displacement', val=0.0, units='m**3', desc='Total volume of water displaced by floating turbine (except for mooring lines)')
@@ -137,6 +489,10 @@ class FloatingFrame(Component):
         self.add_output('center_of_mass', val=np.zeros(3), units='m', desc='xyz-position of center of gravity of whole turbine')
         self.add_output('total_force', val=np.zeros(3), units='N', desc='Net forces on turbine')
         self.add_output('total_moment', val=np.zeros(3), units='N*m', desc='Moments on whole turbine')
+        self.add_output('total_force_cases', val=np.zeros((1,3)), units='N', desc='Net forces on turbine in each load case', pass_by_obj=True)
+        self.add_output('total_moment_cases', val=np.zeros((1,3)), units='N*m', desc='Moments on whole turbine in each load case', pass_by_obj=True)
+        self.add_output('center_of_mass_moment_cases', val=np.zeros((1,3)), units='N*m', desc='Moments on whole turbine about its center of mass in each load case', pass_by_obj=True)
+        self.add_output('frame_failure', val='', desc='Reason the design was rejected, one of FRAME_FAILURES, or empty if the frame was solved', pass_by_obj=True)
         
         # Derivatives
         self.deriv_options['type'] = 'fd'
@@ -145,10 +501,91 @@ class FloatingFrame(Component):
         self.deriv_options['step_calc'] = 'relative'
         self.deriv_options['step_size'] = 1e-5
          
+    def get_topology(self, flags, ncolumn, nbase, ntower, nballast, baseLowerIdx, baseUpperIdx, fairleadIdx):
+        """Returns the frame topology for this arrangement of columns and pontoons, building it only the first time
+        
+        INPUTS:
+        ----------
+        flags        : inclusion of cross attachment, lower attachment, upper attachment, lower ring, upper ring, and outer cross pontoons
+        ncolumn      : number of auxiliary columns
+        nbase        : number of nodes along base column
+        ntower       : number of nodes along tower
+        nballast     : number of nodes along each auxiliary column
+        baseLowerIdx : index of base column node of lower pontoon attachment (-1 if none)
+        baseUpperIdx : index of base column node of upper pontoon attachment (-1 if none)
+        fairleadIdx  : index of node at fairlead along auxiliary columns (or along base column for a spar)
+        
+        OUTPUTS  : FrameTopology object
+        """
+        key = (tuple([bool(f) for f in flags]), int(ncolumn), int(nbase), int(ntower), int(nballast),
+               int(baseLowerIdx), int(baseUpperIdx), int(fairleadIdx))
+        if not key in self.topology_cache:
+            self.topology_cache[key] = FrameTopology(key[0], *key[1:], solver=self.frame_module)
+        return self.topology_cache[key]
+
+    def export_frame(self, params, unknowns, topo, uniformLoads, caseLoads, cases, results):
+        """Writes the frame model, loads, and results of this evaluation to frame_<evaluation>.npz in export_path,
+        and appends a line to the index.txt summary there
+        
+        INPUTS:
+        ----------
+        params       : dictionary of input parameters
+        unknowns     : dictionary of outputs
+        topo         : FrameTopology object, holding the node and element data
+        uniformLoads : list of (EL, Ux, Uy, Uz) uniform loads applied in sequence to every load case
+        caseLoads    : list of trapezoidal load buffers of each load case
+        cases        : list of load case inputs
+        results      : tuple of displacements, forces, and reactions from the frame solver
+        
+        OUTPUTS  : none
+        """
+        if not os.path.isdir(self.export_path):
+            os.makedirs(self.export_path)
+        displacements, forces, reactions = results
+        
+        data = {}
+        data['evaluation']        = self.evaluations
+        data['nodes']             = topo.nodes
+        data['reaction_nodes']    = topo.rid
+        data['elements']          = topo.elements
+        data['uniform_loads']     = np.vstack([np.c_[EL, Ux, Uy, Uz] for EL, Ux, Uy, Uz in uniformLoads])
+        data['uniform_group']     = np.concatenate([k*np.ones(np.size(ul[0]), dtype=np.int32) for k, ul in enumerate(uniformLoads)])
+        data['trapezoidal_loads'] = np.array(caseLoads)
+        data['point_load_node']   = topo.baseEndID
+        data['point_loads']       = np.array([np.r_[case['rna_force'], case['rna_moment']] for case in cases])
+        data['extra_mass_node']   = topo.towerEndID
+        data['extra_mass']        = np.r_[params['rna_mass'], params['rna_I'], params['rna_cg']]
+        data['displacements']     = np.dstack([displacements.dx, displacements.dy, displacements.dz,
+                                               displacements.dxrot, displacements.dyrot, displacements.dzrot])
+        data['end_forces']        = np.dstack([forces.Nx, forces.Vy, forces.Vz, forces.Txx, forces.Myy, forces.Mzz])
+        data['reactions']         = np.dstack([reactions.Fx, reactions.Fy, reactions.Fz, reactions.Mxx, reactions.Myy, reactions.Mzz])
+        for k in params.keys():
+            try:
+                data['params/'+k] = np.array(params[k], dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+        for k in FRAME_EXPORT_OUTPUTS:
+            data['unknowns/'+k] = np.array(unknowns[k])
+
+        fname = 'frame_%06d.npz' % self.evaluations
+        np.savez_compressed(os.path.join(self.export_path, fname), **data)
+
+        findex = os.path.join(self.export_path, 'index.txt')
+        newIndex = not os.path.exists(findex)
+        with open(findex, 'a') as f:
+            if newIndex:
+                f.write('# evaluation file substructure_mass structural_mass max_tower_stress max_pontoon_stress\n')
+            f.write('%d %s %.16e %.16e %.16e %.16e\n' % (self.evaluations, fname, unknowns['substructure_mass'], unknowns['structural_mass'],
+                                                         np.max(unknowns['tower_stress_envelope']), np.max(unknowns['pontoon_stress_envelope'])))
+
     def solve_nonlinear(self, params, unknowns, resids):
+        t_start = time.time()
+        
         # If something fails, we have to tell the optimizer this design is no good
-        def bad_input():
-            unknowns['structural_frequencies'] = 1e30 * np.ones(6)
+        def bad_input(reason):
+            self.failure_counts[reason] += 1
+            unknowns['frame_failure'] = reason
+            unknowns['structural_frequencies'] = 1e30 * np.ones(self.nModes)
             unknowns['top_deflection'] = 1e30
             unknowns['substructure_mass']  = 1e30
             unknowns['structural_mass']    = 1e30
@@ -158,9 +595,22 @@ class FloatingFrame(Component):
             unknowns['center_of_mass'] = 1e30 * np.ones(3)
             unknowns['total_force'] =  1e30 * np.ones(3)
             unknowns['total_moment'] = 1e30 * np.ones(3)
-            unknowns['tower_stress'] = 1e30 * np.ones(m_base.shape)
-            unknowns['tower_shell_buckling'] = 1e30 * np.ones(m_base.shape)
-            unknowns['tower_global_buckling'] = 1e30 * np.ones(m_base.shape)
+            unknowns['total_force_cases']  = 1e30 * np.ones((1,3))
+            unknowns['total_moment_cases'] = 1e30 * np.ones((1,3))
+            unknowns['center_of_mass_moment_cases'] = 1e30 * np.ones((1,3))
+            unknowns['tower_stress'] = 1e30 * np.ones(self.nFull-1)
+            unknowns['tower_shell_buckling'] = 1e30 * np.ones(self.nFull-1)
+            unknowns['tower_global_buckling'] = 1e30 * np.ones(self.nFull-1)
+            unknowns['top_deflection_cases']           = 1e30 * np.ones((1,))
+            unknowns['pontoon_stress_cases']           = 1e30 * np.ones((1, unknowns['pontoon_stress'].size))
+            unknowns['tower_stress_cases']             = 1e30 * np.ones((1, self.nFull-1))
+            unknowns['tower_shell_buckling_cases']     = 1e30 * np.ones((1, self.nFull-1))
+            unknowns['tower_global_buckling_cases']    = 1e30 * np.ones((1, self.nFull-1))
+            unknowns['pontoon_stress_envelope']        = 1e30 * np.ones(unknowns['pontoon_stress'].shape)
+            unknowns['tower_stress_envelope']          = 1e30 * np.ones(self.nFull-1)
+            unknowns['tower_shell_buckling_envelope']  = 1e30 * np.ones(self.nFull-1)
+            unknowns['tower_global_buckling_envelope'] = 1e30 * np.ones(self.nFull-1)
+            self.failure_time += time.time() - t_start
             return
         
         # Unpack variables
@@ -200,8 +650,6 @@ class FloatingFrame(Component):
         m_tower        = params['tower_mass']
         
         m_rna          = params['rna_mass']
-        F_rna          = params['rna_force']
-        M_rna          = params['rna_moment']
         I_rna          = params['rna_I']
         cg_rna         = params['rna_cg']
         
@@ -218,6 +666,18 @@ class FloatingFrame(Component):
         cg_tower       = np.r_[0.0, 0.0, params['tower_center_of_mass']]
         
         coeff          = params['pontoon_cost_rate']
+
+        # Count evaluations for periodic export of the frame
+        self.evaluations += 1
+        export = (self.export_path is not None) and (self.evaluations % self.export_interval == 0)
+
+        # Load cases: the first from the inputs, each additional one overriding any of the environmental loads
+        cases = [params]
+        for case in params['load_cases']:
+            unknown = [k for k in case.keys() if not k in LOAD_CASE_INPUTS]
+            if len(unknown) > 0:
+                raise ValueError('Unknown load case inputs: ' + ' '.join(unknown))
+            cases.append( dict([(k, np.asarray(case[k], dtype=np.float64) if k in case else params[k]) for k in LOAD_CASE_INPUTS]) )
         
         gamma_f        = params['gamma_f']
         gamma_m        = params['gamma_m']
@@ -232,93 +692,83 @@ class FloatingFrame(Component):
         unknowns['pontoon_base_attach_lower'] = (z_attach_lower - z_base[0]) / (z_base[-1] - z_base[0]) #0.0<x<0.5
 
         # --- INPUT CHECKS -----
+        # Reject invalid topology and geometry before building the frame
+        reason = screen_frame_inputs(params)
+        if not reason is None:
+            bad_input(reason)
+            return
+        
         # There is no truss if not auxiliary columns
         if ncolumn == 0:
             crossAttachFlag = lowerAttachFlag = upperAttachFlag = False
             lowerRingFlag = upperRingFlag = outerCrossFlag  = False
 
-        # Must have symmetry for the substructure to work out
-        if ncolumn in [1, 2] or ncolumn > 7:
-            bad_input()
-            return
-
-        # If there are auxiliary columns, must have attachment pontoons (only have ring pontoons doesn't make sense)
-        if (ncolumn > 0) and (not crossAttachFlag) and (not lowerAttachFlag) and (not upperAttachFlag):
-            bad_input()
-            return
+        # Interpolate the column and tower discretization onto the frame mesh
+        if self.nFrame != self.nFull:
+            u = self.frame_nodes
+            z_base, R_od_base, t_wall_base          = [interp_nodal(x, u) for x in [z_base, R_od_base, t_wall_base]]
+            z_ballast, R_od_ballast, t_wall_ballast = [interp_nodal(x, u) for x in [z_ballast, R_od_ballast, t_wall_ballast]]
+            z_tower, R_od_tower, t_wall_tower       = [interp_nodal(x, u) for x in [z_tower, R_od_tower, t_wall_tower]]
+            m_base, V_base, m_ballast, V_ballast, m_tower = [interp_sectional(x, u) for x in [m_base, V_base, m_ballast, V_ballast, m_tower]]
+            cases = [dict( (k, case[k] if k.startswith('rna_') else interp_nodal(case[k], u)) for k in LOAD_CASE_INPUTS )
+                     for case in cases]
             
         # ---NODES---
         # Senu TODO: Should tower and rna have nodes at their CGs?
         # Senu TODO: Mooring tension on column nodes?
 
-        # Add nodes for base column: Using 4 nodes/3 elements per section
         # Make sure there is a node at upper and lower attachment points
-        baseBeginID = 0 + 1
+        baseLowerIdx = baseUpperIdx = -1
         if ncolumn > 0:
-            idx = find_nearest(z_base, z_attach_lower)
-            z_base[idx] = z_attach_lower
-            baseLowerID = idx + 1
+            baseLowerIdx = find_nearest(z_base, z_attach_lower)
+            z_base[baseLowerIdx] = z_attach_lower
             
-            idx = find_nearest(z_base, z_attach_upper)
-            z_base[idx] = z_attach_upper
-            baseUpperID = idx + 1
+            baseUpperIdx = find_nearest(z_base, z_attach_upper)
+            z_base[baseUpperIdx] = z_attach_upper
         
-        baseEndID = z_base.size
         freeboard = z_base[-1]
 
-        fairleadID  = []
-        # Need reaction attachment point if just running a spar
+        # Need reaction attachment point if just running a spar, otherwise make sure there is a node at the fairlead
         if ncolumn == 0:
-            idx = find_nearest(z_base, z_fairlead)
-            z_base[idx] = z_fairlead
-            fairleadID.append( idx + 1 )
-        
-        znode = np.copy( z_base )
-        xnode = np.zeros(znode.shape)
-        ynode = np.zeros(znode.shape)
-
-        towerBeginID = baseEndID
-        myz = np.zeros(len(z_tower)-1)
-        xnode = np.append(xnode, myz)
-        ynode = np.append(ynode, myz)
-        znode = np.append(znode, z_tower[1:] + freeboard )
-        towerEndID = xnode.size
-
-        # Create dummy node so that the tower isn't the last in a chain.
-        # This avoids a Frame3DD bug
-        dummyID = xnode.size + 1
-        xnode = np.append(xnode, 0.0)
-        ynode = np.append(ynode, 0.0)
-        znode = np.append(znode, znode[-1]+1.0 )
+            fairleadIdx = find_nearest(z_base, z_fairlead)
+            z_base[fairleadIdx] = z_fairlead
+        else:
+            fairleadIdx = find_nearest(z_ballast, z_fairlead)
+
+        # Node and element numbering only changes with the arrangement of the columns and pontoons
+        topo = self.get_topology((crossAttachFlag, lowerAttachFlag, upperAttachFlag, lowerRingFlag, upperRingFlag, outerCrossFlag),
+                                 ncolumn, z_base.size, z_tower.size, z_ballast.size, baseLowerIdx, baseUpperIdx, fairleadIdx)
+        baseLowerID, baseUpperID, baseEndID = topo.baseLowerID, topo.baseUpperID, topo.baseEndID
+        towerBeginID, towerEndID, dummyID   = topo.towerBeginID, topo.towerEndID, topo.dummyID
+        ballastLowerID, ballastUpperID      = topo.ballastLowerID, topo.ballastUpperID
+
+        # Base column, then tower
+        xnode, ynode, znode = topo.nodes['x'], topo.nodes['y'], topo.nodes['z']
+        znode[:baseEndID] = z_base
+        znode[towerBeginID:towerEndID] = z_tower[1:] + freeboard
+        znode[dummyID-1] = znode[towerEndID-1] + 1.0
         
         # Get x and y positions of surrounding ballast columns
-        ballastLowerID = []
-        ballastUpperID = []
         ballastx = R_semi * np.cos( np.linspace(0, 2*np.pi, ncolumn+1) )
         ballasty = R_semi * np.sin( np.linspace(0, 2*np.pi, ncolumn+1) )
         ballastx = ballastx[:-1]
         ballasty = ballasty[:-1]
 
-        # Add in ballast column nodes around the circle, make sure there is a node at the fairlead
-        idx = find_nearest(z_ballast, z_fairlead)
-        myones = np.ones(z_ballast.shape)
-        for k in xrange(ncolumn):
-            ballastLowerID.append( xnode.size + 1 )
-            fairleadID.append( xnode.size + idx + 1 )
-            xnode = np.append(xnode, ballastx[k]*myones)
-            ynode = np.append(ynode, ballasty[k]*myones)
-            znode = np.append(znode, z_ballast )
-            ballastUpperID.append( xnode.size )
+        # Add in ballast column nodes around the circle
+        nballast = z_ballast.size
+        inode = slice(dummyID, dummyID + ncolumn*nballast)
+        xnode[inode] = np.repeat(ballastx, nballast)
+        ynode[inode] = np.repeat(ballasty, nballast)
+        znode[inode] = np.tile(z_ballast, ncolumn)
 
         # Add nodes midway around outer ring for cross bracing
-        if outerCrossFlag and ncolumn > 0:
+        if topo.crossOuterLowerID.size > 0:
             crossx = 0.5*(ballastx + np.roll(ballastx,1))
             crossy = 0.5*(ballasty + np.roll(ballasty,1))
 
-            crossOuterLowerID = xnode.size + np.arange(ncolumn) + 1
-            xnode = np.append(xnode, crossx)
-            ynode = np.append(ynode, crossy)
-            znode = np.append(znode, z_ballast[0]*np.ones(ncolumn))
+            xnode[topo.crossOuterLowerID-1] = crossx
+            ynode[topo.crossOuterLowerID-1] = crossy
+            znode[topo.crossOuterLowerID-1] = z_ballast[0]
 
             #crossOuterUpperID = xnode.size + np.arange(ncolumn) + 1
             #xnode = np.append(xnode, crossx)
@@ -326,94 +776,28 @@ class FloatingFrame(Component):
             #znode = np.append(znode, z_ballast[-1]*np.ones(ncolumn))
 
         # Create Node Data object
-        nnode = 1 + np.arange(xnode.size)
-        rnode = np.zeros(xnode.shape)
-        nodes = frame3dd.NodeData(nnode, xnode, ynode, znode, rnode)
+        fsolver = self.frame_module
+        nodes = fsolver.NodeData(topo.nnode, xnode, ynode, znode, topo.rnode)
 
         
         # ---REACTIONS---
-        # Pin (3DOF) the nodes at the mooring connections.  Otherwise free
-        # Free=0, Rigid=1
-        rid = np.array(fairleadID)
-        Rx = Ry = Rz = Rxx = Ryy = Rzz = np.ones(rid.shape)
-        #if ncolumn > 0:
-        #    Rxx[1:] = Ryy[1:] = Rzz[1:] = 0.0
-        # First approach
-        # Pinned windward column lower node (first ballastLowerID)
-        #rid = ballastLowerID[0]
-        #Rx = Ry = Rz = Rxx = Ryy = Rzz = 1
-        # Rollers for other lower column nodes, restrict motion
-        #rid = ballastLowerID[1:]
-        #Rz = Rxx = Ryy = Rzz = 1
-
-        # Get reactions object from frame3dd
-        reactions = frame3dd.ReactionData(rid, Rx, Ry, Rz, Rxx, Ryy, Rzz, rigid=1)
+        rid       = topo.rid
+        reactions = topo.reactions
 
 
         # ---ELEMENTS / EDGES---
-        N1 = np.array([], dtype=np.int32)
-        N2 = np.array([], dtype=np.int32)
-        # Lower connection from central base column to ballast columns
-        if lowerAttachFlag:
-            lowerAttachEID = N1.size + 1
-            for k in xrange(ncolumn):
-                N1 = np.append(N1, baseLowerID )
-                N2 = np.append(N2, ballastLowerID[k] )
-        # Upper connection from central base column to ballast columns
-        if upperAttachFlag:
-            upperAttachEID = N1.size + 1
-            for k in xrange(ncolumn):
-                N1 = np.append(N1, baseUpperID )
-                N2 = np.append(N2, ballastUpperID[k] )
-        # Cross braces from lower central base column to upper ballast columns
+        elemBuf = topo.elements
+        N1, N2, Ax, As, Jx, I, S, C, modE, modG, roll, dens = [elemBuf[f] for f in ELEMENT_DTYPE.names]
+        lowerAttachEID, upperAttachEID, crossAttachEID = topo.lowerAttachEID, topo.upperAttachEID, topo.crossAttachEID
+        lowerRingEID, upperRingEID, outerCrossEID      = topo.lowerRingEID, topo.upperRingEID, topo.outerCrossEID
+        baseEID, towerEID, dummyEID, ballastEID        = topo.baseEID, topo.towerEID, topo.dummyEID, topo.ballastEID
         if crossAttachFlag:
-            crossAttachEID = N1.size + 1
-            for k in xrange(ncolumn):
-                N1 = np.append(N1, baseLowerID )
-                N2 = np.append(N2, ballastUpperID[k] )
             # Will be used later to convert from local member c.s. to global
             cross_angle = np.arctan( (z_attach_upper - z_attach_lower) / R_semi )
-        # Lower ring around ballast columns
-        if lowerRingFlag:
-            lowerRingEID = N1.size + 1
-            for k in xrange(ncolumn-1):
-                N1 = np.append(N1, ballastLowerID[k] )
-                N2 = np.append(N2, ballastLowerID[k+1] )
-            N1 = np.append(N1, ballastLowerID[0] )
-            N2 = np.append(N2, ballastLowerID[-1] )
-        # Upper ring around ballast columns
-        if upperRingFlag:
-            upperRingEID = N1.size + 1
-            for k in xrange(ncolumn-1):
-                N1 = np.append(N1, ballastUpperID[k] )
-                N2 = np.append(N2, ballastUpperID[k+1] )
-            N1 = np.append(N1, ballastUpperID[0] )
-            N2 = np.append(N2, ballastUpperID[-1] )
-        # Outer cross braces
-        if outerCrossFlag:
-            outerCrossEID = N1.size + 1
-            for k in xrange(ncolumn-1):
-                N1 = np.append(N1, crossOuterLowerID[k] )
-                N2 = np.append(N2, ballastUpperID[k] )
-                N1 = np.append(N1, crossOuterLowerID[k+1] )
-                N2 = np.append(N2, ballastUpperID[k] )
-            N1 = np.append(N1, crossOuterLowerID[-1] )
-            N2 = np.append(N2, ballastUpperID[-1] )
-            N1 = np.append(N1, crossOuterLowerID[0] )
-            N2 = np.append(N2, ballastUpperID[-1] )
         # TODO: Parameterize these for upper, lower, cross connections
         # Properties for the inner connectors
         mytube = Tube(2.0*R_od_pontoon, t_wall_pontoon)
-        Ax    = mytube.Area * np.ones(N1.shape)
-        As    = mytube.Asx  * np.ones(N1.shape)
-        Jx    = mytube.J0   * np.ones(N1.shape)
-        I     = mytube.Jxx  * np.ones(N1.shape)
-        S     = mytube.S    * np.ones(N1.shape)
-        C     = mytube.C    * np.ones(N1.shape)
-        modE  = E   * np.ones(N1.shape)
-        modG  = G   * np.ones(N1.shape)
-        roll  = 0.0 * np.ones(N1.shape)
-        dens  = rho * np.ones(N1.shape)
+        set_element_properties(elemBuf, slice(0, baseEID-1), mytube, E, G, rho)
 
         # Now mock up cylindrical columns as truss members even though long, slender assumption breaks down
         # Will set density = 0.0 so that we don't double count the mass
@@ -425,82 +809,31 @@ class FloatingFrame(Component):
         R_od_tower,_     = nodal2sectional( R_od_tower )
         t_wall_tower,_   = nodal2sectional( t_wall_tower )
         # Senu TODO: Make artificially more stiff?
-        baseEID = N1.size + 1
         mytube  = Tube(2.0*R_od_base, t_wall_base)
-        myrange = np.arange(R_od_base.size)
-        myones  = np.ones(myrange.shape)
-        mydens  = m_base / mytube.Area / np.diff(z_base) + eps
-        N1   = np.append(N1  , myrange + baseBeginID    )
-        N2   = np.append(N2  , myrange + baseBeginID + 1)
-        Ax   = np.append(Ax  , mytube.Area )
-        As   = np.append(As  , mytube.Asx )
-        Jx   = np.append(Jx  , mytube.J0 )
-        I    = np.append(I   , mytube.Jxx )
-        S    = np.append(S   , mytube.S )
-        C    = np.append(C   , mytube.C )
-        modE = np.append(modE, E*myones )
-        modG = np.append(modG, G*myones )
-        roll = np.append(roll, np.zeros(myones.shape) )
-        dens = np.append(dens, mydens )
+        set_element_properties(elemBuf, slice(baseEID-1, towerEID-1), mytube, E, G, m_base / mytube.Area / np.diff(z_base) + eps)
 
         # Rest of tower
-        towerEID = N1.size + 1
-        myrange = np.arange(R_od_tower.size)
-        myones  = np.ones(myrange.shape)
-        mydens  = m_tower / mytube.Area / np.diff(z_tower) + eps
-        N1   = np.append(N1  , myrange + towerBeginID    )
-        N2   = np.append(N2  , myrange + towerBeginID + 1)
-        Ax   = np.append(Ax  , mytube.Area )
-        As   = np.append(As  , mytube.Asx )
-        Jx   = np.append(Jx  , mytube.J0 )
-        I    = np.append(I   , mytube.Jxx )
-        S    = np.append(S   , mytube.S )
-        C    = np.append(C   , mytube.C )
-        modE = np.append(modE, E*myones )
-        modG = np.append(modG, G*myones )
-        roll = np.append(roll, np.zeros(myones.shape) )
-        dens = np.append(dens, mydens ) 
+        # TODO: Tower elements currently take the section properties of the base column
+        set_element_properties(elemBuf, slice(towerEID-1, dummyEID-1), mytube, E, G, m_tower / mytube.Area / np.diff(z_tower) + eps)
 
         # Dummy element
-        dummyEID = N1.size + 1
-        N1   = np.append(N1  , towerEndID )
-        N2   = np.append(N2  , dummyID )
-        Ax   = np.append(Ax  , Ax[-1] )
-        As   = np.append(As  , As[-1] )
-        Jx   = np.append(Jx  , Jx[-1] )
-        I    = np.append(I   , I[-1] )
-        S    = np.append(S   , S[-1] )
-        C    = np.append(C   , C[-1] )
-        modE = np.append(modE, 1e20 )
-        modG = np.append(modG, 1e20 )
-        roll = np.append(roll, 0.0 )
-        dens = np.append(dens, 1e-6 ) 
-        
-        ballastEID = []
+        for f in ['Ax', 'As', 'Jx', 'I', 'S', 'C']:
+            elemBuf[f][dummyEID-1] = elemBuf[f][dummyEID-2]
+        modE[dummyEID-1] = 1e20
+        modG[dummyEID-1] = 1e20
+        roll[dummyEID-1] = 0.0
+        dens[dummyEID-1] = 1e-6
+        
         mytube     = Tube(2.0*R_od_ballast, t_wall_ballast)
-        myrange    = np.arange(R_od_ballast.size)
-        myones     = np.ones(myrange.shape)
         mydens     = m_ballast / mytube.Area / np.diff(z_ballast) + eps
         for k in xrange(ncolumn):
-            ballastEID.append( N1.size + 1 )
-            
-            N1   = np.append(N1  , myrange + ballastLowerID[k]    )
-            N2   = np.append(N2  , myrange + ballastLowerID[k] + 1)
-            Ax   = np.append(Ax  , mytube.Area )
-            As   = np.append(As  , mytube.Asx )
-            Jx   = np.append(Jx  , mytube.J0 )
-            I    = np.append(I   , mytube.Jxx )
-            S    = np.append(S   , mytube.S )
-            C    = np.append(C   , mytube.C )
-            modE = np.append(modE, E*myones )
-            modG = np.append(modG, G*myones )
-            roll = np.append(roll, np.zeros(myones.shape) )
-            dens = np.append(dens, mydens ) # Mass added below
+            ielem = slice(ballastEID[k]-1, ballastEID[k]-1 + R_od_ballast.size)
+            set_element_properties(elemBuf, ielem, mytube, E, G, mydens) # Mass added below
 
 
         # ---Get element object from frame3dd---
-        nelem    = 1 + np.arange(N1.size)
-        elements = frame3dd.ElementData(nelem, N1, N2, Ax, As, As, Jx, I, I, modE, modG, roll, dens)
+        nelem    = topo.nelem
+        elements = fsolver.ElementData(nelem, N1, N2, Ax, As, As, Jx, I, I, modE, modG, roll, dens)
 
         # Store data for plotting, also handy for operations below
         plotMat = np.zeros((nelem.size, 3, 2))
@@ -515,10 +848,10 @@ class FloatingFrame(Component):
         shear = True               # 1: include shear deformation
         geom = False               # 1: include geometric stiffness
         dx = -1                    # x-axis increment for internal forces, -1 to skip
-        other = frame3dd.Options(shear, geom, dx)
+        other = fsolver.Options(shear, geom, dx)
 
         # Initialize frame3dd object
-        myframe = frame3dd.Frame(nodes, reactions, elements, other)
+        myframe = fsolver.Frame(nodes, reactions, elements, other)
 
         # Add in extra mass of rna
         inode   = np.array([towerEndID], dtype=np.int32) # rna
@@ -539,58 +872,33 @@ class FloatingFrame(Component):
         gx = 0.0
         gy = 0.0
         gz = -gravity
-        load = frame3dd.StaticLoadCase(gx, gy, gz)
 
-        # Wind + Wave loading in local base / ballast / tower c.s.
-        Px_base,    Py_base,    Pz_base    = params['base_column_Pz'], params['base_column_Py'], -params['base_column_Px']  # switch to local c.s.
-        Px_ballast, Py_ballast, Pz_ballast = params['auxiliary_column_Pz'], params['auxiliary_column_Py'], -params['auxiliary_column_Px']  # switch to local c.s.
-        Px_tower,   Py_tower,   Pz_tower   = params['tower_Pz'], params['tower_Py'], -params['tower_Px']  # switch to local c.s.
         epsOff = 1e-5
         # Get mass right- ballasts, stiffeners, tower, rna, etc.
         # Also account for buoyancy loads
-        # Also apply wind/wave loading as trapezoidal on each element
+        # Also apply wind/wave loading as trapezoidal on each element (per load case below)
         # NOTE: Loading is in local element coordinates 0-L, x is along element
+        # Fill the loads on all column elements into the preallocated buffer
+        nb, nt, nc = R_od_base.size, R_od_tower.size, R_od_ballast.size
+        loadBuf = topo.loads
+        EL, Ux, x1, x2, wx1, wx2, wy1, wy2, wz1, wz2 = [loadBuf[f] for f in LOAD_DTYPE.names]
         # Base
-        nrange  = np.arange(R_od_base.size, dtype=np.int32)
-        EL      = baseEID + nrange
-        Ux      = V_base * rhoWater * gravity / np.diff(z_base)
-        x1 = np.zeros(nrange.shape)
-        x2 = np.diff(z_base) - epsOff  # subtract small number b.c. of precision
-        wx1, wx2 = Px_base[:-1], Px_base[1:]
-        wy1, wy2 = Py_base[:-1], Py_base[1:]
-        wz1, wz2 = Pz_base[:-1], Pz_base[1:]
+        iload      = slice(0, nb)
+        Ux[iload]  = V_base * rhoWater * gravity / np.diff(z_base)
+        x2[iload]  = np.diff(z_base) - epsOff  # subtract small number b.c. of precision
         # Tower
-        nrange  = np.arange(R_od_tower.size, dtype=np.int32)
-        EL      = np.append(EL, towerEID + nrange)
-        Ux      = np.append(Ux, np.zeros(nrange.shape))
-        x1      = np.append(x1, np.zeros(nrange.shape))
-        x2      = np.append(x2, np.diff(z_tower) - epsOff)
-        wx1     = np.append(wx1, Px_tower[:-1])
-        wx2     = np.append(wx2, Px_tower[1:])
-        wy1     = np.append(wy1, Py_tower[:-1])
-        wy2     = np.append(wy2, Py_tower[1:])
-        wz1     = np.append(wz1, Pz_tower[:-1])
-        wz2     = np.append(wz2, Pz_tower[1:])
+        iload      = slice(nb, nb+nt)
+        x2[iload]  = np.diff(z_tower) - epsOff
         # Buoyancy- ballast columns
-        nrange  = np.arange(R_od_ballast.size, dtype=np.int32)
         for k in xrange(ncolumn):
-            EL      = np.append(EL, ballastEID[k] + nrange)
-            Ux      = np.append(Ux,  V_ballast * rhoWater * gravity / np.diff(z_ballast) )
-            x1      = np.append(x1, np.zeros(nrange.shape))
-            x2      = np.append(x2, np.diff(z_ballast) - epsOff)
-            wx1     = np.append(wx1, Px_ballast[:-1])
-            wx2     = np.append(wx2, Px_ballast[1:])
-            wy1     = np.append(wy1, Py_ballast[:-1])
-            wy2     = np.append(wy2, Py_ballast[1:])
-            wz1     = np.append(wz1, Pz_ballast[:-1])
-            wz2     = np.append(wz2, Pz_ballast[1:])
+            iload      = slice(nb+nt+k*nc, nb+nt+(k+1)*nc)
+            Ux[iload]  = V_ballast * rhoWater * gravity / np.diff(z_ballast)
+            x2[iload]  = np.diff(z_ballast) - epsOff
             
         # Add mass of base and ballast columns while we've already done the element enumeration
+        # Uniform loads are the same in every load case, so store them to be applied in the same sequence to each
         Uz = Uy = np.zeros(Ux.shape)
-        load.changeUniformLoads(EL, Ux, Uy, Uz)
-        xx1 = xy1 = xz1 = x1
-        xx2 = xy2 = xz2 = x2
-        load.changeTrapezoidalLoads(EL, xx1, xx2, wx1, wx2, xy1, xy2, wy1, wy2, xz1, xz2, wz1, wz2)
+        uniformLoads = [(EL, Ux, Uy, Uz)]
 
         # Buoyancy for fully submerged members
         # Note indices to elemL and elemCoG could include -1, but since there is assumed to be more than 1 column, this is not necessary
@@ -605,14 +913,14 @@ class FloatingFrame(Component):
                 F_truss += Frange * elemL[lowerAttachEID-1] * ncolumn
                 z_cb    += Frange * elemL[lowerAttachEID-1] * ncolumn * elemCoG[lowerAttachEID-1,:]
                 Ux = Uy = np.zeros(Uz.shape)
-                load.changeUniformLoads(EL, Ux, Uy, Uz)
+                uniformLoads.append((EL, Ux, Uy, Uz))
             if lowerRingFlag:
                 EL       = lowerRingEID + nrange
                 Uz       = Frange * np.ones(nrange.shape)
                 F_truss += Frange * elemL[lowerRingEID-1] * ncolumn
                 z_cb    += Frange * elemL[lowerRingEID-1] * ncolumn * elemCoG[lowerRingEID-1]
                 Ux = Uy = np.zeros(Uz.shape)
-                load.changeUniformLoads(EL, Ux, Uy, Uz)
+                uniformLoads.append((EL, Ux, Uy, Uz))
             if crossAttachFlag:
                 factor   = np.minimum(1.0, (0.0 - z_attach_lower) / (znode[ballastUpperID[0]-1] - z_attach_lower) )
                 EL       = crossAttachEID + nrange
@@ -621,7 +929,7 @@ class FloatingFrame(Component):
                 F_truss += factor * Frange * elemL[crossAttachEID-1] * ncolumn
                 z_cb    += factor * Frange * elemL[crossAttachEID-1] * ncolumn * elemCoG[crossAttachEID-1,:]
                 Uy = np.zeros(Uz.shape)
-                load.changeUniformLoads(EL, Ux, Uy, Uz)
+                uniformLoads.append((EL, Ux, Uy, Uz))
             if outerCrossFlag:
                 factor   = np.minimum(1.0, (0.0 - znode[baseLowerID-1]) / (znode[ballastUpperID[0]-1] - znode[baseLowerID-1]) )
                 # TODO: This one will take a little more math
@@ -638,38 +946,75 @@ class FloatingFrame(Component):
                 F_truss += Frange * elemL[upperAttachEID-1] * ncolumn
                 z_cb    += Frange * elemL[upperAttachEID-1] * ncolumn * elemCoG[upperAttachEID-1,:]
                 Ux = Uy = np.zeros(Uz.shape)
-                load.changeUniformLoads(EL, Ux, Uy, Uz)
+                uniformLoads.append((EL, Ux, Uy, Uz))
             if upperRingFlag:
                 EL       = upperRingEID + nrange
                 Uz       = Frange * np.ones(nrange.shape)
                 F_truss += Frange * elemL[upperRingEID-1] * ncolumn
                 z_cb    += Frange * elemL[upperRingEID-1] * ncolumn * elemCoG[upperRingEID-1,:]
                 Ux = Uy = np.zeros(Uz.shape)
-                load.changeUniformLoads(EL, Ux, Uy, Uz)
-
-        # Point loading for rotor thrust and wind loads at CG
-        # Note: extra momemt from mass accounted for below
-        nF  = np.array([ baseEndID ], dtype=np.int32)
-        Fx  = np.array([ F_rna[0] ])
-        Fy  = np.array([ F_rna[1] ])
-        Fz  = np.array([ F_rna[2] ])
-        Mxx = np.array([ M_rna[0] ])
-        Myy = np.array([ M_rna[1] ])
-        Mzz = np.array([ M_rna[2] ])
-        load.changePointLoads(nF, Fx, Fy, Fz, Mxx, Myy, Mzz)
-
-        # Store load case into frame 3dd object
-        myframe.addLoadCase(load)
+                uniformLoads.append((EL, Ux, Uy, Uz))
+
+        caseLoads = []
+        for case in cases:
+            load = fsolver.StaticLoadCase(gx, gy, gz)
+            for loads in uniformLoads:
+                load.changeUniformLoads(*loads)
+
+            # Wind + Wave loading in local base / ballast / tower c.s.
+            Px_base,    Py_base,    Pz_base    = case['base_column_Pz'], case['base_column_Py'], -case['base_column_Px']  # switch to local c.s.
+            Px_ballast, Py_ballast, Pz_ballast = case['auxiliary_column_Pz'], case['auxiliary_column_Py'], -case['auxiliary_column_Px']  # switch to local c.s.
+            Px_tower,   Py_tower,   Pz_tower   = case['tower_Pz'], case['tower_Py'], -case['tower_Px']  # switch to local c.s.
+            # Base
+            iload = slice(0, nb)
+            wx1[iload], wx2[iload] = Px_base[:-1], Px_base[1:]
+            wy1[iload], wy2[iload] = Py_base[:-1], Py_base[1:]
+            wz1[iload], wz2[iload] = Pz_base[:-1], Pz_base[1:]
+            # Tower
+            iload = slice(nb, nb+nt)
+            wx1[iload], wx2[iload] = Px_tower[:-1], Px_tower[1:]
+            wy1[iload], wy2[iload] = Py_tower[:-1], Py_tower[1:]
+            wz1[iload], wz2[iload] = Pz_tower[:-1], Pz_tower[1:]
+            # Ballast columns
+            for k in xrange(ncolumn):
+                iload = slice(nb+nt+k*nc, nb+nt+(k+1)*nc)
+                wx1[iload], wx2[iload] = Px_ballast[:-1], Px_ballast[1:]
+                wy1[iload], wy2[iload] = Py_ballast[:-1], Py_ballast[1:]
+                wz1[iload], wz2[iload] = Pz_ballast[:-1], Pz_ballast[1:]
+            xx1 = xy1 = xz1 = x1
+            xx2 = xy2 = xz2 = x2
+            load.changeTrapezoidalLoads(loadBuf['EL'], xx1, xx2, wx1, wx2, xy1, xy2, wy1, wy2, xz1, xz2, wz1, wz2)
+            if export or self.stress_stations > 1: caseLoads.append(loadBuf.copy())
+
+            # Point loading for rotor thrust and wind loads at CG
+            # Note: extra momemt from mass accounted for below
+            nF  = np.array([ baseEndID ], dtype=np.int32)
+            Fx  = np.array([ case['rna_force'][0] ])
+            Fy  = np.array([ case['rna_force'][1] ])
+            Fz  = np.array([ case['rna_force'][2] ])
+            Mxx = np.array([ case['rna_moment'][0] ])
+            Myy = np.array([ case['rna_moment'][1] ])
+            Mzz = np.array([ case['rna_moment'][2] ])
+            load.changePointLoads(nF, Fx, Fy, Fz, Mxx, Myy, Mzz)
+
+            # Store load case into frame 3dd object, all are solved together
+            myframe.addLoadCase(load)
 
 
         # ---DYNAMIC ANALYSIS---
-        nM = 6              # number of desired dynamic modes of vibration
-        Mmethod = 1         # 1: subspace Jacobi     2: Stodola
+        nM = self.nModes            # number of desired dynamic modes of vibration
+        Mmethod = self.modal_method # 1: subspace Jacobi     2: Stodola
         lump = 0            # 0: consistent mass ... 1: lumped mass matrix
         tol = 1e-5          # mode shape tolerance
         shift = 0.0         # shift value ... for unrestrained structures
-        
-        myframe.enableDynamics(nM, Mmethod, lump, tol, shift)
+
+        # Modes only depend on the mass and stiffness, so skip the eigen-solve if they are unchanged.
+        # Frame3DD only tallies the total mass in the modal analysis, so it is cached with the frequencies
+        modal_key = (topo, topo.nodes.tobytes(), elemBuf.tobytes(), float(m_rna),
+                     np.asarray(I_rna, dtype=np.float64).tobytes(), np.asarray(cg_rna, dtype=np.float64).tobytes())
+        modal_hit = self.modal_cache.get(modal_key)
+        if modal_hit is None:
+            myframe.enableDynamics(nM, Mmethod, lump, tol, shift)
 
         # ---DEBUGGING---
         #myframe.write('debug.3dd') # For debugging
@@ -678,13 +1023,14 @@ class FloatingFrame(Component):
         try:
             displacements, forces, reactions, internalForces, mass, modal = myframe.run()
         except:
-            bad_input()
+            bad_input('frame_solve')
             return
             
         # --OUTPUTS--
         nE    = nelem.size
         iCase = 0
         unknowns['plot_matrix'] = plotMat
+        unknowns['frame_failure'] = ''
         
         if ncolumn > 0:
             # Buoyancy assembly from incremental calculations above
@@ -706,15 +1052,17 @@ class FloatingFrame(Component):
             V_pontoon = z_cb = m_pontoon = 0.0
             cg_pontoon = np.zeros(3)
             
-        # natural frequncies
-        unknowns['structural_frequencies'] = np.array( modal.freq )
-
-        # deflections due to loading (from cylinder top and wind/wave loads)
-        unknowns['top_deflection'] = displacements.dx[iCase, towerEndID-1]  # in yaw-aligned direction
+        # natural frequncies and total mass
+        if modal_hit is None:
+            freq, m_structure = np.array( modal.freq ), mass.total_mass
+            self.modal_cache.put(modal_key, (freq.copy(), m_structure))
+        else:
+            freq, m_structure = modal_hit
+        unknowns['structural_frequencies'] = freq.copy()
 
         # Summary of mass and volumes
         unknowns['substructure_mass']  = m_pontoon + m_base.sum() + ncolumn*m_ballast.sum()
-        unknowns['structural_mass']    = mass.total_mass
+        unknowns['structural_mass']    = m_structure
         unknowns['total_displacement'] = V_base.sum() + ncolumn*V_ballast.sum() + V_pontoon
 
         # Find cb (center of buoyancy) for whole system
@@ -725,65 +1073,132 @@ class FloatingFrame(Component):
         unknowns['substructure_center_of_mass'] = (ncolumn*m_ballast.sum()*cg_ballast + m_base.sum()*cg_base +
                                                    m_pontoon*cg_pontoon) / unknowns['substructure_mass']
         unknowns['center_of_mass'] = (m_rna*cg_rna + m_tower.sum()*cg_tower +
-                                      unknowns['substructure_mass']*unknowns['substructure_center_of_mass']) / mass.total_mass
-        Fsum = np.zeros(3)
-        Msum = np.zeros(3)
-        for k in xrange(len(rid)):
-            idx = reactions.node[iCase, k] - 1
-            pk  = np.array([xnode[idx], ynode[idx], znode[idx]])
-            rk  = pk - unknowns['center_of_mass']
-            F   = -1*np.array([reactions.Fx[iCase, k], reactions.Fy[iCase, k], reactions.Fz[iCase, k]])
-            M   = -1*np.array([reactions.Mxx[iCase, k], reactions.Myy[iCase, k], reactions.Mzz[iCase, k]])
-            Fsum += F
-            Msum += M + np.cross(rk,F)
-        unknowns['total_force'] = -1.0 * np.array([reactions.Fx.sum(), reactions.Fy.sum(), reactions.Fz.sum()])
-        unknowns['total_moment'] = -1.0 * np.array([reactions.Mxx.sum(), reactions.Myy.sum(), reactions.Mzz.sum()])
-
-        # shear and bending (convert from local to global c.s.)
-        Nx = forces.Nx[iCase, 1::2]
-        Vy = forces.Vy[iCase, 1::2]
-        Vz = forces.Vz[iCase, 1::2]
-
-        Tx = forces.Txx[iCase, 1::2]
-        My = forces.Myy[iCase, 1::2]
-        Mz = forces.Mzz[iCase, 1::2]
+                                      unknowns['substructure_mass']*unknowns['substructure_center_of_mass']) / m_structure
+
+        # Net reaction forces and moments in every load case, with the moments also transferred to the center of mass
+        ncase = len(cases)
+        ridx  = reactions.node - 1
+        rk    = np.dstack([xnode[ridx], ynode[ridx], znode[ridx]]) - unknowns['center_of_mass']
+        F     = -1*np.dstack([reactions.Fx, reactions.Fy, reactions.Fz])
+        M     = -1*np.dstack([reactions.Mxx, reactions.Myy, reactions.Mzz])
+        Fsum  = F.sum(axis=1)
+        Msum  = M.sum(axis=1)
+        unknowns['total_force']  = Fsum[0,:]
+        unknowns['total_moment'] = Msum[0,:]
+        unknowns['total_force_cases']  = Fsum
+        unknowns['total_moment_cases'] = Msum
+        unknowns['center_of_mass_moment_cases'] = Msum + np.cross(rk, F).sum(axis=1)
+
+        # deflections due to loading (from cylinder top and wind/wave loads)
+        top_deflection = displacements.dx[:ncase, towerEndID-1]  # in yaw-aligned direction
+
+        # shear and bending (convert from local to global c.s.) for all load cases at once, as (case, element, station)
+        if self.stress_stations == 1:
+            Nx = forces.Nx[:ncase, 1::2, np.newaxis]
+            Vy = forces.Vy[:ncase, 1::2, np.newaxis]
+            Vz = forces.Vz[:ncase, 1::2, np.newaxis]
+
+            Tx = forces.Txx[:ncase, 1::2, np.newaxis]
+            My = forces.Myy[:ncase, 1::2, np.newaxis]
+            Mz = forces.Mzz[:ncase, 1::2, np.newaxis]
+        else:
+            # Recover internal forces along the elements from the N1 end forces and the loads applied above:
+            # self weight, the uniform loads (changeUniformLoads replaces earlier ones, so only the last set applies),
+            # and the trapezoidal loads of each load case
+            Q1   = np.dstack([forces.Nx[:ncase, 0::2], forces.Vy[:ncase, 0::2], forces.Vz[:ncase, 0::2],
+                              forces.Txx[:ncase, 0::2], forces.Myy[:ncase, 0::2], forces.Mzz[:ncase, 0::2]])
+            zero = np.zeros((1, nE, 3))
+            full = np.tile(elemL[np.newaxis,:,np.newaxis], (1, 1, 3))
+            Tloc = sparse_frame.rotation_matrices(xnode, ynode, znode, N1, N2, roll)
+            wg   = ((dens*Ax)[:,np.newaxis] * np.dot(Tloc, np.array([gx, gy, gz])))[np.newaxis,:,:]
+            EL, Ux, Uy, Uz = uniformLoads[-1]
+            wu   = np.zeros((1, nE, 3))
+            wu[0, np.asarray(EL)-1, :] = np.c_[Ux, Uy, Uz]
+
+            bufs = np.array(caseLoads)
+            iel  = bufs['EL'][0] - 1
+            xt1, xt2, wt1, wt2 = [np.zeros((ncase, nE, 3)) for k in xrange(4)]
+            xt1[:,iel,:] = bufs['x1'][:,:,np.newaxis]
+            xt2[:,iel,:] = bufs['x2'][:,:,np.newaxis]
+            wt1[:,iel,:] = np.dstack([bufs['wx1'], bufs['wy1'], bufs['wz1']])
+            wt2[:,iel,:] = np.dstack([bufs['wx2'], bufs['wy2'], bufs['wz2']])
+
+            stations = np.linspace(0.0, 1.0, self.stress_stations)
+            Fint = element_internal_forces(Q1, elemL, stations, [(zero, full, wg, wg), (zero, full, wu, wu), (xt1, xt2, wt1, wt2)])
+            Nx, Vy, Vz, Tx, My, Mz = [Fint[:,:,:,k] for k in xrange(6)]
 
         # Compute axial and shear stresses in elements given Frame3DD outputs and some geomtry data
         # Method comes from Section 7.14 of Frame3DD documentation
         # http://svn.code.sourceforge.net/p/frame3dd/code/trunk/doc/Frame3DD-manual.html#structuralmodeling
         M = np.sqrt(My*My + Mz*Mz)
-        sigma_ax = Nx/Ax - M/S
-        sigma_sh = np.sqrt(Vy*Vy + Vz*Vz)/As + Tx/C
+        sigma_ax = Nx/Ax[:,np.newaxis] - M/S[:,np.newaxis]
+        sigma_sh = np.sqrt(Vy*Vy + Vz*Vz)/As[:,np.newaxis] + Tx/C[:,np.newaxis]
+        nS = sigma_ax.shape[2]
 
         # Extract pontoon for stress check
-        idx  = range(baseEID-1)
-        npon = len(idx)
-        if len(idx) > 0:
-            qdyn_pontoon = np.max( np.abs( np.r_[params['base_column_qdyn'], params['auxiliary_column_qdyn']] ) )
-            sigma_ax_pon = sigma_ax[idx]
-            sigma_sh_pon = sigma_sh[idx]
-            sigma_h_pon  = util.hoopStress(2*R_od_pontoon, t_wall_pontoon, qdyn_pontoon) * np.ones(sigma_ax_pon.shape)
-
-            unknowns['pontoon_stress'][:npon] = util.vonMisesStressUtilization(sigma_ax_pon, sigma_h_pon, sigma_sh_pon,
-                                                                               gamma_f*gamma_m*gamma_n, sigma_y)
+        npon = baseEID-1
+        pontoon_stress = np.zeros((ncase, unknowns['pontoon_stress'].size))
+        if npon > 0:
+            qdyn_pontoon = np.array([np.max( np.abs( np.r_[case['base_column_qdyn'], case['auxiliary_column_qdyn']] ) )
+                                     for case in cases])
+            sigma_ax_pon = sigma_ax[:,:npon]
+            sigma_sh_pon = sigma_sh[:,:npon]
+            sigma_h_pon  = util.hoopStress(2*R_od_pontoon, t_wall_pontoon, qdyn_pontoon[:,np.newaxis,np.newaxis]) * np.ones(sigma_ax_pon.shape)
+
+            pontoon_stress[:,:npon] = util.vonMisesStressUtilization(sigma_ax_pon, sigma_h_pon, sigma_sh_pon,
+                                                                     gamma_f*gamma_m*gamma_n, sigma_y).max(axis=2)
         
         # Extract tower for Eurocode checks
-        idx = towerEID-1 + np.arange(R_od_tower.size, dtype=np.int32)
-        L_reinforced   = params['tower_buckling_length'] * np.ones(idx.shape)
-        sigma_ax_tower = sigma_ax[idx]
-        sigma_sh_tower = sigma_sh[idx]
-        qdyn_tower,_   = nodal2sectional( params['tower_qdyn'] )
-        sigma_h_tower  = util.hoopStressEurocode(z_tower, 2*R_od_tower, t_wall_tower, L_reinforced, qdyn_tower)
+        itower = towerEID-1 + np.arange(R_od_tower.size, dtype=np.int32)
+        L_reinforced   = params['tower_buckling_length'] * np.ones(itower.shape)
+        sigma_ax_tower = sigma_ax[:,itower]
+        sigma_sh_tower = sigma_sh[:,itower]
+        qdyn_tower     = np.array([nodal2sectional( case['tower_qdyn'] )[0] for case in cases])
+        sigma_h_tower  = util.hoopStressEurocode(z_tower, 2*R_od_tower, t_wall_tower, L_reinforced, qdyn_tower)[:,:,np.newaxis] * np.ones(sigma_ax_tower.shape)
+
+        tower_stress = util.vonMisesStressUtilization(sigma_ax_tower, sigma_h_tower, sigma_sh_tower,
+                                                      gamma_f*gamma_m*gamma_n, sigma_y).max(axis=2)
+
+        # Shell buckling is evaluated section by section, so stack the load cases and stations end to end
+        sigma_y = sigma_y * np.ones(itower.shape)
+        tile    = lambda x: np.tile(np.repeat(x, nS), ncase)
+        tower_shell_buckling = util.shellBucklingEurocode(tile(2*R_od_tower), tile(t_wall_tower), sigma_ax_tower.flatten(),
+                                                          sigma_h_tower.flatten(), sigma_sh_tower.flatten(),
+                                                          tile(L_reinforced), tile(modE[itower]), tile(sigma_y),
+                                                          gamma_f, gamma_b).reshape((ncase, itower.size, nS)).max(axis=2)
 
-        unknowns['tower_stress'] = util.vonMisesStressUtilization(sigma_ax_tower, sigma_h_tower, sigma_sh_tower,
-                                                                  gamma_f*gamma_m*gamma_n, sigma_y)
+        tower_height = z_tower[-1] - z_tower[0]
+        col = lambda x: x[:,np.newaxis]
+        tower_global_buckling = util.bucklingGL(col(2*R_od_tower), col(t_wall_tower), Nx[:,itower], M[:,itower], tower_height,
+                                                col(modE[itower]), col(sigma_y), gamma_f, gamma_b).max(axis=2)
+
+        # Peak over the frame elements overlapping each tower section
+        if self.nFrame != self.nFull:
+            peak = lambda x: np.where(self.frame_overlap[np.newaxis,:,:], x[:,np.newaxis,:], -np.inf).max(axis=2)
+            tower_stress, tower_shell_buckling, tower_global_buckling = [peak(x) for x in [tower_stress, tower_shell_buckling,
+                                                                                            tower_global_buckling]]
+
+        # Report the first load case, each load case, and the envelope across them
+        unknowns['top_deflection'] = top_deflection[0]
+        if npon > 0: unknowns['pontoon_stress'][:npon] = pontoon_stress[0,:npon]
+        unknowns['tower_stress']          = tower_stress[0,:]
+        unknowns['tower_shell_buckling']  = tower_shell_buckling[0,:]
+        unknowns['tower_global_buckling'] = tower_global_buckling[0,:]
+        
+        unknowns['top_deflection_cases']        = top_deflection
+        unknowns['pontoon_stress_cases']        = pontoon_stress
+        unknowns['tower_stress_cases']          = tower_stress
+        unknowns['tower_shell_buckling_cases']  = tower_shell_buckling
+        unknowns['tower_global_buckling_cases'] = tower_global_buckling
 
-        sigma_y = sigma_y * np.ones(idx.shape)
-        unknowns['tower_shell_buckling'] = util.shellBucklingEurocode(2*R_od_tower, t_wall_tower, sigma_ax_tower, sigma_h_tower, sigma_sh_tower,
-                                                                      L_reinforced, modE[idx], sigma_y, gamma_f, gamma_b)
+        unknowns['pontoon_stress_envelope']        = pontoon_stress.max(axis=0)
+        unknowns['tower_stress_envelope']          = tower_stress.max(axis=0)
+        unknowns['tower_shell_buckling_envelope']  = tower_shell_buckling.max(axis=0)
+        unknowns['tower_global_buckling_envelope'] = tower_global_buckling.max(axis=0)
+
+        if export:
+            self.export_frame(params, unknowns, topo, uniformLoads, caseLoads, cases, (displacements, forces, reactions))
 
-        tower_height = z_tower[-1] - z_tower[0]
-        unknowns['tower_global_buckling'] = util.bucklingGL(2*R_od_tower, t_wall_tower, Nx[idx], M[idx], tower_height, modE[idx], sigma_y, gamma_f, gamma_b)
         # TODO: FATIGUE
         # Base and ballast columns get API stress/buckling checked in Column Group because that takes into account stiffeners
 
@@ -822,7 +1237,8 @@ class TrussIntegerToBoolean(Component):
 
 class FloatingLoading(Group):
 
-    def __init__(self, nSection, nFull):
+    def __init__(self, nSection, nFull, nModes=6, modal_method=1, modal_cache_size=0, frame_solver='frame3dd',
+                 export_path=None, export_interval=1, stress_stations=1, nFrame=None):
         super(FloatingLoading, self).__init__()
         
         # Independent variables that are unique to TowerSE
@@ -838,12 +1254,14 @@ class FloatingLoading(Group):
         self.add('upper_ring_pontoons_int',        IndepVarComp('upper_ring_pontoons_int', 1), promotes=['*'])
         self.add('pontoon_cost_rate',          IndepVarComp('pontoon_cost_rate', 0.0), promotes=['*'])
         self.add('connection_ratio_max',       IndepVarComp('connection_ratio_max', 0.0), promotes=['*'])
+        self.add('load_cases',                 IndepVarComp('load_cases', [], pass_by_obj=True), promotes=['*'])
 
         # All the components
         self.add('wind', PowerWind(nFull), promotes=['z0','Uref','shearExp','zref'])
         self.add('windLoads', CylinderWindDrag(nFull), promotes=['cd_usr','beta'])
         self.add('intbool', TrussIntegerToBoolean(), promotes=['*'])
-        self.add('frame', FloatingFrame(nFull), promotes=['*'])
+        self.add('frame', FloatingFrame(nFull, nModes, modal_method, modal_cache_size, frame_solver,
+                                            export_path, export_interval, stress_stations, nFrame), promotes=['*'])
         
         # Connections for geometry and mass
         self.connect('wind.z', ['windLoads.z', 'tower_z_full'])
@@ -0,0 +1,30 @@
+"""
+Batched moment of inertia bookkeeping shared by the FloatingSE components.  Inertias are 6-vectors in the same
+[xx, yy, zz, xy, xz, yz] order as commonse.utilities.unassembleI, so the results can be added directly to the
+other inertia outputs.
+"""
+import numpy as np
+
+
+def parallelAxisI(m, I_cg, R):
+    """Sums the moments of inertia of point-like bodies about a common reference point with the parallel axis theorem,
+    I = sum_k I_cg[k] + m[k]*(R[k].R[k] * eye(3) - R[k] x R[k])
+
+    INPUTS:
+    ----------
+    m    : masses of the bodies, scalar or size n
+    I_cg : moments of inertia of the bodies about their own centers of mass, 6-vector (for every body) or (n,6) array
+    R    : offsets of the centers of mass from the reference point, 3-vector or (n,3) array
+
+    OUTPUTS  : summed moment of inertia 6-vector about the reference point
+    """
+    R    = np.atleast_2d( np.asarray(R, dtype=np.float64) )
+    m    = np.broadcast_to(m, R.shape[:1])
+    I_cg = np.broadcast_to(I_cg, R.shape[:1] + (6,))
+
+    # Mass weighted outer product sum, whose trace is the sum of m*R.R
+    S = np.einsum('n,ni,nj->ij', m, R, R)
+    I = np.sum(I_cg, axis=0)
+    I[:3] += np.trace(S) - np.diag(S)
+    I[3:] -= S[[0, 0, 1], [1, 2, 2]]
+    return I
@@ -2,21 +2,253 @@ from openmdao.api import Component
 import numpy as np
 import os
 import sys
+import copy
+import multiprocessing
+from collections import OrderedDict
 from pymap import pyMAP
+from catenary import CatenaryMooring, mooring_stiffness, CB_DEFAULT
+from result_cache import ResultCache
 
 from commonse import gravity
 from commonse import Enum
 
 Anchor    = Enum('DRAGEMBEDMENT SUCTIONPILE')
 
+# Registry of mooring line type regressions as a function of line diameter, D (m).
+# Minimum breaking load is scale*max(1, c0 + c1*D + c2*D^2) and all other properties are coefficient*D^2.
+# TODO: Costs per unit length are not synced with new input sources
+LINE_TYPES      = ['CHAIN', 'NYLON', 'POLYESTER', 'FIBER', 'IWRC']
+LINE_PROPERTIES = ['min_break_load', 'wet_mass_per_length', 'axial_stiffness', 'area', 'cost_per_length']
+LINE_TABLE      = np.array([
+    # MBL scale  MBL c0                MBL c1               MBL c2     MBL floor  wet mass   EA       area                   cost/length
+    # MBL = scale*max(floor, c0 + c1*D + c2*D^2), where only chain has a floor (0 leaves the D^2 fits unchanged)
+    # Chain uses a linear fit to the MBL = 2.74e7*D^2*(44-80D) fit becuase it is poorly conditioned for optimization
+    # Commented cost fits: chain 0.58*1e-3*MBL/g - 87.6, nylon and polyester 0.42059603*1e-3*MBL/g + 109.5,
+    # fiber 0.53676471*1e-3*MBL/g, iwrc 0.33*1e-3*MBL/g + 139.5
+    [1e3,       -5445.2957034820683,  176972.68498888266,  0.0,       1.0,       19.9e3,    8.54e10, 2.0*0.25*np.pi,        3.415e4    ], # CHAIN
+    [1e3,        0.0,                 0.0,                 139357.0,  0.0,       0.6476e3,  1.18e8,  0.25*np.pi,            3.415e4    ], # NYLON
+    [1e3,        0.0,                 0.0,                 170466.0,  0.0,       0.7978e3,  1.09e9,  0.25*np.pi,            3.415e4    ], # POLYESTER
+    [1e3,        0.0,                 0.0,                 584175.0,  0.0,       3.6109e3,  3.67e10, 0.455*0.25*np.pi,      2.0*6.32e4 ], # FIBER
+    [1e3,        0.0,                 0.0,                 633358.0,  0.0,       3.9897e3,  4.04e10, 0.455*0.25*np.pi,      6.32e4     ], # IWRC
+])
+
+
+def line_type_index(line_type):
+    """Row index into LINE_TABLE for (an array of) line type names, case insensitive"""
+    names = np.char.upper( np.asarray(line_type).astype(str) )
+    index = np.zeros(names.shape, dtype=np.int_)
+    valid = np.zeros(names.shape, dtype=np.bool_)
+    for k,name in enumerate(LINE_TYPES):
+        index = np.where(names == name, k, index)
+        valid = np.logical_or(valid, names == name)
+    if not np.all(valid):
+        raise ValueError('Available line types are: chain nylon polyester fiber iwrc')
+    return index
+
+
+def mooring_line_properties(diameter, line_type):
+    """Evaluates the line type regressions for arrays of diameters and line types in one vectorized call.
+    Can be used independently of OpenMDAO to screen many candidate lines.
+    
+    INPUTS:
+    ----------
+    diameter  : line diameter(s) (m)
+    line_type : line type name(s), chain nylon polyester fiber or iwrc (broadcast against diameter)
+    
+    OUTPUTS  : dictionary of min_break_load (N), wet_mass_per_length (kg/m), axial_stiffness (N),
+               area (m^2), and cost_per_length (USD/m) arrays
+    """
+    D     = np.asarray(diameter, dtype=np.float64)
+    coeff = LINE_TABLE[line_type_index(line_type)]
+    D, _  = np.broadcast_arrays(D, coeff[...,0])
+    coeff = coeff * np.ones(D.shape + (1,))
+    D2    = D**2
+    props = {}
+    mbl_fit = coeff[...,1] + coeff[...,2]*D + coeff[...,3]*D2
+    props['min_break_load']      = coeff[...,0]*np.where(coeff[...,4] > 0.0, np.maximum(coeff[...,4], mbl_fit), mbl_fit)
+    props['wet_mass_per_length'] = coeff[...,5] * D2
+    props['axial_stiffness']     = coeff[...,6] * D2
+    props['area']                = coeff[...,7] * D2
+    props['cost_per_length']     = coeff[...,8] * D2
+    return props
+
+
+def anchor_cost_rate(min_break_load, anchor_type):
+    """Cost of a single anchor for arrays of line breaking loads and anchor types
+    
+    INPUTS:
+    ----------
+    min_break_load : minimum breaking load of line (N)
+    anchor_type    : DRAGEMBEDMENT or SUCTIONPILE, as names or Anchor enum values (broadcast against min_break_load)
+    
+    OUTPUTS  : anchor cost (USD)
+    """
+    drag = is_drag_embedment(anchor_type)
+    mbl  = np.asarray(min_break_load, dtype=np.float64)
+    return np.where(drag, 1e-3 * mbl / gravity / 20*2000, 150000.* np.sqrt(1e-3*mbl/gravity/1250.))
+
+
+def is_drag_embedment(anchor_type):
+    """True for drag embedment anchors and False for suction piles, for (arrays of) names or Anchor enum values"""
+    atype   = np.vectorize(lambda a: Anchor[a.upper()] if hasattr(a, 'upper') else a, otypes=[object])(anchor_type)
+    drag    = (atype == Anchor['DRAGEMBEDMENT'])
+    suction = (atype == Anchor['SUCTIONPILE'])
+    if not np.all(np.logical_or(drag, suction)):
+        raise ValueError('Anchor Type must be DRAGEMBEDMENT or SUCTIONPILE')
+    return drag
+
+
+def mooring_system_cost(diameter, line_type, anchor_type, number_of_mooring_lines, mooring_length,
+                        drag_embedment_extra_length=0.0, mooring_cost_rate=1.0):
+    """Anchor and total mooring cost for arrays of line diameters, line types, anchor types, and line counts
+    without solving for the line tensions.  All inputs are broadcast against each other.
+    
+    INPUTS:
+    ----------
+    diameter                    : line diameter (m)
+    line_type                   : line type name
+    anchor_type                 : DRAGEMBEDMENT or SUCTIONPILE
+    number_of_mooring_lines     : number of mooring lines
+    mooring_length              : unstretched length of each line (m)
+    drag_embedment_extra_length : extra line length needed by drag embedment anchors (m)
+    mooring_cost_rate           : miscellaneous cost factor
+    
+    OUTPUTS  : min_break_load (N), anchor_cost (USD), and mooring_cost (USD) arrays
+    """
+    props  = mooring_line_properties(diameter, line_type)
+    mbl    = props['min_break_load']
+    anchor = anchor_cost_rate(mbl, anchor_type)
+    extra  = np.where(is_drag_embedment(anchor_type), drag_embedment_extra_length, 0.0)
+    nlines = np.asarray(number_of_mooring_lines, dtype=np.float64)
+    anchor_total = anchor*nlines
+    legs_total   = nlines * props['cost_per_length'] * (mooring_length + extra)
+    return mbl, anchor_total, mooring_cost_rate*(legs_total + anchor_total)
+
+# Inputs that determine the outputs of MapMooring.set_properties and MapMooring.runMAP
+PROPERTY_INPUTS = ['mooring_diameter', 'mooring_type']
+MAP_INPUTS      = ['water_density', 'water_depth', 'fairlead', 'fairlead_radius', 'anchor_radius', 'scope_ratio',
+                   'mooring_diameter', 'number_of_mooring_lines', 'mooring_type', 'max_offset', 'max_heel', 'gamma']
+# Outputs set by MapMooring.runMAP
+MAP_OUTPUTS     = ['mooring_stiffness', 'vertical_load', 'mooring_effective_mass', 'plot_matrix',
+                   'max_heel_restoring_force', 'max_offset_restoring_force', 'axial_unity']
+
+
+def make_key(params, names):
+    """Hashable key of the values of params listed in names"""
+    key = []
+    for k in names:
+        val = params[k]
+        key.append( val.lower() if hasattr(val, 'lower') else float(val) )
+    return tuple(key)
+
+
+def map_fairlead_forces(mymap, nlines, displacements):
+    """Displaces a pyMAP vessel to each of the requested positions and collects the fairlead force in every line"""
+    forces = np.zeros((len(displacements), nlines, 3))
+    for i,disp in enumerate(displacements):
+        mymap.displace_vessel(*disp)
+        mymap.update_states(0.0, 0)
+        for k in xrange(nlines):
+            forces[i,k,:] = mymap.get_fairlead_force_3d(k)
+    return forces
+
+
+def map_worker(args):
+    """Solves a set of vessel displacements with a separate MAP++ instance built from an input file,
+    for use by worker processes.
+    
+    INPUTS:
+    ----------
+    args : tuple of (input file list, water depth, water density, number of lines, list of displacements)
+    
+    OUTPUTS  : fairlead forces as array of size (number of displacements, nlines, 3)
+    """
+    finput, waterDepth, rhoWater, nlines, displacements = args
+    mymap = pyMAP( )
+    mymap.map_set_sea_depth(waterDepth)
+    mymap.map_set_gravity(gravity)
+    mymap.map_set_sea_density(rhoWater)
+    mymap.read_list_input(finput)
+    mymap.init( )
+    forces = map_fairlead_forces(mymap, nlines, displacements)
+    mymap.end()
+    return forces
+
+
+def golden_section(func, a, b, tol):
+    """Minimizes a scalar function of one variable on the interval [a, b] by golden-section search
+
+    INPUTS:
+    ----------
+    func : function to minimize
+    a    : lower bound of the interval
+    b    : upper bound of the interval
+    tol  : width of the final bracketing interval
+
+    OUTPUTS  : abscissa of the minimum
+    """
+    invphi = 0.5 * (np.sqrt(5.0) - 1.0)
+    c  = b - invphi*(b - a)
+    d  = a + invphi*(b - a)
+    fc = func(c)
+    fd = func(d)
+    while (b - a) > tol:
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c  = b - invphi*(b - a)
+            fc = func(c)
+        else:
+            a, c, fc = c, d, fd
+            d  = a + invphi*(b - a)
+            fd = func(d)
+    return 0.5*(a + b)
+
+
 class MapMooring(Component):
     """
     OpenMDAO Component class for mooring system attached to sub-structure of floating offshore wind turbines.
     Should be tightly coupled with Spar class for full system representation.
     """
 
-    def __init__(self):
+    def __init__(self, sweep='symmetric', solver='map', stiffness='linear',
+                 cache_size=16, cache_eviction='lru', n_workers=0, executor=None, heading_tol=0.1,
+                 lazy_plot=False):
         super(MapMooring,self).__init__()
+
+        # Options local to the class and not OpenMDAO
+        # sweep: 'full' solves every offset heading, 'symmetric' exploits the evenly repeated line layout,
+        #        'adaptive' searches a coarse grid then refines the worst headings to within heading_tol (degrees)
+        # solver: 'map' uses MAP++, 'catenary' uses the native elastic catenary equations
+        # stiffness: 'linear' (default) for finite differences of the solver, 'analytic' from line tangent stiffness,
+        #            'diagonal' for only the diagonal of the analytic matrix
+        # cache_size, cache_eviction: number of designs to remember and eviction policy (lru or fifo), size 0 disables
+        # n_workers: split MAP++ heading cases across this many worker processes (0 or 1 runs serially)
+        # executor: optional executor/pool with a map method to use for the workers (default is a multiprocessing pool)
+        # lazy_plot: skip the line shapes in plot_matrix during analysis, they are then computed by get_plot_matrix on request
+        if not sweep in ['full', 'symmetric', 'adaptive']:
+            raise ValueError('Available sweep modes are: full symmetric adaptive')
+        if heading_tol <= 0.0:
+            raise ValueError('Heading tolerance must be positive')
+        if not solver in ['map', 'catenary']:
+            raise ValueError('Available solvers are: map catenary')
+        if not stiffness in ['analytic', 'diagonal', 'linear']:
+            raise ValueError('Available stiffness modes are: analytic diagonal linear')
+        self.sweep         = sweep
+        self.heading_tol   = heading_tol
+        self.solver        = solver
+        self.stiffness     = stiffness
+        self.n_workers     = n_workers
+        self.executor      = executor
+        self.own_executor  = False
+        self.lazy_plot     = lazy_plot
+        self.map_outputs   = [k for k in MAP_OUTPUTS if not (lazy_plot and k == 'plot_matrix')]
+
+        # Caches of line properties and MAP results, keyed by the inputs they depend on
+        self.properties_cache = ResultCache(cache_size, cache_eviction)
+        self.map_cache        = ResultCache(cache_size, cache_eviction)
+
+        # Environment of the last MAP++ input file, for the worker processes
+        self.map_environment = None
     
         # Variables local to the class and not OpenMDAO
         self.scope               = None
@@ -26,6 +258,12 @@ class MapMooring(Component):
         self.area                = None
         self.cost_per_length     = None
         self.finput              = None
+        self.plot_params         = None
+
+        # Results of the offset sweep (tension and restoring force per angle and per line)
+        self.offset_angles          = None
+        self.offset_tension         = None
+        self.offset_restoring_force = None
 
         # Environment
         self.add_param('water_density', val=0.0, units='kg/m**3', desc='density of water')
@@ -90,18 +328,52 @@ class MapMooring(Component):
         """
 
         # Set characteristics based on regressions / empirical data
-        self.set_properties(params)
+        key    = make_key(params, PROPERTY_INPUTS)
+        cached = self.properties_cache.get(key)
+        if cached is None:
+            self.set_properties(params)
+            self.properties_cache.put(key, (self.min_break_load, self.wet_mass_per_length, self.axial_stiffness,
+                                            self.area, self.cost_per_length))
+        else:
+            (self.min_break_load, self.wet_mass_per_length, self.axial_stiffness,
+             self.area, self.cost_per_length) = cached
 
         # Set geometry profile
         self.set_geometry(params, unknowns)
 
+        # Remember the design so that line shapes can be computed later on request
+        self.plot_params = dict([(k, params[k]) for k in MAP_INPUTS])
+
         # Write MAP input file and analyze the system at every angle
-        self.runMAP(params, unknowns)
+        key    = make_key(params, MAP_INPUTS)
+        cached = self.map_cache.get(key)
+        if cached is None:
+            self.runMAP(params, unknowns)
+            self.map_cache.put(key, ( dict([(k, copy.deepcopy(unknowns[k])) for k in self.map_outputs]),
+                                      self.offset_angles, self.offset_tension, self.offset_restoring_force) )
+        else:
+            outputs, self.offset_angles, self.offset_tension, self.offset_restoring_force = cached
+            for k in self.map_outputs:
+                unknowns[k] = copy.deepcopy(outputs[k])
 
         # Compute costs for the system
         self.compute_cost(params, unknowns)
 
 
+    def cache_info(self):
+        """Hit and miss counters of the line property and MAP result caches
+        
+        INPUTS: none
+        ----------
+        
+        OUTPUTS  : dictionary of counters
+        """
+        return {'properties_hits'  : self.properties_cache.hits,
+                'properties_misses': self.properties_cache.misses,
+                'map_hits'         : self.map_cache.hits,
+                'map_misses'       : self.map_cache.misses}
+
+    
     def set_properties(self, params):
         """Sets mooring line properties: Minimum Breaking Load, Mass per Length, Axial Stiffness, Cross-Sectional Area, Cost-per-Length.
         
@@ -124,53 +396,13 @@ class MapMooring(Component):
         RopeWire,AxialandBendingStiffness.htm
         """
         
-        # Unpack variables
-        Dmooring       = params['mooring_diameter']
-        lineType       = params['mooring_type'].upper()
-
         # Set parameters based on regressions for different mooring line type
-        Dmooring2 = Dmooring**2
-
-        # TODO: Costs per unit length are not synced with new input sources
-        if lineType == 'CHAIN':
-            #self.min_break_load      = 2.74e7  * Dmooring2 * (44.0 - 80.0*Dmooring)
-            # Use a linear fit to the other fit becuase it is poorly conditioned for optimization
-            self.min_break_load      = 1e3*np.maximum(1.0, -5445.2957034820683+176972.68498888266*Dmooring)
-            self.wet_mass_per_length = 19.9e3  * Dmooring2
-            self.axial_stiffness     = 8.54e10 * Dmooring2
-            self.area                = 2.0 * 0.25 * np.pi * Dmooring2
-            self.cost_per_length     = 3.415e4  * Dmooring2 #0.58*1e-3*self.min_break_load/gravity - 87.6
-
-        elif lineType == 'NYLON':
-            self.min_break_load      = 139357e3 * Dmooring2
-            self.wet_mass_per_length = 0.6476e3 * Dmooring2
-            self.axial_stiffness     = 1.18e8   * Dmooring2
-            self.area                = 0.25 * np.pi * Dmooring2
-            self.cost_per_length     = 3.415e4  * Dmooring2 #0.42059603*1e-3*self.min_break_load/gravity + 109.5
-
-        elif lineType == 'POLYESTER':
-            self.min_break_load      = 170466e3 * Dmooring2
-            self.wet_mass_per_length = 0.7978e3 * Dmooring2
-            self.axial_stiffness     = 1.09e9   * Dmooring2
-            self.area                = 0.25 * np.pi * Dmooring2
-            self.cost_per_length     = 3.415e4  * Dmooring2 #0.42059603*1e-3*self.min_break_load/gravity + 109.5
-
-        elif lineType == 'FIBER': 
-            self.min_break_load      = 584175e3 * Dmooring2
-            self.wet_mass_per_length = 3.6109e3 * Dmooring2
-            self.axial_stiffness     = 3.67e10  * Dmooring2
-            self.area                = 0.455 * 0.25 * np.pi * Dmooring2
-            self.cost_per_length     = 2.0 * 6.32e4  * Dmooring2 #0.53676471*1e-3*self.min_break_load/gravity
-
-        elif lineType == 'IWRC':
-            self.min_break_load      = 633358e3 * Dmooring2
-            self.wet_mass_per_length = 3.9897e3 * Dmooring2
-            self.axial_stiffness     = 4.04e10  * Dmooring2
-            self.area                = 0.455 * 0.25 * np.pi * Dmooring2
-            self.cost_per_length     = 6.32e4  * Dmooring2 #0.33*1e-3*self.min_break_load/gravity + 139.5
-
-        else:
-            raise ValueError('Available line types are: chain nylon polyester fiber iwrc')
+        props = mooring_line_properties(params['mooring_diameter'], params['mooring_type'])
+        self.min_break_load      = float(props['min_break_load'])
+        self.wet_mass_per_length = float(props['wet_mass_per_length'])
+        self.axial_stiffness     = float(props['axial_stiffness'])
+        self.area                = float(props['area'])
+        self.cost_per_length     = float(props['cost_per_length'])
 
             
     def set_geometry(self, params, unknowns):
@@ -378,11 +610,235 @@ class MapMooring(Component):
 
         # Write the "Solve Options" section
         self.write_solver_options(params)
+
+
+    def init_map(self, params):
+        """Returns a new pyMAP instance initialized with the current input file.
+        pyMAP cannot change line or node properties after initialization, so every design needs its own instance.
+        
+        INPUTS:
+        ----------
+        params   : dictionary of input parameters
+        
+        OUTPUTS  : initialized pyMAP instance
+        """
+        mymap = pyMAP( )
+        #mymap.ierr = 0
+        mymap.map_set_sea_depth(params['water_depth'])
+        mymap.map_set_gravity(gravity)
+        mymap.map_set_sea_density(params['water_density'])
+        mymap.read_list_input(self.finput)
+        mymap.init( )
+        return mymap
+
+
+    def close_executor(self):
+        """Shuts down the worker pool, if this component created one
+        
+        INPUTS: none
+        ----------
+        
+        OUTPUTS  : none
+        """
+        if self.own_executor and (self.executor is not None):
+            self.executor.close()
+            self.executor.join()
+            self.executor     = None
+            self.own_executor = False
+
+            
+    def get_fairlead_forces(self, mymap, nlines, displacements):
+        """Displaces the vessel to each of the requested positions and collects the fairlead force in every line
+        
+        INPUTS:
+        ----------
+        mymap         : initialized pyMAP or CatenaryMooring instance
+        nlines        : number of mooring lines
+        displacements : list of (surge, sway, heave, roll, pitch, yaw) vessel displacements
+        
+        OUTPUTS  : fairlead forces as array of size (number of displacements, nlines, 3)
+        """
+        # Native catenary solves all displacements at once
+        if isinstance(mymap, CatenaryMooring):
+            return mymap.get_fairlead_forces(np.array(displacements, dtype=np.float64))
+
+        # Split displacements across worker processes, each with their own MAP++ instance
+        nchunks = min(self.n_workers, len(displacements))
+        if nchunks > 1:
+            if self.executor is None:
+                self.executor     = multiprocessing.Pool(self.n_workers)
+                self.own_executor = True
+            chunks = [list(c) for c in np.array_split(np.arange(len(displacements)), nchunks)]
+            args   = [(self.finput, self.map_environment[0], self.map_environment[1], nlines,
+                       [displacements[k] for k in c]) for c in chunks]
+            return np.concatenate( list(self.executor.map(map_worker, args)), axis=0 )
+        
+        return map_fairlead_forces(mymap, nlines, displacements)
+
+    
+    def offset_sweep(self, mymap, nlines, offset, line_angles):
+        """Finds line tension and restoring force at maximum offset for vessel displacements around all 360 degrees.
+        With the symmetric sweep mode, only the headings within half of one inter-line sector are solved, 
+        because the evenly repeated line layout makes every other heading a rotation or reflection of these.
+        
+        INPUTS:
+        ----------
+        mymap       : initialized pyMAP or CatenaryMooring instance
+        nlines      : number of mooring lines
+        offset      : vessel offset magnitude
+        line_angles : heading of each mooring line (degrees) as returned by the neutral solution
+        
+        OUTPUTS  : none (offset_angles, offset_tension, offset_restoring_force class variables set)
+        """
+        # Get angles by which to find the weakest line
+        dangle  = 2.0
+        angles  = np.arange(0.0, 360.0, dangle)
+        nangles = len(angles)
+
+        # Angular spacing between lines in number of angle increments
+        nsector = 360.0 / nlines / dangle
+        ishift  = np.round(np.mod(line_angles - line_angles[0], 360.0) / dangle).astype(np.int_)
+        nsector = int(np.round(nsector)) if np.abs(nsector - np.round(nsector)) < 1e-6 else 0
+        symmetric = ( (self.sweep == 'symmetric') and (nsector > 0) and
+                      (np.unique(ishift).size == nlines) and np.all(np.mod(ishift, max(nsector,1)) == 0) )
+
+        # Only need half of the first sector if lines are evenly spaced on angle increments
+        isolve = np.arange(nsector//2 + 1) if symmetric else np.arange(nangles)
+        
+        # Get restoring force of offset at each angle
+        idir   = np.c_[np.cos(np.deg2rad(angles[isolve])), np.sin(np.deg2rad(angles[isolve]))]
+        disp   = [(offset*idir[k,0], offset*idir[k,1], 0, 0, 0, 0) for k in xrange(isolve.size)] # 0s for z, angles
+        forces = self.get_fairlead_forces(mymap, nlines, disp)
+        # Tension in each line
+        T = np.sqrt( np.sum(forces**2, axis=2) )
+        # Restoring force from each line in offset direction
+        F = np.sum(forces[:,:,:2] * idir[:,np.newaxis,:], axis=2)
+
+        if symmetric:
+            # Tension and restoring force as function of line-relative heading (even function of heading)
+            irel = np.mod(isolve[:,np.newaxis] - ishift[np.newaxis,:], nangles)
+            T0 = np.zeros((nangles,))
+            F0 = np.zeros((nangles,))
+            T0[irel] = T0[np.mod(-irel, nangles)] = T
+            F0[irel] = F0[np.mod(-irel, nangles)] = F
+
+            # Rotate back to every heading for every line
+            irel = np.mod(np.arange(nangles)[:,np.newaxis] - ishift[np.newaxis,:], nangles)
+            T = T0[irel]
+            F = F0[irel]
+
+        # Store results of the sweep for post-processing
+        self.offset_angles          = angles
+        self.offset_tension         = T
+        self.offset_restoring_force = F
+
+
+    def adaptive_sweep(self, mymap, nlines, offset, line_angles):
+        """Finds the worst line tension and weakest restoring force at maximum offset by searching over the heading,
+        rather than solving a fixed grid of headings.  A coarse grid covering one inter-line sector (half of it,
+        reflected, for evenly spaced lines) brackets the worst headings, which are then refined by golden-section search
+        to within the heading tolerance.
+
+        INPUTS:
+        ----------
+        mymap       : initialized pyMAP or CatenaryMooring instance
+        nlines      : number of mooring lines
+        offset      : vessel offset magnitude
+        line_angles : heading of each mooring line (degrees) as returned by the neutral solution
+
+        OUTPUTS  : none (offset_angles, offset_tension, offset_restoring_force class variables set for every heading solved)
+        """
+        # Evenly spaced lines repeat every sector and are mirror symmetric about each line
+        sector = 360.0 / nlines
+        rel    = np.sort( np.mod(line_angles - line_angles[0], 360.0) )
+        even   = np.allclose(rel, sector*np.arange(nlines), atol=1e-3)
+        span   = 0.5*sector if even else 360.0
+
+        # Tension and restoring force of every line at each heading solved, keyed by heading relative to line 0
+        samples = OrderedDict()
+        def evaluate(headings):
+            headings = [h for h in headings if not h in samples]
+            if len(headings) == 0: return
+            idir   = np.c_[np.cos(np.deg2rad(line_angles[0] + np.array(headings))),
+                           np.sin(np.deg2rad(line_angles[0] + np.array(headings)))]
+            disp   = [(offset*idir[k,0], offset*idir[k,1], 0, 0, 0, 0) for k in xrange(len(headings))] # 0s for z, angles
+            forces = self.get_fairlead_forces(mymap, nlines, disp)
+            T = np.sqrt( np.sum(forces**2, axis=2) )
+            F = np.sum(forces[:,:,:2] * idir[:,np.newaxis,:], axis=2)
+            for k,h in enumerate(headings):
+                samples[h] = (T[k,:], F[k,:])
+
+        # Coarse grid of no more than 10 degree spacing
+        ncoarse = int(np.ceil(span / 10.0)) + 1
+        coarse  = list( np.linspace(0.0, span, ncoarse) )
+        evaluate(coarse)
+
+        # Refine the worst tension (maximum over lines) and weakest restoring force (sum over lines) between neighbors
+        def max_tension(h):
+            evaluate([h])
+            return -samples[h][0].max()
+        def restoring_force(h):
+            evaluate([h])
+            return samples[h][1].sum()
+        for func in [max_tension, restoring_force]:
+            i = np.argmin([func(h) for h in coarse])
+            golden_section(func, coarse[max(i-1, 0)], coarse[min(i+1, ncoarse-1)], self.heading_tol)
+
+        # Store results of the search for post-processing
+        headings = np.array( list(samples.keys()) )
+        isort    = np.argsort(headings)
+        self.offset_angles          = np.mod(line_angles[0] + headings[isort], 360.0)
+        self.offset_tension         = np.array([samples[h][0] for h in headings[isort]])
+        self.offset_restoring_force = np.array([samples[h][1] for h in headings[isort]])
+
+
+    def line_weight(self, params):
+        """Submerged weight per unit length of the mooring line, the same as MAP++ uses for the line dictionary:
+        the mass density in air written to the input file less the buoyancy of a cylinder of the line diameter
+
+        INPUTS:
+        ----------
+        params : dictionary of input parameters
+
+        OUTPUTS  : line weight in water (N/m)
+        """
+        rhoWater = params['water_density']
+        Dmooring = params['mooring_diameter']
+        return gravity * (self.wet_mass_per_length + rhoWater*self.area - rhoWater*0.25*np.pi*Dmooring**2)
+
+        
+    def compute_stiffness(self, params, Fneutral, diagonal=False):
+        """Computes the 6x6 mooring stiffness matrix analytically from the catenary tangent stiffness of each line,
+        summed over the fairlead geometry, instead of finite differences of perturbed equilibrium solutions.
+        
+        INPUTS:
+        ----------
+        params   : dictionary of input parameters
+        Fneutral : fairlead forces of each line at neutral position, array of size (nlines, 3)
+        diagonal : only compute the diagonal entries of the matrix
         
+        OUTPUTS  : 6x6 stiffness matrix
+        """
+        # Unpack variables
+        fairleadDepth = params['fairlead']
+        R_fairlead    = params['fairlead_radius']
+        R_anchor      = params['anchor_radius']
+        nlines        = int(params['number_of_mooring_lines'])
+
+        # Line arrangement as in the input file, first line along x-axis then repeated evenly
+        heading = np.deg2rad( np.arange(nlines) * 360.0 / nlines )
+        r_fair  = np.c_[R_fairlead*np.cos(heading), R_fairlead*np.sin(heading), -fairleadDepth*np.ones(nlines)]
+        u_line  = -np.c_[np.cos(heading), np.sin(heading)]
+        H       = np.sqrt(Fneutral[:,0]**2 + Fneutral[:,1]**2)
+        V       = Fneutral[:,2]
+        return mooring_stiffness(r_fair, u_line, H, V, R_anchor - R_fairlead, self.scope, self.line_weight(params),
+                                 self.axial_stiffness, CB_DEFAULT, diagonal)
+
         
     def runMAP(self, params, unknowns):
         """Writes MAP input file, executes, and then queries MAP to find 
-        maximum loading and displacement from vessel displacement around all 360 degrees
+        maximum loading and displacement from vessel displacement around all 360 degrees.
+        With the catenary solver, the same quantities come from the native elastic catenary equations instead.
         
         INPUTS:
         ----------
@@ -401,39 +857,50 @@ class MapMooring(Component):
         heel          = params['max_heel']
         gamma         = params['gamma']
 
-        # Write the mooring system input file for this design
-        self.write_input_file(params)
+        npltpts = 20
+        if self.solver == 'catenary':
+            # Native elastic catenary lines, no input file needed
+            mymap = CatenaryMooring(nlines, params['fairlead_radius'], -fairleadDepth, params['anchor_radius'],
+                                    waterDepth, self.scope, self.line_weight(params), self.axial_stiffness)
 
-        # Initiate MAP++ for this design
-        mymap = pyMAP( )
-        #mymap.ierr = 0
-        mymap.map_set_sea_depth(waterDepth)
-        mymap.map_set_gravity(gravity)
-        mymap.map_set_sea_density(rhoWater)
-        mymap.read_list_input(self.finput)
-        mymap.init( )
+            # Get the neutral position forces and stiffness matrix
+            Fneutral = mymap.set_neutral()
+            if self.stiffness == 'linear':
+                unknowns['mooring_stiffness'] = mymap.linear(1e-4)
+        else:
+            # Write the mooring system input file for this design
+            self.write_input_file(params)
 
-        # Get the stiffness matrix at neutral position
-        mymap.displace_vessel(0, 0, 0, 0, 0, 0)
-        mymap.update_states(0.0, 0)
-        K = mymap.linear(1e-4) # Input finite difference epsilon
-        unknowns['mooring_stiffness'] = np.array( K )
-        mymap.displace_vessel(0, 0, 0, 0, 0, 0)
-        mymap.update_states(0.0, 0)
-        
-        # Get the vertical load on the spar and plotting data
-        Fz = 0.0
-        npltpts = 20
-        plotMat = np.zeros((nlines, npltpts, 3))
-        for k in xrange(nlines):
-            _,_,fz = mymap.get_fairlead_force_3d(k)
-            Fz += fz
-            plotMat[k,:,0] = mymap.plot_x(k, npltpts)
-            plotMat[k,:,1] = mymap.plot_y(k, npltpts)
-            plotMat[k,:,2] = mymap.plot_z(k, npltpts)
+            # Initiate MAP++ for this design
+            mymap = self.init_map(params)
+            self.map_environment = (waterDepth, rhoWater)
+
+            # Get the stiffness matrix at neutral position
+            mymap.displace_vessel(0, 0, 0, 0, 0, 0)
+            mymap.update_states(0.0, 0)
+            if self.stiffness == 'linear':
+                K = mymap.linear(1e-4) # Input finite difference epsilon
+                unknowns['mooring_stiffness'] = np.array( K )
+                mymap.displace_vessel(0, 0, 0, 0, 0, 0)
+                mymap.update_states(0.0, 0)
+
+            # Get the neutral position forces
+            Fneutral = np.zeros((nlines, 3))
+            for k in xrange(nlines):
+                Fneutral[k,:] = mymap.get_fairlead_force_3d(k)
+            
+        # Get the plotting data of the line shapes at neutral position, unless deferred
+        if not self.lazy_plot:
+            unknowns['plot_matrix'][:nlines,:,:] = self.line_profiles(mymap, nlines, npltpts)
+
+        # Get the stiffness matrix from the tangent stiffness of each line at neutral position
+        if self.stiffness != 'linear':
+            unknowns['mooring_stiffness'] = self.compute_stiffness(params, Fneutral, self.stiffness == 'diagonal')
+            
+        # Get the vertical load on the spar
+        Fz = Fneutral[:,2].sum()
         unknowns['vertical_load'] = Fz
         unknowns['mooring_effective_mass'] = Fz / gravity
-        unknowns['plot_matrix'][:nlines,:,:] = plotMat
 
         # Get the restoring moment at maximum angle of heel
         # Since we don't know the substucture CG, have to just get the forces of the lines now and do the cross product later
@@ -442,66 +909,84 @@ class MapMooring(Component):
         # TODO: This still isgn't quite the same as clocking the mooring lines in different directions,
         # which is what we want to do, but that requires multiple input files and solutions
         Fh1 = np.zeros((10,3))
-        mymap.displace_vessel(0, 0, 0, 0, heel, 0)
-        mymap.update_states(0.0, 0)
-        for k in xrange(nlines):
-            Fh1[k][0], Fh1[k][1], Fh1[k][2] = mymap.get_fairlead_force_3d(k)
-
         Fh2 = np.zeros((10,3))
-        mymap.displace_vessel(0, 0, 0, heel, 0, 0)
-        mymap.update_states(0.0, 0)
-        for k in xrange(nlines):
-            Fh2[k][0], Fh2[k][1], Fh2[k][2] = mymap.get_fairlead_force_3d(k)
-
+        Fh1[:nlines,:], Fh2[:nlines,:] = self.get_fairlead_forces(mymap, nlines, [(0, 0, 0, 0, heel, 0),
+                                                                                  (0, 0, 0, heel, 0, 0)])
         Fh = Fh2 if Fh1.sum(axis=(0,1)) > Fh2.sum(axis=(0,1)) else Fh1
         unknowns['max_heel_restoring_force'] = Fh
         
-        # Get angles by which to find the weakest line
-        dangle  = 2.0
-        angles  = np.deg2rad( np.arange(0.0, 360.0, dangle) )
-        nangles = len(angles)
-
         # Get restoring force at weakest line at maximum allowable offset
         # Will global minimum always be along mooring angle?
-        max_tension   = 0.0
-        max_angle     = None
-        min_angle     = None
-        F_max_tension = None
-        F_min         = np.inf
-        T = np.zeros((nlines,))
-        F = np.zeros((nlines,))
-        # Loop around all angles to find weakest point
-        for a in angles:
-            # Unit vector and offset in x-y components
-            idir  = np.array([np.cos(a), np.sin(a)])
-            surge = offset * idir[0]
-            sway  = offset * idir[1]
-
-            # Get restoring force of offset at this angle
-            mymap.displace_vessel(surge, sway, 0, 0, 0, 0) # 0s for z, angles
-            mymap.update_states(0.0, 0)
-            for k in xrange(nlines):
-                # Force in x-y-z coordinates
-                fx,fy,fz = mymap.get_fairlead_force_3d(k)
-                T[k]     = np.sqrt(fx*fx + fy*fy + fz*fz)
-                # Total restoring force
-                F[k]     = np.dot([fx, fy], idir)
-                
-            # Check if this is the weakest direction (highest tension)
-            tempMax = T.max()
-            if tempMax > max_tension:
-                max_tension   = tempMax
-                F_max_tension = F.sum()
-                max_angle     = a
-            if F.sum() < F_min:
-                F_min     = F.sum()
-                min_angle = a
-                
+        if self.solver == 'catenary':
+            line_angles = np.rad2deg( mymap.heading )
+        else:
+            line_angles = np.rad2deg( np.arctan2(Fneutral[:,1], Fneutral[:,0]) )
+        if self.sweep == 'adaptive':
+            self.adaptive_sweep(mymap, nlines, offset, line_angles)
+        else:
+            self.offset_sweep(mymap, nlines, offset, line_angles)
+
         # Store the weakest restoring force when the vessel is offset the maximum amount
-        unknowns['max_offset_restoring_force'] = F_min
+        max_tension = self.offset_tension.max()
+        unknowns['max_offset_restoring_force'] = self.offset_restoring_force.sum(axis=1).min()
         unknowns['axial_unity'] = gamma * max_tension / self.min_break_load
 
-        mymap.end()
+        if self.solver == 'map': mymap.end()
+
+
+    def line_profiles(self, mymap, nlines, npts):
+        """Samples the shape of every mooring line at the current vessel position.
+
+        INPUTS:
+        ----------
+        mymap  : initialized pyMAP or CatenaryMooring instance
+        nlines : number of mooring lines
+        npts   : number of points along each line
+
+        OUTPUTS  : line coordinates as array of size (nlines, npts, 3)
+        """
+        if isinstance(mymap, CatenaryMooring):
+            return mymap.plot_matrix(npts)
+
+        plotMat = np.zeros((nlines, npts, 3))
+        for k in xrange(nlines):
+            plotMat[k,:,0] = mymap.plot_x(k, npts)
+            plotMat[k,:,1] = mymap.plot_y(k, npts)
+            plotMat[k,:,2] = mymap.plot_z(k, npts)
+        return plotMat
+
+
+    def get_plot_matrix(self, npts=20):
+        """Computes the line shapes at neutral position for the most recently analyzed design.
+        This is how line shapes are obtained for plotting when the lazy_plot option skips them during analysis.
+
+        INPUTS:
+        ----------
+        npts : number of points along each line
+
+        OUTPUTS  : data matrix for plotting of size (15, npts, 3), with one row per mooring line
+        """
+        if self.plot_params is None:
+            raise RuntimeError('No mooring design has been analyzed yet')
+        params = self.plot_params
+        nlines = int(params['number_of_mooring_lines'])
+
+        if self.solver == 'catenary':
+            mymap = CatenaryMooring(nlines, params['fairlead_radius'], -params['fairlead'], params['anchor_radius'],
+                                    params['water_depth'], self.scope, self.line_weight(params), self.axial_stiffness)
+            mymap.set_neutral()
+        else:
+            # Cached results may mean that the input file is from a different design
+            self.write_input_file(params)
+            mymap = self.init_map(params)
+            mymap.displace_vessel(0, 0, 0, 0, 0, 0)
+            mymap.update_states(0.0, 0)
+
+        plotMat = np.zeros((15, npts, 3))
+        plotMat[:nlines,:,:] = self.line_profiles(mymap, nlines, npts)
+
+        if self.solver == 'map': mymap.end()
+        return plotMat
 
         
     def compute_cost(self, params, unknowns):
@@ -524,13 +1009,9 @@ class MapMooring(Component):
         # Cost of anchors
         extraLength = 0.0
         if type(anchorType) == type(''): anchorType = Anchor[anchorType.upper()]
+        anchor_rate = float(anchor_cost_rate(self.min_break_load, anchorType))
         if anchorType == Anchor['DRAGEMBEDMENT']:
-            anchor_rate = 1e-3 * self.min_break_load / gravity / 20*2000
             extraLength = params['drag_embedment_extra_length']
-        elif anchorType  == Anchor['SUCTIONPILE']:
-            anchor_rate = 150000.* np.sqrt(1e-3*self.min_break_load/gravity/1250.)
-        else:
-            raise ValueError('Anchor Type must be DRAGEMBEDMENT or SUCTIONPILE')
         anchor_total = anchor_rate*nlines
 
         # Cost of all of the mooring lines
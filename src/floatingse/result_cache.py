@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+
+class ResultCache(object):
+    """
+    Bounded cache of results keyed by the inputs that produced them, with hit/miss counters.
+    Entries are evicted either in least-recently-used ('lru') or first-in-first-out ('fifo') order.
+    """
+    def __init__(self, size=16, eviction='lru'):
+        if not eviction in ['lru', 'fifo']:
+            raise ValueError('Available eviction policies are: lru fifo')
+        self.size     = size
+        self.eviction = eviction
+        self.entries  = OrderedDict()
+        self.hits     = 0
+        self.misses   = 0
+
+    def get(self, key):
+        """Returns cached value for key or None if not in cache"""
+        if key in self.entries:
+            self.hits += 1
+            value = self.entries[key]
+            if self.eviction == 'lru':
+                # Move to the most recently used end
+                del self.entries[key]
+                self.entries[key] = value
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Stores value for key, evicting an old entry if the cache is full"""
+        if self.size <= 0: return
+        if key in self.entries:
+            del self.entries[key]
+        elif len(self.entries) >= self.size:
+            self.entries.popitem(last=False)
+        self.entries[key] = value
+
+    def clear(self):
+        """Empties the cache and resets counters"""
+        self.entries.clear()
+        self.hits   = 0
+        self.misses = 0
@@ -13,7 +13,7 @@ class SemiInstance(FloatingInstance):
         # Change scalars to vectors where needed
         self.check_vectors()
 
-    def get_assembly(self): return FloatingSE(NSECTIONS)
+    def get_assembly(self): return FloatingSE(NSECTIONS, lazy_plot=True)
 
     def get_constraints(self):
 
@@ -111,7 +111,7 @@ class SemiInstance(FloatingInstance):
 
         self.draw_ocean(fig)
 
-        mooringMat = self.prob['mm.plot_matrix']
+        mooringMat = self.prob.root.mm.get_plot_matrix()
         self.draw_mooring(fig, mooringMat)
 
         pontoonMat = self.prob['load.plot_matrix']
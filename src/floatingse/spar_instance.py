@@ -44,7 +44,7 @@ class SparInstance(FloatingInstance):
         # Change scalars to vectors where needed
         self.check_vectors()
         
-    def get_assembly(self): return FloatingSE(NSECTIONS)
+    def get_assembly(self): return FloatingSE(NSECTIONS, lazy_plot=True)
 
 
     def get_constraints(self):
@@ -121,7 +121,7 @@ class SparInstance(FloatingInstance):
 
         self.draw_ocean(fig)
 
-        self.draw_mooring(fig, self.prob['mm.plot_matrix'])
+        self.draw_mooring(fig, self.prob.root.mm.get_plot_matrix())
 
         self.draw_column(fig, [0.0, 0.0], self.params['base_freeboard'], self.params['base_section_height'],
                            0.5*self.params['base_outer_diameter'], self.params['base_stiffener_spacing'])
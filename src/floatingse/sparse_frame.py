@@ -0,0 +1,486 @@
+"""
+In-process 3D frame solver with the same interface as pyframe3dd.frame3dd, so that it can be swapped in as the
+structural backend of FloatingFrame.  Elements are two-node Timoshenko beams (shear deformation optional) that are
+assembled with NumPy into scipy.sparse matrices.  Every static load case is solved with a single sparse LU
+factorization of the stiffness matrix, which is also reused by the shift-invert eigen-solve of the modes.
+
+Sign conventions and outputs follow Frame3DD:
+- Element properties and distributed loads are in the local element coordinate system (x along the element from N1
+  to N2, with the roll angle setting the orientation of the local y and z axes about x)
+- Element end forces are the forces from the nodes on each element in local coordinates
+- Reactions are the forces from the supports on the structure in global coordinates
+- Loads set with the change* methods replace any earlier loads of the same type in that load case
+
+Geometric stiffness and the internal force output at dx-increments along the elements are not available.
+
+The static results (displacements, end forces, and reactions) use the same element stiffness and fixed end force
+models as Frame3DD, so they agree with it to the round-off of the linear solves.  The natural frequencies differ by
+more: the shift-invert eigen-solve converges the modes to near machine precision, while Frame3DD's subspace (or
+Stodola) iteration stops once the frequencies change by less than its tolerance (1e-5 in FloatingFrame), so the two
+only agree to about that tolerance.
+"""
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as spla
+from collections import namedtuple
+
+
+# Results, matching the pyframe3dd named tuples
+NodeDisplacements = namedtuple('NodeDisplacements', ['node', 'dx', 'dy', 'dz', 'dxrot', 'dyrot', 'dzrot'])
+ElementEndForces  = namedtuple('ElementEndForces', ['element', 'node', 'Nx', 'Vy', 'Vz', 'Txx', 'Myy', 'Mzz'])
+NodeReactions     = namedtuple('NodeReactions', ['node', 'Fx', 'Fy', 'Fz', 'Mxx', 'Myy', 'Mzz'])
+NodeMasses        = namedtuple('NodeMasses', ['total_mass', 'struct_mass', 'node', 'xmass', 'ymass', 'zmass',
+                                              'xinrta', 'yinrta', 'zinrta'])
+Modes             = namedtuple('Modes', ['freq', 'xmpf', 'ympf', 'zmpf', 'node', 'xdsp', 'ydsp', 'zdsp',
+                                         'xrot', 'yrot', 'zrot'])
+
+# Gauss-Legendre points and weights on [0,1], exact for the quartic integrands of trapezoidal loads
+GAUSS_X = 0.5 + 0.5*np.array([-np.sqrt(0.6), 0.0, np.sqrt(0.6)])
+GAUSS_W = np.array([5.0, 8.0, 5.0]) / 18.0
+
+
+class NodeData(object):
+    """Node numbers (1 to n in order), coordinates, and rigid radii"""
+    def __init__(self, node, x, y, z, r):
+        self.node = np.array(node).astype(np.int32)
+        self.x    = np.array(x).astype(np.float64)
+        self.y    = np.array(y).astype(np.float64)
+        self.z    = np.array(z).astype(np.float64)
+        self.r    = np.array(r).astype(np.float64)
+
+
+class ReactionData(object):
+    """Supported nodes and their restraint in each dof: 0 for free, rigid for fixed, or else a spring stiffness"""
+    def __init__(self, node, Rx, Ry, Rz, Rxx, Ryy, Rzz, rigid=1):
+        self.node  = np.array(node).astype(np.int32)
+        self.R     = np.c_[Rx, Ry, Rz, Rxx, Ryy, Rzz].astype(np.float64) * np.ones((self.node.size, 1))
+        self.rigid = rigid
+
+
+class ElementData(object):
+    """Element connectivity and section properties"""
+    def __init__(self, element, N1, N2, Ax, Asy, Asz, Jx, Iy, Iz, E, G, roll, density):
+        self.element = np.array(element).astype(np.int32)
+        self.N1      = np.array(N1).astype(np.int32)
+        self.N2      = np.array(N2).astype(np.int32)
+        self.Ax      = np.array(Ax).astype(np.float64)
+        self.Asy     = np.array(Asy).astype(np.float64)
+        self.Asz     = np.array(Asz).astype(np.float64)
+        self.Jx      = np.array(Jx).astype(np.float64)
+        self.Iy      = np.array(Iy).astype(np.float64)
+        self.Iz      = np.array(Iz).astype(np.float64)
+        self.E       = np.array(E).astype(np.float64)
+        self.G       = np.array(G).astype(np.float64)
+        self.roll    = np.array(roll).astype(np.float64)
+        self.density = np.array(density).astype(np.float64)
+
+
+class Options(object):
+    """Analysis options: shear deformation, geometric stiffness (unavailable), and internal force increment (unused)"""
+    def __init__(self, shear, geom, dx):
+        if geom:
+            raise ValueError('Geometric stiffness is not available in the sparse frame solver')
+        self.shear = shear
+        self.geom  = geom
+        self.dx    = dx
+
+
+class StaticLoadCase(object):
+    """Gravity plus point, uniformly distributed, and trapezoidally distributed loads"""
+    def __init__(self, gx, gy, gz):
+        self.gx = gx
+        self.gy = gy
+        self.gz = gz
+        self.changePointLoads([], [], [], [], [], [], [])
+        self.changeUniformLoads([], [], [], [])
+        self.changeTrapezoidalLoads([], [], [], [], [], [], [], [], [], [], [], [], [])
+
+    def changePointLoads(self, N, Fx, Fy, Fz, Mxx, Myy, Mzz):
+        """Concentrated forces and moments on nodes N in global coordinates"""
+        self.NF = np.array(N).astype(np.int32)
+        self.F  = np.c_[Fx, Fy, Fz, Mxx, Myy, Mzz].astype(np.float64).reshape((-1, 6))
+
+    def changeUniformLoads(self, EL, Ux, Uy, Uz):
+        """Force per unit length along the whole of elements EL in local coordinates"""
+        self.UL = np.array(EL).astype(np.int32)
+        self.U  = np.c_[Ux, Uy, Uz].astype(np.float64).reshape((-1, 3))
+
+    def changeTrapezoidalLoads(self, EL, xx1, xx2, wx1, wx2, xy1, xy2, wy1, wy2, xz1, xz2, wz1, wz2):
+        """Force per unit length varying linearly from w1 at x1 to w2 at x2 along elements EL in local coordinates"""
+        self.WL = np.array(EL).astype(np.int32)
+        self.W  = np.c_[xx1, xx2, wx1, wx2, xy1, xy2, wy1, wy2, xz1, xz2, wz1, wz2].astype(np.float64).reshape((-1, 4, 3), order='F')
+
+
+def rotation_matrices(x, y, z, N1, N2, roll):
+    """Direction cosines of the local element axes in the global coordinate system, with z vertical
+
+    INPUTS:
+    ----------
+    x, y, z : node coordinates
+    N1, N2  : element end node numbers (1-based)
+    roll    : roll angle of each element about its local x-axis (deg)
+
+    OUTPUTS  : (nelem, 3, 3) array whose rows are the local x, y, and z axes
+    """
+    dx = np.c_[x[N2-1] - x[N1-1], y[N2-1] - y[N1-1], z[N2-1] - z[N1-1]]
+    L  = np.sqrt(np.sum(dx**2, axis=1))
+    Cx, Cy, Cz = dx[:,0]/L, dx[:,1]/L, dx[:,2]/L
+    sp, cp = np.sin(np.deg2rad(roll)), np.cos(np.deg2rad(roll))
+
+    T = np.zeros((L.size, 3, 3))
+    vert = np.abs(Cz) >= 1.0 - 1e-12
+    den  = np.sqrt(np.maximum(1.0 - Cz*Cz, 1e-30))
+    T[:,0,0], T[:,0,1], T[:,0,2] = Cx, Cy, Cz
+    T[:,1,0] = np.where(vert, -Cz*sp, (-Cx*Cz*sp - Cy*cp) / den)
+    T[:,1,1] = np.where(vert, cp, (-Cy*Cz*sp + Cx*cp) / den)
+    T[:,1,2] = np.where(vert, 0.0, sp*den)
+    T[:,2,0] = np.where(vert, -Cz*cp, (-Cx*Cz*cp + Cy*sp) / den)
+    T[:,2,1] = np.where(vert, -sp, (-Cy*Cz*cp - Cx*sp) / den)
+    T[:,2,2] = np.where(vert, 0.0, cp*den)
+    T[vert,0,:2] = 0.0
+    return T
+
+
+def element_stiffness(L, Ax, Asy, Asz, Jx, Iy, Iz, E, G, shear):
+    """Local 12x12 stiffness matrices of Timoshenko beam elements, dofs ordered (u,v,w,tx,ty,tz) at N1 then N2
+
+    OUTPUTS  : (nelem, 12, 12) array
+    """
+    Ksy = 12.0*E*Iz / (G*Asy*L*L) if shear else np.zeros(L.shape)
+    Ksz = 12.0*E*Iy / (G*Asz*L*L) if shear else np.zeros(L.shape)
+    t1  = E*Ax/L
+    t2  = 12.0*E*Iz / (L**3 * (1.0+Ksy))
+    t3  = 12.0*E*Iy / (L**3 * (1.0+Ksz))
+    t4  = 6.0*E*Iz / (L*L * (1.0+Ksy))
+    t5  = 6.0*E*Iy / (L*L * (1.0+Ksz))
+    t6  = (4.0+Ksy)*E*Iz / (L * (1.0+Ksy))
+    t7  = (4.0+Ksz)*E*Iy / (L * (1.0+Ksz))
+    t8  = G*Jx/L
+    t9  = (2.0-Ksy)*E*Iz / (L * (1.0+Ksy))
+    t10 = (2.0-Ksz)*E*Iy / (L * (1.0+Ksz))
+
+    k = np.zeros((L.size, 12, 12))
+    for (i, j), t in [((0,0), t1), ((0,6), -t1), ((6,6), t1),
+                      ((1,1), t2), ((1,5), t4), ((1,7), -t2), ((1,11), t4),
+                      ((5,5), t6), ((5,7), -t4), ((5,11), t9), ((7,7), t2), ((7,11), -t4), ((11,11), t6),
+                      ((2,2), t3), ((2,4), -t5), ((2,8), -t3), ((2,10), -t5),
+                      ((4,4), t7), ((4,8), t5), ((4,10), t10), ((8,8), t3), ((8,10), t5), ((10,10), t7),
+                      ((3,3), t8), ((3,9), -t8), ((9,9), t8)]:
+        k[:,i,j] = k[:,j,i] = t
+    return k
+
+
+def element_mass(L, Ax, Jx, Iy, Iz, dens, lump):
+    """Local 12x12 consistent (with rotatory inertia) or lumped mass matrices of beam elements
+
+    OUTPUTS  : (nelem, 12, 12) array
+    """
+    m = np.zeros((L.size, 12, 12))
+    t = dens*Ax*L
+    if lump:
+        for i in [0, 1, 2, 6, 7, 8]: m[:,i,i] = 0.5*t
+        for i in [3, 9]:  m[:,i,i] = 0.5*dens*Jx*L
+        for i in [4, 10]: m[:,i,i] = 0.5*dens*Iy*L
+        for i in [5, 11]: m[:,i,i] = 0.5*dens*Iz*L
+        return m
+
+    ry, rz, po = dens*Iy, dens*Iz, dens*Jx*L
+    terms = [((0,0), t/3.0), ((0,6), t/6.0), ((6,6), t/3.0),
+             ((3,3), po/3.0), ((3,9), po/6.0), ((9,9), po/3.0)]
+    # Bending in local x-y plane (v, tz) with rz, and in x-z plane (w, ty) with ry and opposite coupling signs
+    for (v1, r1, v2, r2), ri, s in [((1, 5, 7, 11), rz, 1.0), ((2, 4, 8, 10), ry, -1.0)]:
+        terms += [((v1,v1), 13.0*t/35.0 + 6.0*ri/(5.0*L)),     ((v2,v2), 13.0*t/35.0 + 6.0*ri/(5.0*L)),
+                  ((v1,v2), 9.0*t/70.0 - 6.0*ri/(5.0*L)),
+                  ((r1,r1), t*L*L/105.0 + 2.0*ri*L/15.0),     ((r2,r2), t*L*L/105.0 + 2.0*ri*L/15.0),
+                  ((r1,r2), -t*L*L/140.0 - ri*L/30.0),
+                  ((v1,r1), s*(11.0*t*L/210.0 + ri/10.0)),    ((v2,r2), -s*(11.0*t*L/210.0 + ri/10.0)),
+                  ((v1,r2), -s*(13.0*t*L/420.0 - ri/10.0)),   ((v2,r1), s*(13.0*t*L/420.0 - ri/10.0))]
+    for (i, j), val in terms:
+        m[:,i,j] = m[:,j,i] = val
+    return m
+
+
+def trapezoidal_end_forces(L, Ksy, Ksz, W):
+    """Fixed end forces (local coordinates) of fixed-fixed Timoshenko beams under trapezoidal loads
+
+    INPUTS:
+    ----------
+    L        : element lengths
+    Ksy, Ksz : shear deformation constants for bending in the local x-y and x-z planes
+    W        : (nload, 4, 3) array of x1, x2, w1, w2 along the local x, y, and z directions
+
+    OUTPUTS  : (nload, 12) array of equivalent nodal loads
+    """
+    feq = np.zeros((L.size, 12))
+    for idir in xrange(3):
+        x1, x2, w1, w2 = [W[:,k,idir] for k in xrange(4)]
+        span = x2 - x1
+        for xg, wg in zip(GAUSS_X, GAUSS_W):
+            x  = x1 + xg*span
+            q  = (w1 + xg*(w2 - w1)) * wg * span
+            xi = x / L
+            if idir == 0:
+                feq[:,0] += q * (1.0 - xi)
+                feq[:,6] += q * xi
+                continue
+            # Timoshenko interpolation functions of transverse displacement
+            Ks = Ksy if idir == 1 else Ksz
+            Nv1 = (1.0 + Ks - Ks*xi - 3.0*xi**2 + 2.0*xi**3) / (1.0+Ks)
+            Nv2 = (Ks*xi + 3.0*xi**2 - 2.0*xi**3) / (1.0+Ks)
+            Nr1 = L * (xi*(1.0 + 0.5*Ks) - xi**2*(2.0 + 0.5*Ks) + xi**3) / (1.0+Ks)
+            Nr2 = L * (-0.5*Ks*xi - xi**2*(1.0 - 0.5*Ks) + xi**3) / (1.0+Ks)
+            if idir == 1:
+                feq[:,1] += q*Nv1; feq[:,5]  += q*Nr1
+                feq[:,7] += q*Nv2; feq[:,11] += q*Nr2
+            else:
+                feq[:,2] += q*Nv1; feq[:,4]  -= q*Nr1
+                feq[:,8] += q*Nv2; feq[:,10] -= q*Nr2
+    return feq
+
+
+def uniform_end_forces(L, U):
+    """Fixed end forces (local coordinates) of fixed-fixed beams under uniform loads U (nload, 3)
+
+    OUTPUTS  : (nload, 12) array of equivalent nodal loads
+    """
+    feq = np.zeros((L.size, 12))
+    feq[:,0] = feq[:,6] = 0.5*U[:,0]*L
+    feq[:,1] = feq[:,7] = 0.5*U[:,1]*L
+    feq[:,2] = feq[:,8] = 0.5*U[:,2]*L
+    feq[:,5]  =  U[:,1]*L*L/12.0
+    feq[:,11] = -U[:,1]*L*L/12.0
+    feq[:,4]  = -U[:,2]*L*L/12.0
+    feq[:,10] =  U[:,2]*L*L/12.0
+    return feq
+
+
+def skew(v):
+    """Cross product matrix of vector v"""
+    return np.array([[0.0, -v[2], v[1]], [v[2], 0.0, -v[0]], [-v[1], v[0], 0.0]])
+
+
+class Frame(object):
+    """
+    Linear static and modal analysis of a 3D frame, as a drop-in replacement for pyframe3dd.frame3dd.Frame
+    """
+    def __init__(self, nodes, reactions, elements, options):
+        self.nodes     = nodes
+        self.reactions = reactions
+        self.elements  = elements
+        self.options   = options
+        self.loadCases = []
+        self.nM        = 0
+        self.lump      = 0
+        self.changeExtraNodeMass([], [], [], [], [], [], [], [], [], [], [], False)
+
+    def changeExtraNodeMass(self, node, mass, Ixx, Iyy, Izz, Ixy, Ixz, Iyz, rhox, rhoy, rhoz, addGravityLoad):
+        """Concentrated masses and inertias at nodes, with their center of mass offset by rho from the node"""
+        self.ENMnode    = np.array(node).astype(np.int32)
+        self.ENM        = np.array(mass).astype(np.float64)
+        self.ENMI       = np.c_[Ixx, Iyy, Izz, Ixy, Ixz, Iyz].astype(np.float64).reshape((-1, 6))
+        self.ENMrho     = np.c_[rhox, rhoy, rhoz].astype(np.float64).reshape((-1, 3))
+        self.addGravityLoadForExtraNodeMass = addGravityLoad
+
+    def addLoadCase(self, loadCase):
+        self.loadCases.append(loadCase)
+
+    def clearLoadCases(self):
+        self.loadCases = []
+
+    def enableDynamics(self, nM, Mmethod, lump, tol, shift):
+        """Request the first nM modes.  Mmethod is accepted for compatibility, the eigen-solver is always ARPACK"""
+        self.nM      = nM
+        self.Mmethod = Mmethod
+        self.lump    = lump
+        self.tol     = tol
+        self.shift   = shift
+
+    def assemble(self):
+        """Element geometry and the global stiffness matrix, with the element data needed for recovery"""
+        nd, el = self.nodes, self.elements
+        nnode  = nd.node.size
+        self.ndof = 6*nnode
+
+        # Element lengths are shortened by the rigid radii of the end nodes
+        N1, N2 = el.N1, el.N2
+        Lfull  = np.sqrt((nd.x[N2-1]-nd.x[N1-1])**2 + (nd.y[N2-1]-nd.y[N1-1])**2 + (nd.z[N2-1]-nd.z[N1-1])**2)
+        self.L = Lfull - nd.r[N1-1] - nd.r[N2-1]
+        if np.any(self.L <= 0.0):
+            raise RuntimeError('Element length is zero or negative after subtracting node radii')
+        T3 = rotation_matrices(nd.x, nd.y, nd.z, N1, N2, el.roll)
+        self.T = np.zeros((N1.size, 12, 12))
+        for k in xrange(4):
+            self.T[:, 3*k:3*k+3, 3*k:3*k+3] = T3
+
+        shear = self.options.shear
+        self.Ksy = 12.0*el.E*el.Iz / (el.G*el.Asy*self.L**2) if shear else np.zeros(self.L.shape)
+        self.Ksz = 12.0*el.E*el.Iy / (el.G*el.Asz*self.L**2) if shear else np.zeros(self.L.shape)
+        self.klocal = element_stiffness(self.L, el.Ax, el.Asy, el.Asz, el.Jx, el.Iy, el.Iz, el.E, el.G, shear)
+
+        # Global dof numbers of each element
+        self.edof = np.c_[6*(N1-1)[:,np.newaxis] + np.arange(6), 6*(N2-1)[:,np.newaxis] + np.arange(6)]
+        K = self.to_global(self.klocal)
+
+        # Supports: rigid dofs are removed, springs are added to the diagonal
+        R     = self.reactions.R
+        rdof  = (6*(self.reactions.node-1)[:,np.newaxis] + np.arange(6)).flatten()
+        R     = R.flatten()
+        rigid = rdof[R == self.reactions.rigid]
+        spring = (R != 0.0) & (R != self.reactions.rigid)
+        Ks = sparse.coo_matrix((R[spring], (rdof[spring], rdof[spring])), shape=K.shape)
+        self.Kstruct = K
+        self.rdof    = rdof
+        self.free    = np.setdiff1d(np.arange(self.ndof), rigid)
+        return (K + Ks).tocsc()
+
+    def to_global(self, mlocal):
+        """Sparse global matrix from local element matrices"""
+        mglobal = np.einsum('eji,ejk,ekl->eil', self.T, mlocal, self.T)
+        rows = np.repeat(self.edof, 12, axis=1).flatten()
+        cols = np.tile(self.edof, (1, 12)).flatten()
+        return sparse.coo_matrix((mglobal.flatten(), (rows, cols)), shape=(self.ndof, self.ndof)).tocsc()
+
+    def load_vector(self, load):
+        """Global load vector and local element fixed end forces of a load case"""
+        el = self.elements
+        nE = el.N1.size
+        F  = np.zeros(self.ndof)
+        feq = np.zeros((nE, 12))
+
+        # Self weight as a uniform load, converted to local coordinates
+        g  = np.array([load.gx, load.gy, load.gz])
+        wg = (el.density*el.Ax)[:,np.newaxis] * np.einsum('eij,j->ei', self.T[:,:3,:3], g)
+        feq += uniform_end_forces(self.L, wg)
+        if load.UL.size > 0:
+            np.add.at(feq, load.UL-1, uniform_end_forces(self.L[load.UL-1], load.U))
+        if load.WL.size > 0:
+            iel = load.WL-1
+            np.add.at(feq, iel, trapezoidal_end_forces(self.L[iel], self.Ksy[iel], self.Ksz[iel], load.W))
+        np.add.at(F, self.edof, np.einsum('eji,ej->ei', self.T, feq))
+
+        # Concentrated loads
+        if load.NF.size > 0:
+            np.add.at(F, 6*(load.NF-1)[:,np.newaxis] + np.arange(6), load.F)
+        if self.addGravityLoadForExtraNodeMass and self.ENMnode.size > 0:
+            Fg = self.ENM[:,np.newaxis] * g[np.newaxis,:]
+            Mg = np.cross(self.ENMrho, Fg)
+            np.add.at(F, 6*(self.ENMnode-1)[:,np.newaxis] + np.arange(6), np.c_[Fg, Mg])
+        return F, feq
+
+    def mass_matrix(self):
+        """Global mass matrix of the elements and extra node masses"""
+        el = self.elements
+        M  = self.to_global( element_mass(self.L, el.Ax, el.Jx, el.Iy, el.Iz, el.density, self.lump) )
+        rows, cols, vals = [], [], []
+        for k in xrange(self.ENMnode.size):
+            m    = self.ENM[k]
+            Ixx, Iyy, Izz, Ixy, Ixz, Iyz = self.ENMI[k]
+            S    = skew(self.ENMrho[k])
+            Mk   = np.zeros((6, 6))
+            Mk[:3,:3] = m*np.eye(3)
+            Mk[:3,3:] = -m*S
+            Mk[3:,:3] = m*S
+            Mk[3:,3:] = np.array([[Ixx, Ixy, Ixz], [Ixy, Iyy, Iyz], [Ixz, Iyz, Izz]]) + m*np.dot(S.T, S)
+            idof = 6*(self.ENMnode[k]-1) + np.arange(6)
+            rows.append(np.repeat(idof, 6)); cols.append(np.tile(idof, 6)); vals.append(Mk.flatten())
+        if len(vals) > 0:
+            M = M + sparse.coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=M.shape)
+        return M.tocsc()
+
+    def run(self, nanokay=False):
+        """Solves all load cases with one factorization, then the modes if requested
+
+        OUTPUTS  : displacements, forces, reactions, internalForces, mass, modal (as pyframe3dd.frame3dd.Frame.run)
+        """
+        nd, el = self.nodes, self.elements
+        K    = self.assemble()
+        free = self.free
+        ncase  = len(self.loadCases)
+        nnode  = nd.node.size
+        nelem  = el.N1.size
+
+        # Factorize once for all load cases and for the shift-invert eigen-solve
+        Kff = K[free,:][:,free]
+        try:
+            lu = spla.splu(Kff)
+        except RuntimeError:
+            raise RuntimeError('Singular stiffness matrix, check the reactions and element properties')
+
+        U   = np.zeros((ncase, self.ndof))
+        F   = np.zeros((ncase, self.ndof))
+        feq = np.zeros((ncase, nelem, 12))
+        for i, load in enumerate(self.loadCases):
+            F[i,:], feq[i,:,:] = self.load_vector(load)
+        if ncase > 0:
+            U[:,free] = lu.solve(np.asfortranarray(F[:,free].T)).T
+        if not nanokay and not np.all(np.isfinite(U)):
+            raise RuntimeError('Frame solution is not finite')
+
+        # Displacements by node
+        Un = U.reshape((ncase, nnode, 6))
+        nodeID = np.tile(nd.node, (ncase, 1))
+        displacements = NodeDisplacements(nodeID, Un[:,:,0], Un[:,:,1], Un[:,:,2], Un[:,:,3], Un[:,:,4], Un[:,:,5])
+
+        # Element end forces in local coordinates, N1 end then N2 end of each element
+        ue = np.einsum('eij,cej->cei', self.T, U[:,self.edof])
+        Q  = np.einsum('eij,cej->cei', self.klocal, ue) - feq
+        Q  = Q.reshape((ncase, nelem, 2, 6)).reshape((ncase, 2*nelem, 6))
+        elemID = np.tile(np.repeat(el.element, 2), (ncase, 1))
+        endID  = np.tile(np.c_[el.N1, el.N2].flatten(), (ncase, 1))
+        forces = ElementEndForces(elemID, endID, Q[:,:,0], Q[:,:,1], Q[:,:,2], Q[:,:,3], Q[:,:,4], Q[:,:,5])
+
+        # Support reactions
+        Rall = (self.Kstruct.dot(U.T)).T - F
+        Rn   = Rall[:,self.rdof].reshape((ncase, -1, 6))
+        reactID = np.tile(self.reactions.node, (ncase, 1))
+        reactions = NodeReactions(reactID, Rn[:,:,0], Rn[:,:,1], Rn[:,:,2], Rn[:,:,3], Rn[:,:,4], Rn[:,:,5])
+
+        # Mass summary
+        M = self.mass_matrix()
+        struct_mass = np.sum(el.density*el.Ax*self.L)
+        Mdiag = np.asarray(M.sum(axis=1)).flatten().reshape((nnode, 6))
+        mass = NodeMasses(struct_mass + self.ENM.sum(), struct_mass, nd.node,
+                          Mdiag[:,0], Mdiag[:,1], Mdiag[:,2], Mdiag[:,3], Mdiag[:,4], Mdiag[:,5])
+
+        # Modes from the shift-invert Lanczos iteration, reusing the factorization if there is no shift
+        modal = None
+        if self.nM > 0:
+            modal = self.solve_modes(Kff, M, lu)
+
+        internalForces = []
+        return displacements, forces, reactions, internalForces, mass, modal
+
+    def solve_modes(self, Kff, M, lu):
+        """Natural frequencies (Hz), mass participation factors, and mode shapes by node"""
+        free  = self.free
+        Mff   = M[free,:][:,free]
+        nfree = free.size
+        nM    = min(self.nM, nfree)
+        sigma = (2.0*np.pi*self.shift)**2
+        if nM >= nfree - 1:
+            # Too few dofs for ARPACK, so use the dense solver
+            Kd = lu.solve(np.eye(nfree))
+            lam, phi = np.linalg.eig(np.dot(Kd, Mff.toarray()))
+            lam = 1.0 / np.real(lam)
+            phi = np.real(phi)
+        elif sigma == 0.0:
+            OPinv = spla.LinearOperator((nfree, nfree), matvec=lu.solve, dtype=np.float64)
+            lam, phi = spla.eigsh(Kff, k=nM, M=Mff, sigma=0.0, which='LM', OPinv=OPinv, tol=self.tol)
+        else:
+            lam, phi = spla.eigsh(Kff, k=nM, M=Mff, sigma=sigma, which='LM', tol=self.tol)
+        isort = np.argsort(lam)[:nM]
+        lam, phi = lam[isort], phi[:,isort]
+
+        # Mass normalized shapes
+        phi /= np.sqrt(np.sum(phi * Mff.dot(phi), axis=0))[np.newaxis,:]
+        freq = np.sqrt(np.maximum(lam, 0.0)) / (2.0*np.pi)
+
+        shapes = np.zeros((self.ndof, nM))
+        shapes[free,:] = phi
+        r = np.zeros((self.ndof, 3))
+        for k in xrange(3): r[k::6,k] = 1.0
+        mpf = np.dot(shapes.T, M.dot(r))
+        nnode = self.nodes.node.size
+        S = shapes.T.reshape((nM, nnode, 6))
+        return Modes(freq, mpf[:,0], mpf[:,1], mpf[:,2], self.nodes.node,
+                     S[:,:,0], S[:,:,1], S[:,:,2], S[:,:,3], S[:,:,4], S[:,:,5])
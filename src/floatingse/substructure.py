@@ -2,7 +2,8 @@ from openmdao.api import Component
 import numpy as np
 
 from commonse import gravity, eps, DirectionVector
-from commonse.utilities import assembleI, unassembleI
+from column import profileSlice, frustumIntegrals, cumulativeVolume, fillHeight
+from inertia import parallelAxisI
 
         
 class SubstructureGeometry(Component):
@@ -75,7 +76,7 @@ class SubstructureGeometry(Component):
 
 
 class Substructure(Component):
-    def __init__(self, nFull):
+    def __init__(self, nFull, nModes=6):
         super(Substructure,self).__init__()
         # Environment
         self.add_param('water_density', val=0.0, units='kg/m**3', desc='density of water')
@@ -113,12 +114,12 @@ class Substructure(Component):
         self.add_param('auxiliary_column_moments_of_inertia', val=np.zeros(6), units='kg*m**2', desc='mass moment of inertia of column about base [xx yy zz xy xz yz]')
         self.add_param('auxiliary_column_added_mass', val=np.zeros(6), units='kg', desc='Diagonal of added mass matrix- masses are first 3 entries, moments are last 3')
         
-        self.add_param('water_ballast_mass_vector', val=np.zeros((nFull,)), units='kg', desc='mass vector of potential ballast mass')
+        self.add_param('water_ballast_radius_vector', val=np.zeros((nFull,)), units='m', desc='inner radius of column at the z-points of potential ballast mass')
         self.add_param('water_ballast_zpts_vector', val=np.zeros((nFull,)), units='m', desc='z-points of potential ballast mass')
 
         self.add_param('structural_mass', val=0.0, units='kg', desc='Mass of whole turbine except for mooring lines')
         self.add_param('structure_center_of_mass', val=np.zeros(3), units='m', desc='xyz-position of center of gravity of whole turbine')
-        self.add_param('structural_frequencies', val=np.zeros(6), units='Hz', desc='')
+        self.add_param('structural_frequencies', val=np.zeros(nModes), units='Hz', desc='')
         self.add_param('z_center_of_buoyancy', val=0.0, units='m', desc='z-position of center of gravity (x,y = 0,0)')
         self.add_param('total_displacement', val=0.0, units='m**3', desc='Total volume of water displaced by floating turbine (except for mooring lines)')
         self.add_param('total_force', val=np.zeros(3), units='N', desc='Net forces on turbine')
@@ -146,7 +147,7 @@ class Substructure(Component):
         self.add_output('hydrostatic_stiffness', val=np.zeros(6), units='N/m', desc='Summary hydrostatic stiffness of structure')
         self.add_output('natural_periods', val=np.zeros(6), units='s', desc='Natural periods of oscillation in 6 DOF')
         self.add_output('period_margin', val=np.zeros(6), desc='Margin between natural periods and wave periods')
-        self.add_output('modal_margin', val=np.zeros(6), desc='Margin between structural modes and wave periods')
+        self.add_output('modal_margin', val=np.zeros(nModes), desc='Margin between structural modes and wave periods')
         
         
         # Derivatives
@@ -184,10 +185,9 @@ class Substructure(Component):
 
         cg_struct    = params['structure_center_of_mass']
         
-        m_water_data = params['water_ballast_mass_vector']
+        r_water_data = params['water_ballast_radius_vector']
         z_water_data = params['water_ballast_zpts_vector']
         rhoWater     = params['water_density']
-        npts         = z_water_data.size
         
         # SEMI TODO: Make water_ballast in base only?  columns too?  How to apportion?
 
@@ -199,16 +199,17 @@ class Substructure(Component):
         # Output substructure total turbine mass
         unknowns['total_mass'] = m_struct + m_mooring
 
-        # Find height given interpolant functions from columns
-        if m_water_data[-1] < m_water:
+        # Find height by inverting the frustum volumes of the column profile
+        m_water_max = rhoWater * cumulativeVolume(z_water_data, r_water_data, z_water_data[-1])
+        if m_water_max < m_water:
             # Don't have enough space, so max out variable balast here and constraints will catch this
             z_end = z_water_data[-1]
-            coeff = m_water / m_water_data[-1]
+            coeff = m_water / m_water_max
         elif m_water < 0.0:
             z_end = z_water_data[0]
             coeff = 0.0
         else:
-            z_end = np.interp(m_water, m_water_data, z_water_data)
+            z_end = fillHeight(z_water_data, r_water_data, m_water / rhoWater)
             coeff = 1.0
         h_water = z_end - z_water_data[0]
         unknowns['variable_ballast_mass']   = m_water
@@ -216,8 +217,10 @@ class Substructure(Component):
 
         
         # Find cg of whole system
-        # First find cg of water variable ballast by finding midpoint of mass sum
-        z_water = np.interp(0.5*coeff*m_water, m_water_data, z_water_data)
+        # First find cg of water variable ballast from the exact volume moments up to the fill height
+        zpts, rpts = profileSlice(z_water_data, r_water_data, z_water_data[0], z_end)
+        V_water, S_water, _, _ = frustumIntegrals(rpts[:-1], rpts[1:], np.diff(zpts), zpts[:-1])
+        z_water = S_water.sum() / V_water.sum() if V_water.sum() > 0.0 else z_water_data[0]
         unknowns['center_of_mass'] = (m_struct*cg_struct + m_water*np.r_[0.0, 0.0, z_water]) / m_system
         unknowns['variable_ballast_center_of_mass'] = z_water
 
@@ -335,12 +338,9 @@ class Substructure(Component):
         radii_x   = R_semi * np.cos( np.linspace(0, 2*np.pi, ncolumn+1) )
         radii_y   = R_semi * np.sin( np.linspace(0, 2*np.pi, ncolumn+1) )
         dz_cg     = z_cg_column - z_cg_base
-        I_total   = assembleI( I_base )
-        I_column  = assembleI( I_column )
-        for k in xrange(ncolumn):
-            R        = np.array([radii_x[k], radii_y[k], dz_cg])
-            I_total += I_column + m_column*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
-        M_mat[3:] = unassembleI( I_total )[:3]
+        R         = np.c_[radii_x[:ncolumn], radii_y[:ncolumn], dz_cg*np.ones(ncolumn)]
+        I_total   = I_base + parallelAxisI(m_column, I_column, R)
+        M_mat[3:] = I_total[:3]
         unknowns['mass_matrix'] = M_mat
         
         # Add up all added mass entries in a similar way
@@ -350,17 +350,16 @@ class Substructure(Component):
 
         # Add up moments of inertia, move added mass moments from CofB to CofG
         dz_cgcb   = z_cb_base - z_cg_base
-        I_base    = assembleI( np.r_[m_a_base[3:]  , np.zeros(3)] )
+        I_base    = np.r_[m_a_base[3:]  , np.zeros(3)]
         R         = np.array([0.0, 0.0, dz_cgcb])
-        I_total   = I_base + m_a_base[0]*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
+        I_total   = parallelAxisI(m_a_base[0], I_base, R)
 
         # Add up added moments of intertia of all columns for other entries
         dz_cgcb   = z_cb_column - z_cg_base
-        I_column  = assembleI( np.r_[m_a_column[3:], np.zeros(3)] )
-        for k in xrange(ncolumn):
-            R        = np.array([radii_x[k], radii_y[k], dz_cgcb])
-            I_total += I_column + m_a_column[0]*(np.dot(R, R)*np.eye(3) - np.outer(R, R))
-        A_mat[3:] = unassembleI( I_total )[:3]
+        I_column  = np.r_[m_a_column[3:], np.zeros(3)]
+        R         = np.c_[radii_x[:ncolumn], radii_y[:ncolumn], dz_cgcb*np.ones(ncolumn)]
+        I_total  += parallelAxisI(m_a_column[0], I_column, R)
+        A_mat[3:] = I_total[:3]
         unknowns['added_mass_matrix'] = A_mat
         
         # Hydrostatic stiffness has contributions in heave (K33) and roll/pitch (K44/55)
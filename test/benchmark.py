@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the FloatingSE evaluation pipeline for fixed spar and semisubmersible reference designs,
+taken from the SparInstance and SemiInstance defaults.  The wall time, number of calls, and memory use
+of the major components and of a full run_once evaluation are written to a JSON file, so that
+performance regressions show up when comparing the files from different versions.
+
+Memory is measured per call with the best tool available (tracemalloc, then memory_profiler, psutil, and resource,
+see MEMORY_MEASURES).  Numbers from different tools are not comparable, so the tool and what its numbers mean are
+recorded in the JSON as memory_method and memory_measure.  On Python 2, install memory_profiler for per-call peaks.
+
+Usage: python benchmark.py [-n REPEAT] [-o OUTPUT] [--cache] [spar] [semi]
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import memory_profiler
+except ImportError:
+    memory_profiler = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from floatingse.spar_instance import SparInstance
+from floatingse.semi_instance import SemiInstance
+
+# Reference designs
+DESIGNS = OrderedDict([('spar', SparInstance),
+                       ('semi', SemiInstance)])
+
+# Components to time separately, by path in the FloatingSE assembly
+COMPONENTS = OrderedDict([('base.col',   'ColumnProperties'),
+                          ('base.stiff', 'StiffenerMass'),
+                          ('aux.col',    'ColumnProperties'),
+                          ('aux.stiff',  'StiffenerMass'),
+                          ('load.frame', 'FloatingFrame'),
+                          ('mm',         'MapMooring'),
+                          ('subs',       'Substructure')])
+
+# Per-call memory measure, see the module docstring
+MEMORY_MEASURES = OrderedDict([('tracemalloc', 'peak bytes allocated through the Python allocators during the call'),
+                               ('memory_profiler', 'peak sampled RSS during the call above the RSS at its start'),
+                               ('psutil', 'RSS after the call minus the RSS before it (net growth, not the peak)'),
+                               ('resource', 'growth of the process peak RSS (ru_maxrss) during the call, '
+                                            'zero while it stays below an earlier peak'),
+                               ('none', 'no memory measure is available')])
+if tracemalloc is not None:
+    MEMORY_METHOD = 'tracemalloc'
+elif (memory_profiler is not None) and (psutil is not None):
+    MEMORY_METHOD = 'memory_profiler'
+elif psutil is not None:
+    MEMORY_METHOD = 'psutil'
+elif resource is not None:
+    MEMORY_METHOD = 'resource'
+else:
+    MEMORY_METHOD = 'none'
+
+
+def find_system(root, path):
+    """Returns the subsystem of root at the dotted path"""
+    system = root
+    for name in path.split('.'):
+        system = getattr(system, name)
+    return system
+
+
+def current_rss():
+    """Resident set size (bytes) of this process"""
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def max_rss():
+    """Peak resident set size (bytes) of this process so far (ru_maxrss is in kB, except on macOS)"""
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def call_memory(func):
+    """Calls func and returns its memory use (bytes) as measured by MEMORY_METHOD, or None if there is no measure"""
+    if MEMORY_METHOD == 'tracemalloc':
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    elif MEMORY_METHOD == 'memory_profiler':
+        rss0 = current_rss()
+        peak = memory_profiler.memory_usage((func, (), {}), interval=1e-3, max_usage=True)
+        return max(int(np.max(peak) * 2**20) - rss0, 0)
+    elif MEMORY_METHOD == 'psutil':
+        rss0 = current_rss()
+        func()
+        return max(current_rss() - rss0, 0)
+    elif MEMORY_METHOD == 'resource':
+        rss0 = max_rss()
+        func()
+        return max_rss() - rss0
+    func()
+    return None
+
+
+class ComponentTimer(object):
+    """
+    Replaces the solve_nonlinear method of a component instance to accumulate wall time and calls per evaluation,
+    and optionally the largest memory use of its calls.
+    """
+    def __init__(self, component):
+        self.solve        = component.solve_nonlinear
+        self.track_memory = False
+        self.calls        = 0
+        self.time         = 0.0
+        self.memory       = None
+        self.run_times    = []
+        self.run_calls    = []
+        component.solve_nonlinear = self
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.track_memory:
+            memory = call_memory(lambda : self.solve(*args, **kwargs))
+            if memory is not None: self.memory = max(memory, self.memory or 0)
+            return
+        t0 = time.time()
+        self.solve(*args, **kwargs)
+        self.time += time.time() - t0
+
+    def end_run(self):
+        """Stores the time and calls of the evaluation just completed"""
+        self.run_times.append(self.time)
+        self.run_calls.append(self.calls)
+        self.time  = 0.0
+        self.calls = 0
+
+    def summary(self):
+        return OrderedDict([('calls_per_run', int(np.max(self.run_calls))),
+                            ('time_min', float(np.min(self.run_times))),
+                            ('time_mean', float(np.mean(self.run_times))),
+                            ('time_per_call', float(np.sum(self.run_times) / max(np.sum(self.run_calls), 1))),
+                            ('memory', self.memory)])
+
+
+def benchmark_design(myinstance, repeat=5, cache=False):
+    """Times repeated run_once evaluations of a design and the components within it
+
+    INPUTS:
+    ----------
+    myinstance : SparInstance or SemiInstance object
+    repeat     : number of timed evaluations
+    cache      : keep the mooring results cache between evaluations (otherwise every evaluation does all of the work)
+
+    OUTPUTS  : dictionary of results
+    """
+    t0 = time.time()
+    myinstance.init_problem(optFlag=False)
+    setup_time = time.time() - t0
+    prob = myinstance.prob
+    mm   = prob.root.mm
+
+    def run_once():
+        if not cache:
+            mm.properties_cache.clear()
+            mm.map_cache.clear()
+        prob.run_once()
+
+    timers = OrderedDict()
+    for path, cname in COMPONENTS.items():
+        try:
+            comp = find_system(prob.root, path)
+        except AttributeError:
+            continue
+        timers[path] = (cname, ComponentTimer(comp))
+
+    # Wall time of full evaluations and of each component within them
+    run_times = []
+    for k in range(repeat):
+        t0 = time.time()
+        run_once()
+        run_times.append(time.time() - t0)
+        for cname, timer in timers.values():
+            timer.end_run()
+
+    # Memory in separate evaluations because measuring it slows everything down
+    for cname, timer in timers.values(): timer.track_memory = True
+    run_once()
+    for cname, timer in timers.values(): timer.track_memory = False
+    run_memory = call_memory(run_once)
+
+    results = OrderedDict()
+    results['setup_time'] = setup_time
+    results['run_once']   = OrderedDict([('time_min', float(np.min(run_times))),
+                                         ('time_mean', float(np.mean(run_times))),
+                                         ('memory', run_memory)])
+    results['components'] = OrderedDict()
+    for path, (cname, timer) in timers.items():
+        results['components'][path] = OrderedDict([('class', cname)] + list(timer.summary().items()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FloatingSE evaluation pipeline')
+    parser.add_argument('designs', nargs='*', default=list(DESIGNS.keys()), choices=list(DESIGNS.keys()),
+                        help='reference designs to run')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='number of timed evaluations per design')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON output file')
+    parser.add_argument('--cache', action='store_true', help='keep mooring results cached between evaluations')
+    args = parser.parse_args()
+
+    results = OrderedDict()
+    results['date']     = time.strftime('%Y-%m-%d %H:%M:%S')
+    results['python']   = platform.python_version()
+    results['numpy']    = np.__version__
+    results['platform'] = platform.platform()
+    results['repeat']   = args.repeat
+    results['cache']    = args.cache
+    results['memory_method']  = MEMORY_METHOD
+    results['memory_measure'] = MEMORY_MEASURES[MEMORY_METHOD]
+    results['designs']  = OrderedDict()
+    print('Memory measure:', MEMORY_METHOD, '-', MEMORY_MEASURES[MEMORY_METHOD])
+    for name in args.designs:
+        print('Benchmarking', name)
+        results['designs'][name] = benchmark_design(DESIGNS[name](), args.repeat, args.cache)
+
+        res = results['designs'][name]
+        kB  = lambda x: '%12.1f' % (1e-3*x) if x is not None else '%12s' % '-'
+        print('%-12s %-18s %8s %12s %12s' % ('path', 'class', 'calls', 'time (s)', 'memory (kB)'))
+        for path, comp in res['components'].items():
+            print('%-12s %-18s %8d %12.4f %s' % (path, comp['class'], comp['calls_per_run'], comp['time_min'],
+                                                 kB(comp['memory'])))
+        print('%-12s %-18s %8d %12.4f %s' % ('run_once', '', 1, res['run_once']['time_min'], kB(res['run_once']['memory'])))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Results written to', args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+import numpy.testing as npt
+import unittest
+import floatingse.catenary as catenary
+
+# OC3-Hywind mooring system (Jonkman 2010, NREL/TP-500-47535)
+NLINES    = 3
+RFAIRLEAD = 5.2
+ZFAIRLEAD = -70.0
+RANCHOR   = 853.87
+DEPTH     = 320.0
+LENGTH    = 902.2
+WEIGHT    = 698.094
+EA        = 384.243e6
+
+class TestCatenary(unittest.TestCase):
+
+    def testJacobian(self):
+        H = np.array([1e4, 5e4, 1e5, 3e3, 2e5])
+        V = np.array([2e4, 3e5, 1.2*WEIGHT*LENGTH, 5e3, 0.99*WEIGHT*LENGTH])
+        x, z, dxdH, dxdV, dzdH, dzdV = catenary.catenary_geometry(H, V, LENGTH, WEIGHT, EA)
+        step = 1e-3
+        xHp, zHp = catenary.catenary_geometry(H+step, V, LENGTH, WEIGHT, EA)[:2]
+        xHm, zHm = catenary.catenary_geometry(H-step, V, LENGTH, WEIGHT, EA)[:2]
+        xVp, zVp = catenary.catenary_geometry(H, V+step, LENGTH, WEIGHT, EA)[:2]
+        xVm, zVm = catenary.catenary_geometry(H, V-step, LENGTH, WEIGHT, EA)[:2]
+        npt.assert_almost_equal(dxdH, 0.5*(xHp-xHm)/step, 8)
+        npt.assert_almost_equal(dxdV, 0.5*(xVp-xVm)/step, 8)
+        npt.assert_almost_equal(dzdH, 0.5*(zHp-zHm)/step, 8)
+        npt.assert_almost_equal(dzdV, 0.5*(zVp-zVm)/step, 8)
+
+    def testSolve(self):
+        H = np.array([1e4, 5e4, 1e5, 3e3, 2e5])
+        V = np.array([2e4, 3e5, 1.2*WEIGHT*LENGTH, 5e3, 0.99*WEIGHT*LENGTH])
+        x, z = catenary.catenary_geometry(H, V, LENGTH, WEIGHT, EA)[:2]
+        Hsolve, Vsolve = catenary.solve_catenary(x, z, LENGTH, WEIGHT, EA)
+        npt.assert_allclose(Hsolve, H, rtol=1e-6)
+        npt.assert_allclose(Vsolve, V, rtol=1e-6)
+
+        # Profile ends at the fairlead
+        for k in range(H.size):
+            xp, zp = catenary.catenary_profile(H[k], V[k], LENGTH, WEIGHT, EA)
+            self.assertAlmostEqual(xp[0], 0.0)
+            self.assertAlmostEqual(zp[0], 0.0)
+            self.assertAlmostEqual(xp[-1], x[k])
+            self.assertAlmostEqual(zp[-1], z[k])
+
+    def testSlack(self):
+        H, V = catenary.solve_catenary(100.0, 50.0, 200.0, WEIGHT, EA)
+        self.assertEqual(H, 0.0)
+        self.assertAlmostEqual(V, 50.0*WEIGHT)
+
+    def testStiffnessOC3(self):
+        moor = catenary.CatenaryMooring(NLINES, RFAIRLEAD, ZFAIRLEAD, RANCHOR, DEPTH, LENGTH, WEIGHT, EA)
+        F = moor.set_neutral()
+        npt.assert_almost_equal(F[:,2], F[0,2])
+        npt.assert_almost_equal(np.sqrt(F[:,0]**2 + F[:,1]**2), -F[0,0])
+        
+        # Reference values from OC3 definition document
+        K = moor.linear(1e-4)
+        npt.assert_allclose(K[0,0], 41180.0, rtol=1e-2)
+        npt.assert_allclose(K[1,1], 41180.0, rtol=1e-2)
+        npt.assert_allclose(K[2,2], 11940.0, rtol=1e-2)
+        npt.assert_allclose(K[3,3], 311.1e6, rtol=1e-2)
+        npt.assert_allclose(K[4,4], 311.1e6, rtol=1e-2)
+        npt.assert_allclose(K[5,5], 11.56e6, rtol=1e-2)
+        npt.assert_allclose(K[0,4], -2.821e6, rtol=1e-2)
+        npt.assert_allclose(K[4,0], -2.821e6, rtol=1e-2)
+
+    def testStiffnessAnalytic(self):
+        moor = catenary.CatenaryMooring(NLINES, RFAIRLEAD, ZFAIRLEAD, RANCHOR, DEPTH, LENGTH, WEIGHT, EA)
+        moor.set_neutral()
+        Kfd = moor.linear(1e-4)
+        K   = moor.stiffness()
+        npt.assert_allclose(K, Kfd, rtol=1e-6, atol=1e-6*np.abs(Kfd).max())
+
+        Kdiag = moor.stiffness(diagonal=True)
+        npt.assert_almost_equal(np.diag(Kdiag), np.diag(K))
+        npt.assert_equal(Kdiag - np.diag(np.diag(Kdiag)), 0.0)
+
+        # Slack lines only resist heave
+        dHdl, dHdh, dVdl, dVdh = catenary.line_stiffness(0.0, 50.0*WEIGHT, 200.0, WEIGHT, EA)
+        self.assertEqual(dHdl, 0.0)
+        self.assertEqual(dVdl, 0.0)
+        self.assertEqual(dVdh, WEIGHT)
+
+    def testPlot(self):
+        moor = catenary.CatenaryMooring(NLINES, RFAIRLEAD, ZFAIRLEAD, RANCHOR, DEPTH, LENGTH, WEIGHT, EA)
+        moor.set_neutral()
+        plotMat = moor.plot_matrix(20)
+        self.assertEqual(plotMat.shape, (NLINES, 20, 3))
+        npt.assert_almost_equal(plotMat[:,0,:], moor.r_anchor)
+        npt.assert_almost_equal(plotMat[:,-1,:], moor.r_fairlead, 4)
+        
+        
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestCatenary))
+    return suite
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(suite())
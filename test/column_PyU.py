@@ -9,6 +9,34 @@ NPTS = 11
 NSEC = 2
 myones = np.ones((NPTS,))
 
+def check_derivatives(comp, params, decimal=6, step=1e-7):
+    """Compares the analytic derivatives of a component to central finite differences"""
+    unknowns = {}
+    comp.solve_nonlinear(params, unknowns, None)
+    J = comp.linearize(params, unknowns, None)
+    inputs, outputs = comp.list_deriv_vars()
+    for i in inputs:
+        x0 = params[i]
+        x  = np.array(x0, dtype=np.float64).flatten()
+        for k in range(x.size):
+            h  = step * max(1.0, abs(x[k]))
+            xp = x.copy()
+            xm = x.copy()
+            xp[k] += h
+            xm[k] -= h
+            params[i] = xp.reshape(np.shape(x0))
+            up = {}
+            comp.solve_nonlinear(params, up, None)
+            params[i] = xm.reshape(np.shape(x0))
+            um = {}
+            comp.solve_nonlinear(params, um, None)
+            for o in outputs:
+                fd = (np.array(up[o], dtype=np.float64).flatten() - np.array(um[o], dtype=np.float64).flatten()) / (2*h)
+                Jk = np.reshape(J.get((o,i), np.zeros((fd.size, x.size))), (fd.size, x.size))[:,k]
+                scale = max(1.0, np.max(np.abs(fd)))
+                npt.assert_almost_equal(Jk/scale, fd/scale, decimal, err_msg='d %s / d %s[%d]' % (o, i, k))
+        params[i] = x0
+
 class TestSectional(unittest.TestCase):
     def testAll(self):
         x = np.arange(0.0, 2.1, 0.5)
@@ -18,6 +46,34 @@ class TestSectional(unittest.TestCase):
 
         y_expect = np.array([-1.0, -1.0, 1.0, -2.0, 2.0, 2.0, 2.0])
         npt.assert_array_equal(yi, y_expect)
+
+    def testFrustumIntegrals(self):
+        # Cone with its tip at the top, moments about the base
+        V, S1, S2, R4 = column.frustumIntegrals(np.array([3.0]), np.array([0.0]), np.array([6.0]), np.array([0.0]))
+        npt.assert_almost_equal(V, np.pi*9.0*6.0/3.0)
+        npt.assert_almost_equal(S1/V, 6.0/4.0)
+        npt.assert_almost_equal(S2/V, 6.0**2/10.0)
+        npt.assert_almost_equal(R4, np.pi*81.0*6.0/5.0)
+
+        # Moments about another point
+        V2, S12, S22, _ = column.frustumIntegrals(np.array([3.0]), np.array([0.0]), np.array([6.0]), np.array([-2.0]))
+        npt.assert_almost_equal(S12, S1 - 2.0*V)
+        npt.assert_almost_equal(S22, S2 - 4.0*S1 + 4.0*V)
+
+        # Cumulative volume of a cylinder on top of a frustum, and slices of the profile
+        z = np.array([0.0, 6.0, 10.0])
+        r = np.array([3.0, 1.0, 1.0])
+        Vi = column.cumulativeVolume(z, r, np.array([0.0, 6.0, 8.0, 10.0]))
+        V_cone = np.pi*6.0*(9.0 + 3.0 + 1.0)/3.0
+        npt.assert_almost_equal(Vi, [0.0, V_cone, V_cone + 2.0*np.pi, V_cone + 4.0*np.pi])
+        zs, rs = column.profileSlice(z, r, 3.0, 8.0)
+        npt.assert_equal(zs, [3.0, 6.0, 8.0])
+        npt.assert_equal(rs, [2.0, 1.0, 1.0])
+
+        # Fill heights invert the cumulative volume, in tapered and straight frustums
+        zi = np.array([0.0, 1.0, 5.5, 6.0, 7.0, 10.0])
+        npt.assert_almost_equal(column.fillHeight(z, r, column.cumulativeVolume(z, r, zi)), zi)
+        npt.assert_almost_equal(column.fillHeight(z, r[::-1], column.cumulativeVolume(z, r[::-1], zi)), zi)
         
 
 class TestBulk(unittest.TestCase):
@@ -54,13 +110,11 @@ class TestBulk(unittest.TestCase):
         I[0] += I0 + m_bulk*self.params['z_param'][3]**2
         I[1] = I[0]
         npt.assert_almost_equal(self.unknowns['bulkhead_I_keel'], I)
-    '''
+
     def testDeriv(self):
-        self.bulk.solve_nonlinear(self.params, self.unknowns, self.resid)
-        J = self.bulk.linearize(self.params, self.unknowns, self.resid)
-        self.assertEqual(J['bulkhead_mass', 'd_full'].shape, (11,11))
-        self.assertEqual(J['bulkhead_mass', 't_full'].shape, (11,11))
-    '''
+        self.params['d_full'] = np.linspace(12.0, 8.0, NPTS)
+        self.params['t_full'] = np.linspace(0.5, 0.3, NPTS)
+        check_derivatives(self.bulk, self.params)
 
         
 class TestStiff(unittest.TestCase):
@@ -118,6 +172,35 @@ class TestStiff(unittest.TestCase):
         npt.assert_equal(self.unknowns['flange_spacing_ratio'], 2*2.0/1.2)
         npt.assert_equal(self.unknowns['stiffener_radius_ratio'], 1.75/9.0)
 
+    def testDeriv(self):
+        self.params['d_full'] = np.linspace(20.0, 16.0, NPTS)
+        self.params['stiffener_spacing'] = np.array([0.13, 0.07])
+        self.params['stiffener_web_height'] = np.array([1.0, 0.8])
+        check_derivatives(self.stiff, self.params)
+
+        # Positions move with the spacing and nodes
+        self.params['stiffener_spacing'] = np.array([0.3, 0.45])
+        check_derivatives(self.stiff, self.params)
+
+    def testPositions(self):
+        # Half spacing at the bottom, then the spacing of the section each stiffener lands in
+        z_stiff, i_stiff = column.stiffenerPositions(np.array([0.0, 1.0, 2.0]), np.array([0.4, 0.3]))
+        eps = 1e-6
+        npt.assert_almost_equal(z_stiff, np.array([0.2, 0.6, 1.0, 1.3, 1.6, 1.9]) + eps*np.array([1, 2, 1, 2, 3, 4]), 12)
+        npt.assert_equal(i_stiff, [0, 0, 1, 1, 1, 1])
+
+        # Spacing larger than the column
+        z_stiff, i_stiff = column.stiffenerPositions(np.array([0.0, 1.0]), np.array([3.0]))
+        self.assertEqual(z_stiff.size, 0)
+
+        # Fine spacing over long sections
+        z_full = np.linspace(-100.0, 0.0, 13)
+        z_stiff, i_stiff = column.stiffenerPositions(z_full, 0.18*np.ones(12))
+        self.assertEqual(z_stiff.size, 556)
+        npt.assert_equal(np.diff(i_stiff) >= 0, True)
+        self.assertTrue(np.all(np.diff(z_stiff) >= 0.18))
+        npt.assert_equal(np.searchsorted(z_full, z_stiff) - 1, i_stiff)
+
 
 class TestGeometry(unittest.TestCase):
     def setUp(self):
@@ -146,6 +229,9 @@ class TestGeometry(unittest.TestCase):
         npt.assert_equal(self.unknowns['z_param'], np.array([-35.0, -15.0, 15.0]) )
         npt.assert_equal(self.unknowns['z_full'], self.params['z_full_in']-35)
         npt.assert_equal(self.unknowns['z_section'], self.params['section_center_of_mass']-35)
+
+    def testDeriv(self):
+        check_derivatives(self.geom, self.params)
         
         
         
@@ -247,6 +333,47 @@ class TestProperties(unittest.TestCase):
         self.assertAlmostEqual(cg_ballast, cg_perm)
         npt.assert_almost_equal(I_perm, I_ballast)
 
+    def testBallastTapered(self):
+        # Ballast over several sections of a tapered column, against fine grid integrals
+        self.params['d_full'] = np.linspace(24.0, 16.0, NPTS)
+        self.params['permanent_ballast_height'] = 12.0
+        self.myspar.section_mass = np.zeros(NPTS-1)
+        m_ballast, cg_ballast, I_ballast = self.myspar.compute_ballast_mass_cg(self.params, self.unknowns)
+
+        z_full = self.params['z_full']
+        R_i    = 0.5*self.params['d_full'] - self.params['t_full']
+        z      = np.linspace(z_full[0], z_full[0]+12.0, 100001)
+        r      = np.interp(z, z_full, R_i)
+        m      = 2e3 * np.pi * np.trapz(r**2, z)
+        dz     = z - z_full[0]
+        npt.assert_allclose(m_ballast, m, rtol=1e-8)
+        npt.assert_allclose(cg_ballast, 2e3 * np.pi * np.trapz(z*r**2, z) / m, rtol=1e-8)
+        npt.assert_allclose(I_ballast[0], 2e3 * np.pi * np.trapz(0.25*r**4 + dz**2*r**2, z), rtol=1e-8)
+        npt.assert_allclose(I_ballast[2], 2e3 * np.pi * np.trapz(0.5*r**4, z), rtol=1e-8)
+        self.assertAlmostEqual(self.myspar.section_mass.sum(), m_ballast, 4)
+        self.assertEqual(np.count_nonzero(self.myspar.section_mass), 3)
+
+        # Profile for the water ballast from the top of the permanent ballast, padded at the top
+        zpts = self.unknowns['variable_ballast_interp_zpts']
+        rpts = self.unknowns['variable_ballast_interp_radius']
+        self.assertEqual(zpts[0], z_full[0]+12.0)
+        npt.assert_equal(zpts[-3:], z_full[-1])
+        npt.assert_equal(np.diff(zpts) >= 0.0, True)
+        npt.assert_almost_equal(rpts, np.interp(zpts, z_full, R_i))
+        z = np.linspace(z_full[0]+12.0, z_full[-1], 100001)
+        r = np.interp(z, z_full, R_i)
+        npt.assert_allclose(column.cumulativeVolume(zpts, rpts, zpts[-1]), np.pi * np.trapz(r**2, z), rtol=1e-8)
+
+
+    def testBallastZeroHeight(self):
+        # No permanent ballast, so the water ballast profile is the whole column
+        for h in [0.0, -1.0]:
+            self.params['permanent_ballast_height'] = h
+            m_ballast, cg_ballast, I_ballast = self.myspar.compute_ballast_mass_cg(self.params, self.unknowns)
+            self.assertEqual(m_ballast, 0.0)
+            npt.assert_equal(I_ballast, 0.0)
+            npt.assert_equal(self.unknowns['variable_ballast_interp_zpts'], self.params['z_full'])
+            npt.assert_almost_equal(self.unknowns['variable_ballast_interp_radius'], 9.5)
 
     def testBalance(self):
         self.myspar.balance_column(self.params, self.unknowns)
@@ -303,6 +430,21 @@ class TestProperties(unittest.TestCase):
         self.assertEqual(self.unknowns['outfitting_cost'], 1.0 * 25.0)
         self.assertEqual(self.unknowns['total_cost'], 10.0*50.0 + 100.0*200.0 + 1.0*25.0)
 
+    def testDeriv(self):
+        # Tapered column with no node at the waterline or the top of the permanent ballast
+        self.params['freeboard'] = 13.0
+        self.set_geometry()
+        self.params['d_full'] = np.linspace(24.0, 16.0, NPTS)
+        self.params['t_full'] = np.linspace(0.6, 0.4, NPTS)
+        self.params['shell_mass'] = 5e4*np.ones(NPTS-1)
+        self.params['stiffener_mass'] = 1e4*np.ones(NPTS-1)
+        self.params['bulkhead_mass'] = np.linspace(1e3, 2e3, NPTS)
+        for k, Ik in [('shell_I_keel', 1e8), ('stiffener_I_keel', 2e7), ('bulkhead_I_keel', 5e6)]:
+            self.params[k] = Ik * np.array([1.0, 1.0, 0.5, 0.0, 0.0, 0.0])
+        self.params['permanent_ballast_height'] = 7.3
+        # Moments of inertia are large, so take larger finite difference steps to keep clear of roundoff
+        check_derivatives(self.myspar, self.params, step=1e-5)
+
         
 class TestBuckle(unittest.TestCase):
     def setUp(self):
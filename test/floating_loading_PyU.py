@@ -1,6 +1,8 @@
 import numpy as np
 import numpy.testing as npt
 import unittest
+import shutil
+import tempfile
 import floatingse.floating_loading as sP
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
@@ -110,6 +112,7 @@ class TestFrame(unittest.TestCase):
         self.params['gamma_fatigue'] = 1.755
 
         self.params['pontoon_cost_rate'] = 6.250
+        self.params['load_cases'] = []
 
         self.unknowns['pontoon_stress'] = np.zeros(50)
         
@@ -267,6 +270,204 @@ class TestFrame(unittest.TestCase):
         self.assertEqual(self.unknowns['total_moment'][-1], 20.0)
 
         
+    def testTopologyCache(self):
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = self.unknowns.copy()
+        self.assertEqual(len(self.mytruss.topology_cache), 1)
+        topo = list(self.mytruss.topology_cache.values())[0]
+
+        # Same arrangement reuses the topology
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(len(self.mytruss.topology_cache), 1)
+        self.assertEqual(self.unknowns['substructure_mass'], expect['substructure_mass'])
+        npt.assert_equal(self.unknowns['plot_matrix'], expect['plot_matrix'])
+
+        # Geometry changes only update the buffers
+        self.params['radius_to_auxiliary_column'] = 20.0
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(len(self.mytruss.topology_cache), 1)
+        npt.assert_equal(topo.nodes['x'][topo.ballastLowerID-1], 20.0*np.cos(np.linspace(0, 2*np.pi, 4))[:-1])
+
+        # New arrangements get their own topology
+        self.params['number_of_auxiliary_columns'] = 4
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.params['outer_cross_pontoons'] = False
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(len(self.mytruss.topology_cache), 3)
+
+    def testLoadCases(self):
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = self.unknowns.copy()
+        self.assertEqual(self.unknowns['tower_stress_cases'].shape, (1, NSECTIONS))
+        npt.assert_equal(self.unknowns['tower_stress_envelope'], expect['tower_stress'])
+
+        # Repeat of the inputs and a case with larger tower loads, all in the same solve
+        self.params['load_cases'] = [{}, {'tower_Px':5.0*self.params['tower_Px'], 'rna_force':[1e3, 0.0, 0.0]}]
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        for k in ['tower_stress', 'tower_shell_buckling', 'tower_global_buckling', 'pontoon_stress', 'top_deflection', 'total_force', 'total_moment']:
+            npt.assert_almost_equal(self.unknowns[k], expect[k])
+        self.assertEqual(self.unknowns['tower_stress_cases'].shape, (3, NSECTIONS))
+        self.assertEqual(self.unknowns['pontoon_stress_cases'].shape[0], 3)
+        npt.assert_almost_equal(self.unknowns['tower_stress_cases'][1,:], expect['tower_stress'])
+        npt.assert_almost_equal(self.unknowns['top_deflection_cases'][:2], expect['top_deflection'])
+        self.assertNotAlmostEqual(self.unknowns['top_deflection_cases'][2], expect['top_deflection'])
+        for k in ['tower_stress', 'tower_shell_buckling', 'tower_global_buckling', 'pontoon_stress']:
+            npt.assert_equal(self.unknowns[k+'_envelope'], self.unknowns[k+'_cases'].max(axis=0))
+        self.assertEqual(self.unknowns['total_force_cases'].shape, (3, 3))
+        npt.assert_equal(self.unknowns['total_force_cases'][0,:], self.unknowns['total_force'])
+        npt.assert_equal(self.unknowns['total_moment_cases'][0,:], self.unknowns['total_moment'])
+        npt.assert_almost_equal(self.unknowns['total_force_cases'][1,:], expect['total_force'])
+
+        self.params['load_cases'] = [{'wind_speed':10.0}]
+        self.assertRaises(ValueError, self.mytruss.solve_nonlinear, self.params, self.unknowns, self.resid)
+
+    def testModalCache(self):
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        self.mytruss = sP.FloatingFrame(NSECTIONS+1, nModes=3, modal_cache_size=4)
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = self.unknowns['structural_frequencies'].copy()
+        expect_mass = self.unknowns['structural_mass']
+        expect_cg = np.array(self.unknowns['center_of_mass'])
+        self.assertEqual(expect.size, 3)
+        self.assertEqual(self.mytruss.modal_cache.misses, 1)
+
+        # Loads only do not change the modes, or the total mass that comes with them
+        self.params['rna_force'] = 2e3*np.ones(3)
+        self.params['tower_Px'] = 2.0*self.params['tower_Px']
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(self.mytruss.modal_cache.hits, 1)
+        npt.assert_equal(self.unknowns['structural_frequencies'], expect)
+        self.assertEqual(self.unknowns['structural_mass'], expect_mass)
+        npt.assert_equal(self.unknowns['center_of_mass'], expect_cg)
+
+        # Mass and stiffness do
+        self.params['rna_mass'] = 2e3
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.params['E'] = 2.0*self.params['E']
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(self.mytruss.modal_cache.hits, 1)
+        self.assertEqual(self.mytruss.modal_cache.misses, 3)
+
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, 0)
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, 6, 3)
+
+    def testExport(self):
+        exportDir = tempfile.mkdtemp()
+        try:
+            self.mytruss = sP.FloatingFrame(NSECTIONS+1, export_path=exportDir, export_interval=2)
+            self.params['load_cases'] = [{'rna_force':np.array([2e3, 0.0, 0.0])}]
+            for k in range(3):
+                self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+            self.assertEqual(self.mytruss.evaluations, 3)
+
+            index = sP.read_frame_export(exportDir)
+            self.assertEqual(index.size, 1)
+            self.assertEqual(index['evaluation'][0], 2)
+            self.assertAlmostEqual(index['substructure_mass'][0], self.unknowns['substructure_mass'])
+
+            data = sP.read_frame_export(exportDir, 2)
+            self.assertEqual(data['evaluation'], 2)
+            self.assertEqual(data['elements'].dtype, sP.ELEMENT_DTYPE)
+            self.assertEqual(data['trapezoidal_loads'].shape[0], 2)
+            npt.assert_equal(data['point_loads'][:,0], [self.params['rna_force'][0], 2e3])
+            npt.assert_equal(data['params/E'], self.params['E'])
+            npt.assert_equal(data['unknowns/tower_stress_cases'], self.unknowns['tower_stress_cases'])
+            self.assertEqual(data['displacements'].shape[0], 2)
+        finally:
+            shutil.rmtree(exportDir)
+
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, export_interval=0)
+
+    def testSparseSolver(self):
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = dict( (k, np.array(v)) for k, v in self.unknowns.items() )
+
+        mysparse = sP.FloatingFrame(NSECTIONS+1, frame_solver='sparse')
+        mysparse.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertAlmostEqual(self.unknowns['structural_mass'], expect['structural_mass'], 4)
+
+        # Same element and load models as Frame3DD, so the deflections, reactions, and end forces (through the
+        # stresses) agree to the round-off of the static solves
+        for k in ['top_deflection_cases', 'total_force_cases', 'total_moment_cases', 'center_of_mass_moment_cases',
+                  'pontoon_stress_cases', 'tower_stress_cases', 'tower_shell_buckling_cases', 'tower_global_buckling_cases']:
+            npt.assert_allclose(self.unknowns[k], expect[k], rtol=1e-6, atol=1e-6*np.abs(expect[k]).max(), err_msg=k)
+
+        # Frame3DD stops its subspace iteration at the mode shape tolerance, see sparse_frame
+        npt.assert_allclose(self.unknowns['structural_frequencies'], expect['structural_frequencies'], rtol=1e-4)
+
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, frame_solver='ansys')
+
+    def testInternalForces(self):
+        # Cantilever fixed at N1 under a uniform transverse load, one element and one load case
+        q, L = 2e3, 5.0
+        Q1 = np.array([[[0.0, 0.0, -q*L, 0.0, 0.5*q*L*L, 0.0]]])
+        stations = np.linspace(0.0, 1.0, 5)
+        s = stations * L
+        F = sP.element_internal_forces(Q1, np.array([L]), stations, [(np.zeros((1,1,3)), L*np.ones((1,1,3)),
+                                                                     np.array([[[0.0, 0.0, q]]]), np.array([[[0.0, 0.0, q]]]))])
+        self.assertEqual(F.shape, (1, 1, 5, 6))
+        npt.assert_almost_equal(F[0,0,:,2], q*(L-s))
+        npt.assert_almost_equal(F[0,0,:,4], -0.5*q*(L-s)**2)
+        npt.assert_equal(F[0,0,:,[0,1,3,5]], 0.0)
+
+        # Same total load as a triangle over the second half of the element
+        Q1 = np.array([[[0.0, 0.0, -0.5*q*L, 0.0, 0.5*q*L*(5.0*L/6.0), 0.0]]])
+        F = sP.element_internal_forces(Q1, np.array([L]), stations, [(0.5*L*np.ones((1,1,3)), L*np.ones((1,1,3)),
+                                                                     np.zeros((1,1,3)), np.array([[[0.0, 0.0, 2*q]]]))])
+        npt.assert_almost_equal(F[0,0,:3,2], 0.5*q*L)
+        npt.assert_almost_equal(F[0,0,3,2], 0.375*q*L)
+        npt.assert_almost_equal(F[0,0,-1,[2,4]], 0.0, 8)
+
+    def testStressStations(self):
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        self.params['load_cases'] = [{'rna_force':np.array([2e3, 0.0, 0.0])}]
+        mysparse = sP.FloatingFrame(NSECTIONS+1, frame_solver='sparse')
+        mysparse.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = dict( (k, np.array(v)) for k, v in self.unknowns.items() )
+
+        # Stations include the N2 end, so the peaks along the elements can only be higher
+        mysparse = sP.FloatingFrame(NSECTIONS+1, frame_solver='sparse', stress_stations=5)
+        mysparse.solve_nonlinear(self.params, self.unknowns, self.resid)
+        for k in ['pontoon_stress_cases', 'tower_stress_cases', 'tower_shell_buckling_cases', 'tower_global_buckling_cases']:
+            self.assertEqual(self.unknowns[k].shape, expect[k].shape)
+            self.assertTrue(np.all(self.unknowns[k] >= expect[k] - 1e-10))
+        npt.assert_equal(self.unknowns['top_deflection_cases'], expect['top_deflection_cases'])
+
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, stress_stations=0)
+
+    def testFrameMesh(self):
+        u, overlap = sP.frame_mesh(16, 6)
+        npt.assert_equal(u, [0.0, 3.0, 6.0, 9.0, 12.0, 15.0])
+        npt.assert_equal(overlap.sum(axis=1), 1)
+        npt.assert_equal(np.nonzero(overlap)[1], np.repeat(np.arange(5), 3))
+        u, overlap = sP.frame_mesh(6, 11)
+        npt.assert_equal(overlap.sum(axis=1), 2)
+        x = np.array([1.0, 2.0, 4.0, 8.0, 16.0])
+        npt.assert_almost_equal(sP.interp_sectional(x, u).sum(), x.sum())
+        npt.assert_almost_equal(sP.interp_sectional(x, u)[:2], 0.5)
+        npt.assert_equal(sP.interp_nodal(np.r_[0.0, x], u)[1::2], np.r_[0.5, 0.5*(x[:-1]+x[1:])])
+
+        self.params['auxiliary_z_full'] = np.array([-15.0, -10.0, -5.0, 0.0, 2.5, 3.0])
+        mysparse = sP.FloatingFrame(NSECTIONS+1, frame_solver='sparse')
+        mysparse.solve_nonlinear(self.params, self.unknowns, self.resid)
+        expect = dict( (k, np.array(v)) for k, v in self.unknowns.items() )
+
+        # Coarser and finer frame meshes keep the masses and the shapes of the outputs
+        for nFrame in [3, 4*NSECTIONS+1]:
+            mysparse = sP.FloatingFrame(NSECTIONS+1, frame_solver='sparse', nFrame=nFrame)
+            mysparse.solve_nonlinear(self.params, self.unknowns, self.resid)
+            self.assertEqual(self.unknowns['frame_failure'], '')
+            self.assertAlmostEqual(self.unknowns['substructure_mass'], expect['substructure_mass'], 6)
+            self.assertAlmostEqual(self.unknowns['structural_mass'], expect['structural_mass'], 6)
+            for k in ['tower_stress', 'tower_shell_buckling', 'tower_global_buckling', 'tower_stress_cases', 'base_connection_ratio']:
+                self.assertEqual(self.unknowns[k].shape, expect[k].shape)
+        npt.assert_allclose(self.unknowns['structural_frequencies'][:2], expect['structural_frequencies'][:2], rtol=0.05)
+
+        self.assertRaises(ValueError, sP.FloatingFrame, NSECTIONS+1, nFrame=1)
+
     def testBadInput(self):
         self.params['number_of_auxiliary_columns'] = 1
         self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
@@ -279,11 +480,33 @@ class TestFrame(unittest.TestCase):
         self.params['number_of_auxiliary_columns'] = 8
         self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
         self.assertEqual(self.unknowns['substructure_mass'], 1e30)
+        self.assertEqual(self.unknowns['frame_failure'], 'column_count')
+        self.assertEqual(self.mytruss.failure_counts['column_count'], 3)
+
+        self.params['number_of_auxiliary_columns'] = 3
+        self.params['cross_attachment_pontoons'] = self.params['lower_attachment_pontoons'] = self.params['upper_attachment_pontoons'] = False
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(self.unknowns['frame_failure'], 'attachment_pontoons')
+        self.params['lower_attachment_pontoons'] = True
+
+        for k, val in [('tower_t_full', -0.5), ('base_d_full', 0.0), ('pontoon_wall_thickness', 1.5), ('E', np.nan)]:
+            orig = self.params[k]
+            self.params[k] = val * np.ones(np.shape(orig))
+            self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+            self.assertEqual(self.unknowns['substructure_mass'], 1e30)
+            self.assertEqual(self.unknowns['frame_failure'], 'section_properties')
+            self.params[k] = orig
+        self.assertEqual(self.mytruss.failure_counts['section_properties'], 4)
+        self.assertGreater(self.mytruss.failure_time, 0.0)
+
+        self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
+        self.assertEqual(self.unknowns['frame_failure'], '')
 
         self.params['number_of_auxiliary_columns'] = 3
         self.params['base_z_full'][-2] = self.params['base_z_full'][-3] + 1e-12
         self.mytruss.solve_nonlinear(self.params, self.unknowns, self.resid)
         self.assertEqual(self.unknowns['substructure_mass'], 1e30)
+        self.assertEqual(self.unknowns['frame_failure'], 'frame_solve')
         
     def testCombinations(self):
         self.params['radius_to_auxiliary_column'] = 30.0
@@ -0,0 +1,46 @@
+import numpy as np
+import numpy.testing as npt
+import unittest
+import floatingse.inertia as inertia
+
+
+def assemble(I):
+    return np.array([[I[0], I[3], I[4]], [I[3], I[1], I[5]], [I[4], I[5], I[2]]])
+
+class TestInertia(unittest.TestCase):
+
+    def testPointMasses(self):
+        # Unit masses on each axis about the origin
+        R = np.eye(3)
+        npt.assert_equal(inertia.parallelAxisI(1.0, np.zeros(6), R), [2.0, 2.0, 2.0, 0.0, 0.0, 0.0])
+
+        # Single body with a diagonal offset
+        I = inertia.parallelAxisI(2.0, [1.0, 2.0, 3.0, 0.0, 0.0, 0.0], [1.0, 2.0, 3.0])
+        npt.assert_almost_equal(I, [1.0+26.0, 2.0+20.0, 3.0+10.0, -4.0, -6.0, -12.0])
+
+        # No bodies
+        npt.assert_equal(inertia.parallelAxisI(np.zeros(0), np.zeros((0,6)), np.zeros((0,3))), np.zeros(6))
+
+    def testLoop(self):
+        np.random.seed(5)
+        n    = 20
+        m    = np.random.rand(n)
+        I_cg = np.random.rand(n, 6)
+        R    = np.random.randn(n, 3)
+
+        I_loop = np.zeros((3,3))
+        for k in range(n):
+            I_loop += assemble(I_cg[k]) + m[k]*(np.dot(R[k], R[k])*np.eye(3) - np.outer(R[k], R[k]))
+        I_loop = np.r_[np.diag(I_loop), I_loop[0,1], I_loop[0,2], I_loop[1,2]]
+
+        npt.assert_almost_equal(inertia.parallelAxisI(m, I_cg, R), I_loop, 12)
+        npt.assert_almost_equal(inertia.parallelAxisI(m, I_cg[0], R), I_loop + (n*I_cg[0] - I_cg.sum(axis=0)), 12)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestInertia))
+    return suite
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(suite())
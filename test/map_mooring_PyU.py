@@ -106,6 +106,48 @@ class TestMapMooring(unittest.TestCase):
 
     def testSetProperties(self):
         pass
+
+    def testLineRegistry(self):
+        D     = np.array([0.05, 0.1, 0.2])
+        types = np.array(mapMooring.LINE_TYPES)
+        props = mapMooring.mooring_line_properties(D[:,np.newaxis], types[np.newaxis,:])
+        for name in mapMooring.LINE_PROPERTIES:
+            self.assertEqual(props[name].shape, (3,5))
+
+        for i in xrange(D.size):
+            for j in xrange(types.size):
+                self.params['mooring_diameter'] = D[i]
+                self.params['mooring_type'] = types[j].lower()
+                self.mymap.set_properties(self.params)
+                for name in mapMooring.LINE_PROPERTIES:
+                    self.assertAlmostEqual(props[name][i,j], getattr(self.mymap, name))
+
+        self.assertRaises(ValueError, mapMooring.mooring_line_properties, 0.1, 'rope')
+
+    def testLineRegistrySmallDiameter(self):
+        # Only the chain fit is floored, the D^2 breaking load fits keep going to zero
+        D     = np.array([1e-4, 1e-3, 3e-3, 0.05])
+        props = mapMooring.mooring_line_properties(D[:,np.newaxis], np.array(mapMooring.LINE_TYPES)[np.newaxis,:])
+        mbl   = props['min_break_load']
+        npt.assert_allclose(mbl[:,0], 1e3*np.maximum(1.0, -5445.2957034820683+176972.68498888266*D))
+        npt.assert_allclose(mbl[:,1], 139357e3 * D**2)
+        npt.assert_allclose(mbl[:,2], 170466e3 * D**2)
+        npt.assert_allclose(mbl[:,3], 584175e3 * D**2)
+        npt.assert_allclose(mbl[:,4], 633358e3 * D**2)
+        self.assertLess(mbl[0,1], 1e3)
+
+    def testSystemCostScreen(self):
+        for anchor in ['suctionpile', 'dragembedment']:
+            self.params['anchor_type'] = anchor
+            self.mymap.set_properties(self.params)
+            self.mymap.compute_cost(self.params, self.unknowns)
+            mbl, anchor_cost, mooring_cost = mapMooring.mooring_system_cost(
+                [0.05, 0.1], 'chain', anchor, 3, self.mymap.scope, self.params['drag_embedment_extra_length'],
+                self.params['mooring_cost_rate'])
+            self.assertAlmostEqual(mbl[0], self.mymap.min_break_load)
+            self.assertAlmostEqual(anchor_cost[0], self.unknowns['anchor_cost'])
+            self.assertAlmostEqual(mooring_cost[0], self.unknowns['mooring_cost'])
+            self.assertGreater(mooring_cost[1], mooring_cost[0])
     '''
     def testWriteLineDict(self):
         self.mymap.write_line_dictionary(self.params)
@@ -149,6 +191,202 @@ class TestMapMooring(unittest.TestCase):
     def testRunMap(self):
         self.mymap.runMAP(self.params, self.unknowns)
 
+    def testRunMapSymmetric(self):
+        self.mymap.runMAP(self.params, self.unknowns)
+        myfull = mapMooring.MapMooring(sweep='full')
+        myfull.set_properties(self.params)
+        myfull.set_geometry(self.params, self.unknowns)
+        fullUnknowns = {'plot_matrix':np.zeros((15,20,3))}
+        myfull.runMAP(self.params, fullUnknowns)
+
+        self.assertEqual(self.mymap.offset_tension.shape, (180, 3))
+        self.assertEqual(self.mymap.offset_restoring_force.shape, (180, 3))
+        npt.assert_almost_equal(self.mymap.offset_tension, myfull.offset_tension, decimal=2)
+        npt.assert_almost_equal(self.mymap.offset_restoring_force, myfull.offset_restoring_force, decimal=2)
+        self.assertAlmostEqual(self.unknowns['axial_unity'], fullUnknowns['axial_unity'])
+        self.assertAlmostEqual(self.unknowns['max_offset_restoring_force'], fullUnknowns['max_offset_restoring_force'], 2)
+
+    def testRunMapAdaptive(self):
+        self.mymap.runMAP(self.params, self.unknowns)
+        myadapt = mapMooring.MapMooring(sweep='adaptive', heading_tol=0.01)
+        myadapt.set_properties(self.params)
+        myadapt.set_geometry(self.params, self.unknowns)
+        adaptUnknowns = {'plot_matrix':np.zeros((15,20,3))}
+        myadapt.runMAP(self.params, adaptUnknowns)
+
+        # Search solves fewer headings, but finds extremes at least as severe as the fixed grid
+        self.assertLess(myadapt.offset_tension.shape[0], 180)
+        self.assertEqual(myadapt.offset_tension.shape, myadapt.offset_restoring_force.shape)
+        self.assertGreaterEqual(adaptUnknowns['axial_unity'], self.unknowns['axial_unity'] - 1e-10)
+        self.assertLessEqual(adaptUnknowns['max_offset_restoring_force'], self.unknowns['max_offset_restoring_force'] + 1e-6)
+        npt.assert_allclose(adaptUnknowns['axial_unity'], self.unknowns['axial_unity'], rtol=1e-3)
+        npt.assert_allclose(adaptUnknowns['max_offset_restoring_force'], self.unknowns['max_offset_restoring_force'], rtol=1e-3)
+
+        self.assertRaises(ValueError, mapMooring.MapMooring, sweep='adaptive', heading_tol=0.0)
+
+    def testRunCatenary(self):
+        mycat = mapMooring.MapMooring(solver='catenary')
+        mycat.set_properties(self.params)
+        mycat.set_geometry(self.params, self.unknowns)
+        mycat.runMAP(self.params, self.unknowns)
+
+        # Lines of this design are slack, so they hang vertically from the fairlead
+        w = mycat.line_weight(self.params)
+        h = self.params['water_depth'] - self.params['fairlead']
+        self.assertAlmostEqual(self.unknowns['vertical_load'], 3*w*h)
+        self.assertAlmostEqual(self.unknowns['mooring_effective_mass'], 3*w*h/g)
+        self.assertEqual(self.unknowns['mooring_stiffness'].shape, (6,6))
+        self.assertGreater(self.unknowns['mooring_stiffness'][2,2], 0.0)
+        self.assertGreater(self.unknowns['axial_unity'], 0.0)
+        npt.assert_almost_equal(self.unknowns['plot_matrix'][:3,0,2], -self.params['water_depth'])
+        npt.assert_almost_equal(self.unknowns['plot_matrix'][:3,-1,2], -self.params['fairlead'])
+
+    def testLineWeight(self):
+        # Weight in water from the MAP++ mass density in air less the buoyancy of the line diameter
+        rho = self.params['water_density']
+        D   = self.params['mooring_diameter']
+        for ltype in ['chain', 'iwrc', 'nylon']:
+            self.params['mooring_type'] = ltype
+            self.mymap.set_properties(self.params)
+            self.mymap.write_input_file(self.params)
+            air_mass = float(self.mymap.finput[3].split()[2])
+            self.assertAlmostEqual(self.mymap.line_weight(self.params) / ((air_mass - rho*0.25*np.pi*D**2)*g), 1.0, 5)
+
+    def testCatenaryMatchesMap(self):
+        # OC3-Hywind like taut system, where the line weight changes the tensions and offsets
+        self.params['water_depth'] = 320.0
+        self.params['fairlead'] = 70.0
+        self.params['fairlead_radius'] = 5.2
+        self.params['anchor_radius'] = 853.87
+        self.params['scope_ratio'] = 902.2 / 250.0
+        self.params['mooring_diameter'] = 0.09
+        for ltype in ['chain', 'iwrc']:
+            self.params['mooring_type'] = ltype
+            results = {}
+            for solver in ['map', 'catenary']:
+                mymoor = mapMooring.MapMooring(solver=solver, sweep='full', stiffness='linear')
+                mymoor.set_properties(self.params)
+                unknowns = {'plot_matrix':np.zeros((15,20,3))}
+                mymoor.set_geometry(self.params, unknowns)
+                mymoor.runMAP(self.params, unknowns)
+                results[solver] = unknowns
+
+            cat, ref = results['catenary'], results['map']
+            npt.assert_allclose(cat['vertical_load'], ref['vertical_load'], rtol=1e-5)
+            npt.assert_allclose(cat['axial_unity'], ref['axial_unity'], rtol=1e-5)
+            npt.assert_allclose(cat['max_offset_restoring_force'], ref['max_offset_restoring_force'], rtol=1e-5)
+            npt.assert_allclose(cat['max_heel_restoring_force'], ref['max_heel_restoring_force'], rtol=1e-5,
+                                atol=1e-5*np.abs(ref['max_heel_restoring_force']).max())
+            npt.assert_allclose(cat['plot_matrix'], ref['plot_matrix'], rtol=1e-5, atol=1e-3)
+            npt.assert_allclose(cat['mooring_stiffness'], ref['mooring_stiffness'], rtol=1e-3,
+                                atol=1e-3*np.abs(ref['mooring_stiffness']).max())
+
+    def testCache(self):
+        mymap = mapMooring.MapMooring(cache_size=2)
+        mymap.solve_nonlinear(self.params, self.unknowns, None)
+        expect = self.unknowns.copy()
+        self.assertEqual(mymap.cache_info()['map_misses'], 1)
+        self.assertEqual(mymap.cache_info()['map_hits'], 0)
+
+        # Inputs that MAP does not see reuse the stored results
+        self.params['mooring_cost_rate'] = 2.0
+        mymap.solve_nonlinear(self.params, self.unknowns, None)
+        self.assertEqual(mymap.cache_info()['map_hits'], 1)
+        self.assertEqual(mymap.cache_info()['properties_hits'], 1)
+        self.assertEqual(self.unknowns['axial_unity'], expect['axial_unity'])
+        npt.assert_equal(self.unknowns['mooring_stiffness'], expect['mooring_stiffness'])
+        self.assertAlmostEqual(self.unknowns['mooring_cost'], 2.0/1.1*expect['mooring_cost'])
+
+        # Inputs that MAP does see are solved again
+        self.params['max_offset'] = 15.0
+        mymap.solve_nonlinear(self.params, self.unknowns, None)
+        self.assertEqual(mymap.cache_info()['map_misses'], 2)
+        self.assertEqual(mymap.cache_info()['properties_hits'], 2)
+
+    def testLazyPlot(self):
+        mymap = mapMooring.MapMooring()
+        mymap.solve_nonlinear(self.params, self.unknowns, None)
+        expect = self.unknowns['plot_matrix'].copy()
+        npt.assert_almost_equal(mymap.get_plot_matrix(), expect)
+
+        # Line shapes are skipped during analysis and computed on request
+        mylazy = mapMooring.MapMooring(lazy_plot=True)
+        self.assertRaises(RuntimeError, mylazy.get_plot_matrix)
+        lazyUnknowns = {'plot_matrix':np.zeros((15,20,3))}
+        mylazy.solve_nonlinear(self.params, lazyUnknowns, None)
+        npt.assert_equal(lazyUnknowns['plot_matrix'], 0.0)
+        self.assertEqual(lazyUnknowns['axial_unity'], self.unknowns['axial_unity'])
+        npt.assert_almost_equal(mylazy.get_plot_matrix(), expect)
+        self.assertEqual(mylazy.get_plot_matrix(npts=5).shape, (15,5,3))
+
+        # Cached results still give the line shapes of the current design
+        self.params['max_offset'] = 15.0
+        mylazy.solve_nonlinear(self.params, lazyUnknowns, None)
+        self.params['max_offset'] = 10.0
+        mylazy.solve_nonlinear(self.params, lazyUnknowns, None)
+        self.assertEqual(mylazy.cache_info()['map_hits'], 1)
+        npt.assert_almost_equal(mylazy.get_plot_matrix(), expect)
+
+    def testCacheEviction(self):
+        cache = mapMooring.ResultCache(2, 'lru')
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEqual(cache.get(1), 'a')
+        cache.put(3, 'c')
+        self.assertEqual(list(cache.entries.keys()), [1, 3])
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        cache = mapMooring.ResultCache(2, 'fifo')
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEqual(cache.get(1), 'a')
+        cache.put(3, 'c')
+        self.assertEqual(list(cache.entries.keys()), [2, 3])
+
+    def testStiffnessModes(self):
+        # OC3-Hywind like taut system
+        self.params['water_depth'] = 320.0
+        self.params['fairlead'] = 70.0
+        self.params['fairlead_radius'] = 5.2
+        self.params['anchor_radius'] = 853.87
+        self.params['scope_ratio'] = 902.2 / 250.0
+        self.params['mooring_diameter'] = 0.09
+        for ltype in ['chain', 'iwrc']:
+            self.params['mooring_type'] = ltype
+            K = {}
+            for mode in ['linear', 'analytic', 'diagonal']:
+                mymap = mapMooring.MapMooring(stiffness=mode)
+                mymap.set_properties(self.params)
+                mymap.set_geometry(self.params, self.unknowns)
+                mymap.runMAP(self.params, self.unknowns)
+                K[mode] = self.unknowns['mooring_stiffness'].copy()
+
+            # Full matrix including the surge-pitch and sway-roll coupling, relative to the diagonal stiffnesses
+            scale = np.sqrt(np.outer(np.diag(K['linear']), np.diag(K['linear'])))
+            npt.assert_allclose(K['analytic']/scale, K['linear']/scale, rtol=1e-3, atol=1e-3)
+            self.assertGreater(np.abs(K['linear'][0,4]/scale[0,4]), 1e-2)
+            npt.assert_almost_equal(np.diag(K['diagonal']), np.diag(K['analytic']))
+            npt.assert_equal(K['diagonal'] - np.diag(np.diag(K['diagonal'])), 0.0)
+
+        # MAP++ linearization is the default
+        self.assertEqual(mapMooring.MapMooring().stiffness, 'linear')
+
+    def testRunMapWorkers(self):
+        self.mymap.runMAP(self.params, self.unknowns)
+        myparallel = mapMooring.MapMooring(n_workers=2)
+        myparallel.set_properties(self.params)
+        myparallel.set_geometry(self.params, self.unknowns)
+        parUnknowns = {'plot_matrix':np.zeros((15,20,3))}
+        myparallel.runMAP(self.params, parUnknowns)
+        myparallel.close_executor()
+        self.assertIsNone(myparallel.executor)
+
+        npt.assert_almost_equal(myparallel.offset_tension, self.mymap.offset_tension, decimal=2)
+        npt.assert_almost_equal(parUnknowns['max_heel_restoring_force'], self.unknowns['max_heel_restoring_force'], decimal=2)
+        self.assertAlmostEqual(parUnknowns['axial_unity'], self.unknowns['axial_unity'], 4)
+
     def testCost(self):
         self.mymap.compute_cost(self.params, self.unknowns)
     
@@ -2,7 +2,10 @@ import unittest
 
 import column_PyU
 import map_mooring_PyU
+import catenary_PyU
+import inertia_PyU
 import floating_loading_PyU
+import sparse_frame_PyU
 import substructure_PyU
 
 import numpy as np
@@ -11,7 +14,10 @@ import numpy.testing as npt
 def suiteAll():
     suite = unittest.TestSuite( (column_PyU.suite(),
                                  map_mooring_PyU.suite(),
+                                 catenary_PyU.suite(),
+                                 inertia_PyU.suite(),
                                  floating_loading_PyU.suite(),
+                                 sparse_frame_PyU.suite(),
                                  substructure_PyU.suite()
     ) )
     return suite
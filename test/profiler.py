@@ -1,11 +1,9 @@
 import cProfile
 import pstats
 
-import floatingse.floating as ff
-import floatingse.semiInstance as se
+import floatingse.semi_instance as se
 
-#cProfile.run('ff.semiExample()','profout')
-cProfile.run('se.psqp_optimal()','profout')
+cProfile.run('se.SemiInstance().evaluate()','profout')
 p = pstats.Stats('profout')
 n = 40
 # Clean up filenames for the report
@@ -13,5 +11,3 @@ p.strip_dirs()
 
 p.sort_stats('cumulative').print_stats(n)
 p.sort_stats('time').print_stats(n)
-
-
@@ -0,0 +1,131 @@
+import numpy as np
+import numpy.testing as npt
+import unittest
+import floatingse.sparse_frame as sf
+
+# Steel tube cantilever
+E    = 2e11
+G    = 8e10
+RHO  = 7850.0
+D    = 1.0
+T    = 0.02
+L    = 10.0
+AREA = np.pi*(D*T - T*T)
+I    = np.pi/64.0*(D**4 - (D-2*T)**4)
+AS   = 0.5*AREA
+
+def cantilever(nelem, direction=np.array([1.0, 0.0, 0.0]), shear=True):
+    s      = np.linspace(0.0, L, nelem+1)
+    nodes  = sf.NodeData(np.arange(1, nelem+2), s*direction[0], s*direction[1], s*direction[2], np.zeros(nelem+1))
+    reacts = sf.ReactionData([1], [1], [1], [1], [1], [1], [1], rigid=1)
+    ones   = np.ones(nelem)
+    elems  = sf.ElementData(np.arange(1, nelem+1), np.arange(1, nelem+1), np.arange(2, nelem+2), AREA*ones, AS*ones, AS*ones,
+                            2*I*ones, I*ones, I*ones, E*ones, G*ones, 0*ones, RHO*ones)
+    return sf.Frame(nodes, reacts, elems, sf.Options(shear, False, -1))
+
+
+class TestSparseFrame(unittest.TestCase):
+
+    def testPointLoad(self):
+        P = 1e4
+        myframe = cantilever(10)
+        load = sf.StaticLoadCase(0.0, 0.0, 0.0)
+        load.changePointLoads([11], [0.0], [0.0], [-P], [0.0], [0.0], [0.0])
+        myframe.addLoadCase(load)
+        disp, forces, reacts, internal, mass, modal = myframe.run()
+
+        # Timoshenko beam tip deflection
+        self.assertAlmostEqual(disp.dz[0,-1], -P*L**3/(3*E*I) - P*L/(G*AS), 12)
+        npt.assert_almost_equal(reacts.Fz[0,:], P, 6)
+        npt.assert_almost_equal(reacts.Myy[0,:], -P*L, 6)
+        self.assertAlmostEqual(forces.Myy[0,0], -P*L, 6)
+        self.assertAlmostEqual(forces.Myy[0,-1], 0.0, 6)
+        self.assertIsNone(modal)
+
+    def testDistributedLoads(self):
+        q = 2e3
+        n = 10
+        Le = L / n
+        z = np.zeros(n)
+        o = np.ones(n)
+        for direction in [np.array([0.0, 0.0, 1.0]), np.array([0.3, 0.4, np.sqrt(0.75)])]:
+            myframe = cantilever(n, direction)
+            uniform = sf.StaticLoadCase(0.0, 0.0, 0.0)
+            uniform.changeUniformLoads(np.arange(1, n+1), z, q*o, z)
+            trapezoid = sf.StaticLoadCase(0.0, 0.0, 0.0)
+            trapezoid.changeTrapezoidalLoads(np.arange(1, n+1), z, Le*o, z, z, z, Le*o, q*o, q*o, z, Le*o, z, z)
+            myframe.addLoadCase(uniform)
+            myframe.addLoadCase(trapezoid)
+            disp, forces, reacts, internal, mass, modal = myframe.run()
+
+            tip = np.sqrt(disp.dx[:,-1]**2 + disp.dy[:,-1]**2 + disp.dz[:,-1]**2)
+            npt.assert_almost_equal(tip, q*L**4/(8*E*I) + q*L**2/(2*G*AS), 12)
+            npt.assert_almost_equal(np.sqrt(reacts.Fx**2 + reacts.Fy**2 + reacts.Fz**2).flatten(), q*L, 6)
+
+    def testPartialTrapezoid(self):
+        # Load over part of one element matches a fine mesh
+        coarse = cantilever(1)
+        load = sf.StaticLoadCase(0.0, 0.0, 0.0)
+        load.changeTrapezoidalLoads([1], [0], [0], [0], [0], [2.0], [7.0], [1e3], [3e3], [0], [0], [0], [0])
+        coarse.addLoadCase(load)
+        disp1 = coarse.run()[0]
+
+        n  = 50
+        xs = np.linspace(0.0, L, n+1)[:-1]
+        z  = np.zeros(n)
+        x1 = np.clip(2.0-xs, 0.0, L/n)
+        x2 = np.clip(7.0-xs, 0.0, L/n)
+        w  = lambda x: 1e3 + 2e3*(x-2.0)/5.0
+        fine = cantilever(n)
+        load = sf.StaticLoadCase(0.0, 0.0, 0.0)
+        load.changeTrapezoidalLoads(np.arange(1, n+1), z, z, z, z, x1, x2, w(xs+x1), w(xs+x2), z, z, z, z)
+        fine.addLoadCase(load)
+        disp2 = fine.run()[0]
+
+        self.assertAlmostEqual(disp1.dy[0,-1], disp2.dy[0,-1], 12)
+        self.assertAlmostEqual(disp1.dzrot[0,-1], disp2.dzrot[0,-1], 12)
+
+    def testModes(self):
+        myframe = cantilever(40, shear=False)
+        myframe.enableDynamics(6, 1, 0, 1e-9, 0.0)
+        myframe.addLoadCase( sf.StaticLoadCase(0.0, 0.0, -9.81) )
+        disp, forces, reacts, internal, mass, modal = myframe.run()
+
+        m = RHO*AREA*L
+        self.assertAlmostEqual(mass.total_mass, m, 6)
+        npt.assert_almost_equal(reacts.Fz[0,:], m*9.81, 5)
+
+        # Euler-Bernoulli first bending (in both planes) and first torsion frequencies
+        f_bend = 1.875104**2 / (2*np.pi) * np.sqrt(E*I/(RHO*AREA*L**4))
+        f_tors = 0.25/L * np.sqrt(G/RHO)
+        npt.assert_allclose(modal.freq[:2], f_bend, rtol=5e-3)
+        self.assertAlmostEqual(modal.freq[4]/f_tors, 1.0, 3)
+
+    def testExtraMass(self):
+        myframe = cantilever(5)
+        myframe.changeExtraNodeMass([6], [1e3], [1.0], [1.0], [1.0], [0.0], [0.0], [0.0], [0.0], [0.0], [2.0], True)
+        myframe.addLoadCase( sf.StaticLoadCase(0.0, 0.0, -9.81) )
+        disp, forces, reacts, internal, mass, modal = myframe.run()
+
+        m = RHO*AREA*L
+        self.assertAlmostEqual(mass.total_mass, m + 1e3, 6)
+        npt.assert_almost_equal(reacts.Fz[0,:], (m + 1e3)*9.81, 5)
+        npt.assert_almost_equal(reacts.Myy[0,:], -(0.5*m + 1e3)*9.81*L, 4)
+
+    def testBadInput(self):
+        self.assertRaises(ValueError, sf.Options, True, True, -1)
+
+        # Unsupported structure
+        myframe = cantilever(2)
+        myframe.reactions = sf.ReactionData([1], [0], [0], [0], [0], [0], [0], rigid=1)
+        myframe.addLoadCase( sf.StaticLoadCase(0.0, 0.0, -9.81) )
+        self.assertRaises(RuntimeError, myframe.run)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSparseFrame))
+    return suite
+
+if __name__ == '__main__':
+    unittest.TextTestRunner().run(suite())
@@ -56,7 +56,7 @@ class TestSubs(unittest.TestCase):
         self.params['auxiliary_column_moments_of_inertia'] = 1e1 * np.array([10.0, 10.0, 2.0, 0.0, 0.0, 0.0])
 
         self.params['number_of_auxiliary_columns'] = 3
-        self.params['water_ballast_mass_vector'] = 1e9*np.arange(5)
+        self.params['water_ballast_radius_vector'] = np.sqrt(1e6/np.pi) * np.ones(5)
         self.params['water_ballast_zpts_vector'] = np.array([-10, -9, -8, -7, -6])
         self.params['radius_to_auxiliary_column'] = 20.0
         self.params['z_center_of_buoyancy'] = -2.0
@@ -94,20 +94,41 @@ class TestSubs(unittest.TestCase):
     def testBalance(self):
         self.mysemi.balance(self.params, self.unknowns)
         m_water = 1e3*1e4 - 1e4 - 15
-        h_expect = np.interp(m_water, self.params['water_ballast_mass_vector'], self.params['water_ballast_zpts_vector']) + 10.0
+        h_expect = m_water / 1e3 / 1e6
         cg_expect_z = (1e4*40.0 + m_water*(-10 + 0.5*h_expect)) / (1e4+m_water)
         cg_expect_xy = 1e4*40.0/ (1e4+m_water)
 
         self.assertEqual(self.unknowns['variable_ballast_mass'], m_water)
-        self.assertEqual(self.unknowns['variable_ballast_height_ratio'], h_expect/4.0)
+        self.assertAlmostEqual(self.unknowns['variable_ballast_height_ratio'], h_expect/4.0)
         npt.assert_almost_equal(self.unknowns['center_of_mass'], np.array([cg_expect_xy, cg_expect_xy, cg_expect_z]))
         
         self.params['number_of_auxiliary_columns'] = 0
         self.mysemi.balance(self.params, self.unknowns)
 
         self.assertEqual(self.unknowns['variable_ballast_mass'], m_water)
-        self.assertEqual(self.unknowns['variable_ballast_height_ratio'], h_expect/4.0)
+        self.assertAlmostEqual(self.unknowns['variable_ballast_height_ratio'], h_expect/4.0)
         npt.assert_almost_equal(self.unknowns['center_of_mass'], np.array([cg_expect_xy, cg_expect_xy, cg_expect_z]))
+
+        # Tapered column with the ballast filling into the second frustum, against a fine grid
+        self.params['water_ballast_zpts_vector'] = np.array([-10.0, -8.0, -6.0, -6.0, -6.0])
+        self.params['water_ballast_radius_vector'] = np.array([30.0, 20.0, 25.0, 25.0, 25.0])
+        self.params['total_displacement'] = 4e3
+        self.mysemi.balance(self.params, self.unknowns)
+        m_water = 1e3*4e3 - 1e4 - 15
+        z = np.linspace(-10.0, -6.0, 400001)
+        r = np.interp(z, self.params['water_ballast_zpts_vector'][:3], self.params['water_ballast_radius_vector'][:3])
+        V = np.r_[0.0, np.cumsum(0.5*np.pi*(r[:-1]**2 + r[1:]**2)*np.diff(z))]
+        z_end = np.interp(m_water/1e3, V, z)
+        self.assertGreater(z_end, -8.0)
+        self.assertAlmostEqual(self.unknowns['variable_ballast_height_ratio'], (z_end + 10.0)/4.0, 6)
+        under = z <= z_end
+        z_cg = np.trapz(z[under]*r[under]**2, z[under]) / np.trapz(r[under]**2, z[under])
+        self.assertAlmostEqual(self.unknowns['variable_ballast_center_of_mass'], z_cg, 5)
+
+        # Not enough room
+        self.params['total_displacement'] = 1e5
+        self.mysemi.balance(self.params, self.unknowns)
+        self.assertGreater(self.unknowns['variable_ballast_height_ratio'], 1.0)
         
 
     def testStability(self):